@@ -0,0 +1,72 @@
+"""
+Rebuild daily_summaries for every user from meal_logs.
+
+Usage:
+    python scripts/backfill_daily_summaries.py
+    python scripts/backfill_daily_summaries.py --workers 8 --start 2024-01-01
+    python scripts/backfill_daily_summaries.py --restart
+
+Interrupted runs resume from the last completed partition unless --restart
+is passed.
+"""
+
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tqdm import tqdm
+
+from src.db.postgres_client import db
+from src.services.summary_backfill import run_backfill, DEFAULT_CHECKPOINT
+from src.utils import load_config
+
+
+def main():
+    """Run the daily summary backfill."""
+    config = load_config()["backfill"]
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--workers", type=int, default=config["workers"])
+    parser.add_argument("--chunk-size", type=int, default=config["chunk_size"])
+    parser.add_argument("--start", type=date.fromisoformat, help="First date (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Last date (YYYY-MM-DD)")
+    parser.add_argument("--checkpoint", type=Path, default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--restart", action="store_true", help="Ignore any saved checkpoint")
+    args = parser.parse_args()
+
+    print("Initializing database...")
+    db.create_tables()
+
+    progress = None
+
+    def on_start(total: int, done: int) -> None:
+        nonlocal progress
+        if done:
+            print(f"Resuming: {done}/{total} partitions already done")
+        progress = tqdm(total=total, initial=done, desc="Partitions")
+
+    def on_progress(partition: tuple[int, int], count: int) -> None:
+        progress.update(1)
+        progress.set_postfix(summaries=count)
+
+    written = run_backfill(
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        start_date=args.start,
+        end_date=args.end,
+        checkpoint_path=args.checkpoint,
+        resume=not args.restart,
+        on_start=on_start,
+        on_progress=on_progress,
+    )
+    progress.close()
+
+    print(f"\nDone! Wrote {written} daily summaries.")
+
+
+if __name__ == "__main__":
+    main()
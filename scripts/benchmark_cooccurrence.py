@@ -0,0 +1,137 @@
+"""
+Evaluate and benchmark the co-occurrence recommender on synthetic meal logs
+(no database needed).
+
+Meals are drawn from recurring "recipes" (groups of foods eaten together)
+plus random extras. The model is fit on the first baskets; for each later
+basket one food is hidden and looked up from another food in the same
+basket. Hit rate@k is compared with recommending the most logged foods.
+
+Usage:
+    python scripts/benchmark_cooccurrence.py
+    python scripts/benchmark_cooccurrence.py --baskets 1000000 --foods 50000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.benchmark_typeahead import percentile
+from src.services.cooccurrence import CooccurrenceModel
+
+
+def make_baskets(n_baskets: int, n_foods: int, seed: int) -> list[np.ndarray]:
+    """Baskets of distinct food_ids built from shared recipes."""
+    rng = np.random.default_rng(seed)
+    popularity = 1 / np.arange(1, n_foods + 1) ** 0.8
+    popularity /= popularity.sum()
+    recipes = [
+        rng.choice(n_foods, size=rng.integers(2, 5), replace=False, p=popularity) + 1
+        for _ in range(n_foods // 10)
+    ]
+    recipe_weights = 1 / np.arange(1, len(recipes) + 1) ** 0.7
+    recipe_weights /= recipe_weights.sum()
+
+    picks = rng.choice(len(recipes), size=n_baskets, p=recipe_weights)
+    extras = rng.choice(n_foods, size=n_baskets, p=popularity) + 1
+    has_extra = rng.random(n_baskets) < 0.5
+    return [
+        np.unique(np.append(recipes[pick], extra) if add else recipes[pick])
+        for pick, extra, add in zip(picks, extras, has_extra)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--baskets", type=int, default=500000)
+    parser.add_argument("--foods", type=int, default=20000)
+    parser.add_argument("--test", type=float, default=0.1, help="Share of baskets held out")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"Generating {args.baskets} baskets over {args.foods} foods...")
+    baskets = make_baskets(args.baskets, args.foods, args.seed)
+    n_train = int(len(baskets) * (1 - args.test))
+    train, test = baskets[:n_train], baskets[n_train:]
+
+    basket_numbers = np.repeat(np.arange(n_train), [len(b) for b in train])
+    food_ids = np.concatenate(train)
+
+    start = time.perf_counter()
+    model = CooccurrenceModel.fit(basket_numbers, food_ids, last_log_id=len(food_ids))
+    print(
+        f"Fit: {time.perf_counter() - start:.2f}s, {len(food_ids)} logs, "
+        f"{model.counts.nnz} pairs, {model.top.nnz} top-list entries"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        model.save(Path(tmp) / "cooccurrence")
+        print(f"Save: {time.perf_counter() - start:.2f}s")
+        start = time.perf_counter()
+        model = CooccurrenceModel.load(Path(tmp) / "cooccurrence")
+        print(f"Load (memory-mapped): {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        # Offline evaluation: hide one food per test basket
+        rng = np.random.default_rng(args.seed + 1)
+        popular = model.food_ids[np.argsort(-model.item_counts, kind="stable")]
+        hits = popular_hits = evaluated = 0
+        timings = []
+        for basket in test:
+            if len(basket) < 2:
+                continue
+            query, target = rng.choice(basket, 2, replace=False)
+            start = time.perf_counter()
+            related = [food_id for food_id, _ in model.related(int(query), args.k)]
+            timings.append(time.perf_counter() - start)
+            hits += int(target) in related
+            popular_hits += int(target) in [f for f in popular[:args.k + 1] if f != query][:args.k]
+            evaluated += 1
+
+        print(
+            f"Hit rate@{args.k}: co-occurrence {hits / evaluated:.3f}, "
+            f"most logged {popular_hits / evaluated:.3f} ({evaluated} held-out baskets)"
+        )
+        print(
+            f"Precomputed lists: p50 {percentile(timings, 50):.3f} ms, "
+            f"p95 {percentile(timings, 95):.3f} ms, p99 {percentile(timings, 99):.3f} ms"
+        )
+
+        # Incremental updates: apply the held-out baskets as new logs
+        logs = {
+            "log_ids": np.arange(len(food_ids) + 1, len(food_ids) + 1 + sum(len(b) for b in test)),
+            "user_ids": np.repeat(np.arange(len(test)), [len(b) for b in test]),
+            "days": np.zeros(sum(len(b) for b in test), dtype=np.int64),
+            "meal_codes": np.zeros(sum(len(b) for b in test), dtype=np.int64),
+            "food_ids": np.concatenate(test),
+            "meal_names": np.array(["lunch"], dtype=object),
+        }
+        start = time.perf_counter()
+        model.apply_logs(logs, {})
+        elapsed = time.perf_counter() - start
+        print(
+            f"Incremental updates: {len(logs['log_ids'])} logs in {elapsed:.2f}s "
+            f"({elapsed / len(logs['log_ids']) * 1e6:.1f} us/log), {model.pending_updates} pending pairs"
+        )
+
+        touched = rng.choice(list(model.pending_pairs), min(1000, len(model.pending_pairs)), replace=False)
+        timings = []
+        for food_id in touched:
+            start = time.perf_counter()
+            model.related(int(food_id), args.k)
+            timings.append(time.perf_counter() - start)
+        print(
+            f"Updated foods (re-ranked): p50 {percentile(timings, 50):.3f} ms, "
+            f"p95 {percentile(timings, 95):.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark typo-tolerant search on a synthetic catalog (no database needed).
+
+Usage:
+    python scripts/benchmark_fuzzy_search.py
+    python scripts/benchmark_fuzzy_search.py --foods 500000 --queries 2000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.benchmark_typeahead import make_catalog, percentile
+from src.services.fuzzy_search import TrigramIndex
+
+
+def add_typo(rng: random.Random, word: str) -> str:
+    """Apply one random deletion, insertion, substitution or swap."""
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    kind = rng.choice(["delete", "insert", "substitute", "swap"])
+    if kind == "delete":
+        return word[:i] + word[i + 1:]
+    if kind == "insert":
+        return word[:i] + rng.choice("aeiou") + word[i:]
+    if kind == "substitute":
+        return word[:i] + rng.choice("bcdfgklmnprst") + word[i + 1:]
+    return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--foods", type=int, default=500000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--target-p95-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    print(f"Generating {args.foods} synthetic foods...")
+    food_ids, names, _ = make_catalog(args.foods, args.seed)
+
+    start = time.perf_counter()
+    index = TrigramIndex.build(food_ids, names)
+    print(f"Build: {time.perf_counter() - start:.1f}s")
+
+    rng = random.Random(args.seed + 1)
+    timings = []
+    found = 0
+    answered = 0
+    for _ in range(args.queries):
+        target = rng.randrange(len(names))
+        words = names[target].lower().split()[:2]
+        query = " ".join(add_typo(rng, word) for word in words)
+
+        start = time.perf_counter()
+        results = index.search(query, k=10)
+        timings.append(time.perf_counter() - start)
+        found += food_ids[target] in results
+        answered += bool(results)
+
+    p95 = percentile(timings, 95)
+    print(
+        f"Search: p50 {percentile(timings, 50):.2f} ms, "
+        f"p95 {p95:.2f} ms, p99 {percentile(timings, 99):.2f} ms "
+        f"({'within' if p95 <= args.target_p95_ms else 'OVER'} {args.target_p95_ms:.0f} ms p95 target)"
+    )
+    # Synthetic names reuse a small syllable set, so near-identical names
+    # often tie with the target and push it out of the top 10
+    print(f"Recall@10 of the misspelled food: {found / args.queries:.1%}")
+    print(f"Queries with at least one match: {answered / args.queries:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Benchmark week plan generation: per-meal queries vs. one shared food pool.
+
+Runs against a throwaway SQLite database filled with synthetic foods and
+counts the SQL statements each approach issues.
+
+Usage:
+    python scripts/benchmark_meal_planner.py
+    python scripts/benchmark_meal_planner.py --foods 50000 --runs 5
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from src.db.postgres_client import db, Base, Food
+from src.services.catalog import catalog, NUTRIENT_COLUMNS
+from src.services.constraints import DIET_EXCLUDED_CATEGORIES
+from src.services.meal_planner import MealPlanner
+
+CATEGORIES = [
+    "Grains", "Dairy", "Eggs", "Fruits", "Poultry", "Fish", "Beef",
+    "Vegetables", "Protein", "Nuts", "Snacks", "Beverages", "Sweets",
+]
+
+
+class QueryPerMealPool:
+    """The previous behaviour: one foods query (plus fallback) per meal."""
+
+    def __init__(self, planner: MealPlanner, vegetarian: bool, high_protein: bool):
+        self.planner = planner
+        self.vegetarian = vegetarian
+        self.high_protein = high_protein
+
+    def foods_for(self, meal_type: str, limit: int = None, by_protein: bool = False) -> list[Food]:
+        session = db.get_session()
+        try:
+            query = session.query(Food)
+            categories = self.planner.MEAL_CATEGORIES.get(meal_type, [])
+            if categories:
+                query = query.filter(Food.category.in_(categories))
+            if self.vegetarian:
+                query = query.filter(~Food.category.in_(DIET_EXCLUDED_CATEGORIES["vegetarian"]))
+            if self.high_protein:
+                query = query.filter(Food.protein_g >= 10)
+            foods = query.all()
+            if not foods:
+                foods = session.query(Food).limit(20).all()
+            return foods
+        finally:
+            session.close()
+
+
+def setup_database(path: Path, n_foods: int, seed: int) -> list[str]:
+    """Point the shared client at a fresh SQLite file and fill it."""
+    db.engine = create_engine(f"sqlite:///{path}")
+    db.Session = sessionmaker(bind=db.engine)
+    Base.metadata.create_all(db.engine)
+
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n_foods):
+        row = {column: round(rng.uniform(0, 10), 2) for column in NUTRIENT_COLUMNS}
+        row["protein_g"] = round(rng.uniform(0, 35), 2)
+        row["carbs_g"] = round(rng.uniform(0, 60), 2)
+        row["fat_g"] = round(rng.uniform(0, 25), 2)
+        row["calories"] = round(
+            4 * (row["protein_g"] + row["carbs_g"]) + 9 * row["fat_g"] + rng.uniform(0, 20), 2
+        )
+        rows.append({
+            "fdc_id": i + 1,
+            "name": f"Food {i + 1}",
+            "category": rng.choice(CATEGORIES),
+            "serving_size": 100,
+            "serving_unit": "g",
+            **row,
+        })
+
+    statements = []
+    with db.engine.begin() as conn:
+        conn.execute(insert(Food), rows)
+    event.listen(
+        db.engine, "before_cursor_execute",
+        lambda *args, **kwargs: statements.append(args[2]),
+    )
+    return statements
+
+
+def time_runs(statements: list[str], runs: int, fn) -> tuple[float, float]:
+    """Mean latency (ms) and SQL statements per run."""
+    statements.clear()
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    elapsed = (time.perf_counter() - start) / runs * 1000
+    return elapsed, len(statements) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--foods", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    planner = MealPlanner()
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Loading {args.foods} synthetic foods...")
+        statements = setup_database(Path(tmp) / "bench.db", args.foods, args.seed)
+
+        for vegetarian, high_protein in ((False, False), (True, True)):
+            label = "vegetarian, high protein" if vegetarian else "no filters"
+
+            def per_meal_queries():
+                for day in range(7):
+                    pool = QueryPerMealPool(planner, vegetarian, high_protein)
+                    planner.generate_day_plan(pool=pool)
+
+            def shared_pool_cold():
+                catalog._snapshot = None
+                catalog.invalidate()
+                planner.generate_week_plan(vegetarian=vegetarian, high_protein=high_protein)
+
+            def shared_pool_warm():
+                planner.generate_week_plan(vegetarian=vegetarian, high_protein=high_protein)
+
+            print(f"\nWeek plan ({label}):")
+            for name, fn in (
+                ("per-meal queries", per_meal_queries),
+                ("shared pool, cold catalog", shared_pool_cold),
+                ("shared pool, warm catalog", shared_pool_warm),
+            ):
+                ms, queries = time_runs(statements, args.runs, fn)
+                print(f"  {name:<28} {ms:8.1f} ms  {queries:5.1f} SQL statements")
+
+
+if __name__ == "__main__":
+    main()
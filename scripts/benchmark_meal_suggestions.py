@@ -0,0 +1,127 @@
+"""
+Benchmark meal suggestions on a synthetic catalog (no database needed).
+
+Compares the precomputed suggestion rankings with filtering and sorting the
+whole snapshot per call (the previous behaviour), checks both return the
+same foods, and times suggesting for a batch of users.
+
+Usage:
+    python scripts/benchmark_meal_suggestions.py
+    python scripts/benchmark_meal_suggestions.py --foods 500000 --users 10000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.benchmark_nutrient_similarity import make_nutrients
+from scripts.benchmark_typeahead import percentile
+from src.services.catalog import CatalogSnapshot
+from src.services.suggestion_index import (
+    FILLING_MIN_FIBER_G,
+    HIGH_PROTEIN_MIN_G,
+    SuggestionRankings,
+)
+
+K = 3
+
+
+def make_snapshot(n_foods: int, seed: int) -> CatalogSnapshot:
+    return CatalogSnapshot(
+        version=1,
+        food_ids=np.arange(1, n_foods + 1, dtype=np.int64),
+        fdc_ids=np.full(n_foods, -1, dtype=np.int64),
+        names=[f"Food {i}" for i in range(n_foods)],
+        brands=[None] * n_foods,
+        category_codes=np.zeros(n_foods, dtype=np.int32),
+        categories=[""],
+        serving_sizes=np.full(n_foods, 100, dtype=np.float32),
+        serving_units=["g"] * n_foods,
+        nutrients=np.round(make_nutrients(n_foods, seed), 1),
+    )
+
+
+def scan(snapshot: CatalogSnapshot, kind: str, budget: float, mask: np.ndarray) -> np.ndarray:
+    """The per-call filter and sort the rankings replace."""
+    if kind == "protein":
+        keep = snapshot.mask(min_values={"protein_g": HIGH_PROTEIN_MIN_G})
+        return snapshot.top_k("protein_g", K, mask=keep & mask)
+    if kind == "filling":
+        keep = snapshot.mask(min_values={"fiber_g": FILLING_MIN_FIBER_G})
+        return snapshot.top_k("calories", K, mask=keep & mask, descending=False)
+    keep = snapshot.mask(max_values={"calories": budget})
+    return snapshot.top_k("protein_g", K, mask=keep & mask)
+
+
+def ranked(rankings: SuggestionRankings, kind: str, budget: float) -> np.ndarray:
+    if kind == "protein":
+        return rankings.high_protein(K)
+    if kind == "filling":
+        return rankings.filling(K)
+    return rankings.within_calories(budget, K)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--foods", type=int, default=500000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"Generating {args.foods} synthetic foods...")
+    snapshot = make_snapshot(args.foods, args.seed)
+    rng = np.random.default_rng(args.seed + 1)
+    everything = np.ones(args.foods, dtype=bool)
+    constrained = rng.random(args.foods) < 0.3
+
+    start = time.perf_counter()
+    rankings = SuggestionRankings(snapshot)
+    print(f"Build: {time.perf_counter() - start:.2f}s")
+    constrained_rankings = SuggestionRankings(snapshot, constrained)
+
+    mismatches = 0
+    for kind in ("protein", "filling", "budget"):
+        for label, mask, index in (
+            ("all foods", everything, rankings),
+            ("30% allowed", constrained, constrained_rankings),
+        ):
+            scan_timings, ranked_timings = [], []
+            for budget in rng.uniform(0, 1200, args.queries):
+                start = time.perf_counter()
+                expected = scan(snapshot, kind, budget, mask)
+                scan_timings.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                rows = ranked(index, kind, budget)
+                ranked_timings.append(time.perf_counter() - start)
+                mismatches += not np.array_equal(rows, expected)
+
+            print(
+                f"{kind:8} {label:12} scan p50 {percentile(scan_timings, 50):7.3f} ms | "
+                f"ranked p50 {percentile(ranked_timings, 50):.3f} ms, "
+                f"p95 {percentile(ranked_timings, 95):.3f} ms"
+            )
+    print(f"Results differing from the scan: {mismatches}")
+
+    # Batch: per distinct budget, as get_meal_suggestions_for_users does
+    budgets = np.round(rng.uniform(0, 400, args.users))
+    start = time.perf_counter()
+    by_budget = {}
+    for budget in budgets:
+        if budget not in by_budget:
+            by_budget[budget] = rankings.within_calories(float(budget), K)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Batch of {args.users} budget users ({len(by_budget)} distinct budgets): "
+        f"{elapsed * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
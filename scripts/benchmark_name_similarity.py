@@ -0,0 +1,68 @@
+"""
+Benchmark TF-IDF name similarity on a synthetic catalog (no database needed).
+
+Usage:
+    python scripts/benchmark_name_similarity.py
+    python scripts/benchmark_name_similarity.py --foods 500000 --queries 1000
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.benchmark_typeahead import make_catalog, percentile
+from src.services.name_similarity import NameVectors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--foods", type=int, default=500000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"Generating {args.foods} synthetic foods...")
+    food_ids, names, _ = make_catalog(args.foods, args.seed)
+
+    start = time.perf_counter()
+    vectors = NameVectors.fit(food_ids, names)
+    print(
+        f"Fit: {time.perf_counter() - start:.1f}s, "
+        f"{vectors.postings.shape[0]} n-grams, {vectors.postings.nnz / 1e6:.1f}M non-zeros"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        vectors.save(Path(tmp) / "name_tfidf")
+        print(f"Save: {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        vectors = NameVectors.load(Path(tmp) / "name_tfidf")
+        print(f"Load (memory-mapped): {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        rng = random.Random(args.seed + 1)
+        timings = []
+        for _ in range(args.queries):
+            row = rng.randrange(len(names))
+            start = time.perf_counter()
+            vectors.similar_to_name(names[row], k=10, exclude_ids=[food_ids[row]])
+            timings.append(time.perf_counter() - start)
+        print(
+            f"Similar foods: p50 {percentile(timings, 50):.1f} ms, "
+            f"p95 {percentile(timings, 95):.1f} ms, p99 {percentile(timings, 99):.1f} ms"
+        )
+
+        extra = rng.sample(names, 1000)
+        start = time.perf_counter()
+        for i, name in enumerate(extra):
+            vectors.extend([args.foods + i + 1], [name], catalog_version=1)
+        print(f"Incremental extend: {(time.perf_counter() - start):.2f}s for 1000 single adds")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark nutrient nearest-neighbour search on a synthetic catalog (no database needed).
+
+Compares KD-tree k-NN queries with a brute-force scan over all foods (the
+cost of the old per-call range filter) and checks the two agree.
+
+Usage:
+    python scripts/benchmark_nutrient_similarity.py
+    python scripts/benchmark_nutrient_similarity.py --foods 500000 --per-100kcal
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.benchmark_typeahead import percentile
+from src.services.catalog import NUTRIENT_COLUMNS, NUTRIENT_INDEX
+from src.services.nutrient_similarity import NutrientNeighbors, nutrient_features
+
+
+def make_nutrients(n_foods: int, seed: int) -> np.ndarray:
+    """Per-serving nutrients with calories consistent with the macros."""
+    rng = np.random.default_rng(seed)
+    nutrients = np.zeros((n_foods, len(NUTRIENT_COLUMNS)), dtype=np.float32)
+    protein = rng.gamma(1.5, 6.0, n_foods)
+    carbs = rng.gamma(1.2, 15.0, n_foods)
+    fat = rng.gamma(1.0, 6.0, n_foods)
+    nutrients[:, NUTRIENT_INDEX["protein_g"]] = protein
+    nutrients[:, NUTRIENT_INDEX["carbs_g"]] = carbs
+    nutrients[:, NUTRIENT_INDEX["fat_g"]] = fat
+    nutrients[:, NUTRIENT_INDEX["fiber_g"]] = carbs * rng.uniform(0, 0.2, n_foods)
+    nutrients[:, NUTRIENT_INDEX["calories"]] = 4 * protein + 4 * carbs + 9 * fat
+    return nutrients
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--foods", type=int, default=500000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--per-100kcal", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"Generating {args.foods} synthetic foods...")
+    food_ids = np.arange(1, args.foods + 1, dtype=np.int64)
+    nutrients = make_nutrients(args.foods, args.seed)
+
+    start = time.perf_counter()
+    neighbors = NutrientNeighbors.fit(food_ids, nutrients, per_100kcal=args.per_100kcal)
+    print(f"Build: {time.perf_counter() - start:.2f}s")
+
+    features, _ = nutrient_features(nutrients, args.per_100kcal)
+    scaled = features / neighbors.scale
+
+    rng = np.random.default_rng(args.seed + 1)
+    rows = rng.integers(0, args.foods, args.queries)
+    tree_timings, scan_timings, mismatches = [], [], 0
+    for row in rows:
+        start = time.perf_counter()
+        pairs = neighbors.query(nutrients[row], args.k, exclude_ids=[int(food_ids[row])])
+        tree_timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        distances = np.sqrt(((scaled - scaled[row]) ** 2).sum(axis=1))
+        distances[row] = np.inf
+        nearest = np.argpartition(distances, args.k)[:args.k]
+        scan_timings.append(time.perf_counter() - start)
+
+        expected = np.sort(distances[nearest])
+        if not np.allclose([d for _, d in pairs], expected, atol=1e-6):
+            mismatches += 1
+
+    print(
+        f"KD-tree k-NN: p50 {percentile(tree_timings, 50):.2f} ms, "
+        f"p95 {percentile(tree_timings, 95):.2f} ms, p99 {percentile(tree_timings, 99):.2f} ms"
+    )
+    print(
+        f"Full scan:    p50 {percentile(scan_timings, 50):.2f} ms, "
+        f"p95 {percentile(scan_timings, 95):.2f} ms"
+    )
+    print(f"Results differing from the exact scan: {mismatches}/{args.queries}")
+
+
+if __name__ == "__main__":
+    main()
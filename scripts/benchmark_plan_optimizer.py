@@ -0,0 +1,80 @@
+"""
+Compare greedy and optimized meal planning for plan quality and latency.
+
+Runs against a throwaway SQLite database filled with synthetic foods.
+
+Usage:
+    python scripts/benchmark_plan_optimizer.py
+    python scripts/benchmark_plan_optimizer.py --foods 20000 --days 100
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from scripts.benchmark_meal_planner import setup_database
+from src.services.meal_planner import MealPlanner
+from src.utils import load_config
+
+MACROS = ("calories", "protein", "carbs", "fat")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--foods", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    tolerance = load_config()["nutrition"]["target_tolerance"]
+    rng = random.Random(args.seed)
+    targets = []
+    for _ in range(args.days):
+        protein, carbs, fat = rng.randrange(80, 201, 10), rng.randrange(100, 301, 10), rng.randrange(40, 101, 5)
+        # Keep calories consistent with the macros, as real targets are
+        targets.append({
+            "calorie_target": round(4 * (protein + carbs) + 9 * fat, -1),
+            "protein_target": protein,
+            "carb_target": carbs,
+            "fat_target": fat,
+        })
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Loading {args.foods} synthetic foods...")
+        setup_database(Path(tmp) / "bench.db", args.foods, args.seed)
+
+        for mode in MealPlanner.MODES:
+            planner = MealPlanner(mode=mode)
+            pool = planner.build_pool()
+            plan_rng = random.Random(args.seed)
+
+            misses, timings = [], []
+            for day_targets in targets:
+                start = time.perf_counter()
+                plan = planner.generate_day_plan(**day_targets, pool=pool, rng=plan_rng)
+                timings.append(time.perf_counter() - start)
+
+                goal = np.array(list(plan["targets"].values()), dtype=float)
+                totals = np.array([sum(m[k] for m in plan["meals"]) for k in MACROS])
+                misses.append(np.abs(totals - goal) / goal)
+
+            misses = np.array(misses)
+            within = (misses <= tolerance).all(axis=1).mean()
+            print(f"\n{mode}:")
+            print(f"  latency per day plan: p50 {np.percentile(timings, 50) * 1000:.1f} ms, "
+                  f"p95 {np.percentile(timings, 95) * 1000:.1f} ms")
+            print("  mean miss: " + ", ".join(
+                f"{macro} {misses[:, i].mean():.1%}" for i, macro in enumerate(MACROS)
+            ))
+            print(f"  days within {tolerance:.0%} on all four macros: {within:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark FoodView read models against ORM Food objects.
+
+Measures the memory held per object and the time to build a page of
+results, for both ways services produce foods: from database rows
+(session.query(Food) vs selecting FOOD_VIEW_COLUMNS) and from the catalog
+snapshot (to_foods vs to_food_views). Uses an in-memory SQLite database,
+so no database setup is needed.
+
+Usage:
+    python scripts/benchmark_read_models.py
+    python scripts/benchmark_read_models.py --foods 50000 --page 50
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.benchmark_meal_suggestions import make_snapshot
+from scripts.benchmark_typeahead import percentile
+from src.db.postgres_client import Base, Food
+from src.db.read_models import FoodView, FOOD_VIEW_COLUMNS
+from src.services.catalog import NUTRIENT_COLUMNS
+
+
+def make_database(snapshot):
+    """An in-memory SQLite database holding the snapshot's foods."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.bulk_insert_mappings(Food, [
+        {
+            "food_id": int(food_id),
+            "name": name,
+            "serving_size": 100,
+            "serving_unit": "g",
+            **{column: round(float(value), 2) for column, value in zip(NUTRIENT_COLUMNS, values)},
+        }
+        for food_id, name, values in zip(snapshot.food_ids, snapshot.names, snapshot.nutrients)
+    ])
+    session.commit()
+    session.close()
+    return sessionmaker(bind=engine)
+
+
+def orm_rows(session, food_ids):
+    return session.query(Food).filter(Food.food_id.in_(food_ids)).all()
+
+
+def view_rows(session, food_ids):
+    rows = session.query(*FOOD_VIEW_COLUMNS).filter(Food.food_id.in_(food_ids)).all()
+    return [FoodView.from_row(row) for row in rows]
+
+
+def bytes_per_object(build, count: int) -> float:
+    """Memory still allocated after build() returns count objects, per object."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(held) == count
+    return (after - before) / count
+
+
+def timings(build, runs: int) -> list[float]:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        build()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def report(label: str, times: list[float], per_object: float) -> None:
+    print(
+        f"  {label:<28} p50 {percentile(times, 50):7.3f} ms  "
+        f"p95 {percentile(times, 95):7.3f} ms  {per_object:7.0f} B/object"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--foods", type=int, default=20000)
+    parser.add_argument("--page", type=int, default=20, help="Foods built per call")
+    parser.add_argument("--runs", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"Generating {args.foods} synthetic foods...")
+    snapshot = make_snapshot(args.foods, args.seed)
+    Session = make_database(snapshot)
+    rng = np.random.default_rng(args.seed)
+    pages = [
+        np.sort(rng.choice(args.foods, args.page, replace=False))
+        for _ in range(args.runs)
+    ]
+
+    # Same values either way
+    session = Session()
+    sample = pages[0]
+    foods = orm_rows(session, snapshot.food_ids[sample].tolist())
+    assert [FoodView.from_food(food) for food in foods] == view_rows(session, snapshot.food_ids[sample].tolist())
+    assert [FoodView.from_food(food) for food in snapshot.to_foods(sample)] == snapshot.to_food_views(sample)
+    session.close()
+
+    # Memory: every food held at once, the ORM ones with their session open
+    all_ids = snapshot.food_ids.tolist()
+    all_rows = np.arange(args.foods)
+    session = Session()
+    orm_bytes = bytes_per_object(lambda: orm_rows(session, all_ids), args.foods)
+    session.close()
+    session = Session()
+    view_bytes = bytes_per_object(lambda: view_rows(session, all_ids), args.foods)
+    session.close()
+    to_foods_bytes = bytes_per_object(lambda: snapshot.to_foods(all_rows), args.foods)
+    to_views_bytes = bytes_per_object(lambda: snapshot.to_food_views(all_rows), args.foods)
+
+    # Time: one page per call, a fresh session each time (as a page render would)
+    def timed_db(fetch):
+        times = []
+        for rows in pages:
+            session = Session()
+            start = time.perf_counter()
+            fetch(session, snapshot.food_ids[rows].tolist())
+            times.append(time.perf_counter() - start)
+            session.close()
+        return times
+
+    timed_db(orm_rows), timed_db(view_rows)  # warm up
+    print(f"\nBuilding {args.page} foods per call, {args.runs} calls:")
+    print("From database rows:")
+    report("session.query(Food)", timed_db(orm_rows), orm_bytes)
+    report("FOOD_VIEW_COLUMNS + from_row", timed_db(view_rows), view_bytes)
+
+    page_rows = iter(pages * 2)
+    print("From the catalog snapshot:")
+    report("to_foods", timings(lambda: snapshot.to_foods(next(page_rows)), args.runs), to_foods_bytes)
+    report("to_food_views", timings(lambda: snapshot.to_food_views(next(page_rows)), args.runs), to_views_bytes)
+
+
+if __name__ == "__main__":
+    main()
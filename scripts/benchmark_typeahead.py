@@ -0,0 +1,95 @@
+"""
+Benchmark the typeahead prefix index on a synthetic catalog (no database needed).
+
+Usage:
+    python scripts/benchmark_typeahead.py
+    python scripts/benchmark_typeahead.py --foods 500000 --queries 5000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from src.services.typeahead import PrefixIndex
+
+
+def make_vocabulary(rng: random.Random, size: int) -> list[str]:
+    """Pronounceable pseudo-words standing in for food name tokens."""
+    consonants = "bcdfghklmnprstvwz"
+    vowels = "aeiou"
+    words = set()
+    while len(words) < size:
+        length = rng.randint(2, 4)
+        words.add("".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(length)))
+    return sorted(words)
+
+
+def make_catalog(n_foods: int, seed: int) -> tuple[list[int], list[str], np.ndarray]:
+    rng = random.Random(seed)
+    vocab = make_vocabulary(rng, 40000)
+    # Zipf-like token frequency, as in real food names
+    cum_weights = np.cumsum([1 / (i + 1) for i in range(len(vocab))]).tolist()
+    names = [
+        " ".join(rng.choices(vocab, cum_weights=cum_weights, k=rng.randint(2, 5))).title()
+        for _ in range(n_foods)
+    ]
+    popularity = np.random.default_rng(seed).zipf(1.5, n_foods).astype(np.float32)
+    return list(range(1, n_foods + 1)), names, popularity
+
+
+def percentile(values: list[float], pct: float) -> float:
+    return float(np.percentile(values, pct)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--foods", type=int, default=500000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"Generating {args.foods} synthetic foods...")
+    food_ids, names, popularity = make_catalog(args.foods, args.seed)
+
+    start = time.perf_counter()
+    index = PrefixIndex.build(food_ids, names, popularity)
+    build_s = time.perf_counter() - start
+    print(f"Build: {build_s:.1f}s, ~{index.memory_bytes() / 1e6:.0f} MB")
+
+    rng = random.Random(args.seed + 1)
+    queries = []
+    for _ in range(args.queries):
+        tokens = rng.choice(names).lower().split()
+        first = tokens[0][:rng.randint(1, len(tokens[0]))]
+        if rng.random() < 0.3 and len(tokens) > 1:
+            queries.append(f"{tokens[0]} {tokens[1][:rng.randint(1, len(tokens[1]))]}")
+        else:
+            queries.append(first)
+
+    for label, run in (("cold", queries), ("warm", queries)):
+        timings = []
+        for query in run:
+            start = time.perf_counter()
+            index.search(query, k=10)
+            timings.append(time.perf_counter() - start)
+        print(
+            f"Search ({label}): p50 {percentile(timings, 50):.3f} ms, "
+            f"p95 {percentile(timings, 95):.3f} ms, p99 {percentile(timings, 99):.3f} ms"
+        )
+
+    timings = []
+    for i in range(1000):
+        start = time.perf_counter()
+        index.add(args.foods + i + 1, rng.choice(names), 1.0)
+        timings.append(time.perf_counter() - start)
+    print(f"Incremental add: p50 {percentile(timings, 50):.3f} ms, p99 {percentile(timings, 99):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
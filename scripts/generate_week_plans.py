@@ -0,0 +1,69 @@
+"""
+Precompute next week's meal plan for every user.
+
+Usage:
+    python scripts/generate_week_plans.py
+    python scripts/generate_week_plans.py --workers 8 --chunk-size 1000
+    python scripts/generate_week_plans.py --force
+
+Meant to run nightly (e.g. from cron). Users whose targets and the catalog
+version are unchanged since their last stored plan are skipped unless
+--force is passed.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tqdm import tqdm
+
+from src.db.postgres_client import db
+from src.services.plan_batch import run_batch
+from src.utils import load_config
+
+
+def main():
+    """Run the week plan batch."""
+    config = load_config()["plan_batch"]
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--workers", type=int, default=config["workers"])
+    parser.add_argument("--chunk-size", type=int, default=config["chunk_size"])
+    parser.add_argument("--force", action="store_true", help="Re-plan users with current plans too")
+    args = parser.parse_args()
+
+    print("Initializing database...")
+    db.create_tables()
+
+    progress = None
+
+    def on_start(total: int) -> None:
+        nonlocal progress
+        progress = tqdm(total=total, desc="Partitions")
+
+    def on_progress(planned: int, skipped: int) -> None:
+        progress.update(1)
+        progress.set_postfix(planned=planned, skipped=skipped)
+
+    start = time.perf_counter()
+    stats = run_batch(
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        force=args.force,
+        on_start=on_start,
+        on_progress=on_progress,
+    )
+    progress.close()
+
+    print(
+        f"\nDone in {time.perf_counter() - start:.1f}s! Planned {stats['planned']} users "
+        f"({stats['skipped']} up to date), wrote {stats['rows']} meal plan rows."
+    )
+
+
+if __name__ == "__main__":
+    main()
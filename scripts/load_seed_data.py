@@ -12,6 +12,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.db.postgres_client import db, Food
+from src.services.catalog import bump_catalog_version
+from src.services.food_loader import FoodLoader
 
 
 def main():
@@ -29,10 +31,12 @@ def main():
     skipped = 0
 
     try:
+        # Check which already exist with batched queries
+        loader = FoodLoader(session)
+        loader.load_fdc(food_data["fdc_id"] for food_data in foods_data)
+
         for food_data in foods_data:
-            # Check if already exists
-            existing = session.query(Food).filter(Food.fdc_id == food_data["fdc_id"]).first()
-            if existing:
+            if loader.get_by_fdc(food_data["fdc_id"]):
                 skipped += 1
                 continue
 
@@ -51,8 +55,11 @@ def main():
                 sodium_mg=food_data.get("sodium_mg", 0),
             )
             session.add(food)
+            loader.prime(food)
             added += 1
 
+        if added:
+            bump_catalog_version(session)
         session.commit()
         print(f"Added {added} foods, skipped {skipped} existing")
     except Exception as e:
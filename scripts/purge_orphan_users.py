@@ -0,0 +1,44 @@
+"""
+Delete users that never logged a meal, after a retention window.
+
+Usage:
+    python scripts/purge_orphan_users.py
+    python scripts/purge_orphan_users.py --retention-days 7 --batch-size 5000
+
+Every browser session gets its own users row; meant to run nightly (e.g.
+from cron) so rows of sessions that logged nothing don't pile up.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.db.postgres_client import db
+from src.services.user_service import DERIVED_TABLES, user_service
+
+
+def main():
+    """Purge orphan users."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--retention-days", type=int, help="Minimum age of a purged user")
+    parser.add_argument("--batch-size", type=int, help="Users deleted per transaction")
+    args = parser.parse_args()
+
+    print("Initializing database...")
+    db.create_tables()
+
+    def on_batch(totals: dict) -> None:
+        print(f"  batch {totals['batches']}: {totals['users']} users deleted so far")
+
+    start = time.perf_counter()
+    result = user_service.purge_orphans(args.retention_days, args.batch_size, on_batch=on_batch)
+    derived = ", ".join(f"{result[name]} {name}" for name in DERIVED_TABLES)
+    print(f"\nDone in {time.perf_counter() - start:.1f}s! Deleted {result['users']} users ({derived}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Rebuild per-user food frequencies (favorites) from meal_logs.
+
+Usage:
+    python scripts/rebuild_favorites.py
+    python scripts/rebuild_favorites.py --users 12 57
+
+Needed once after upgrading, and after changing favorites.half_life_days.
+Until a user is rebuilt their favorites are counted from meal_logs; meal
+log writes keep the table current from then on.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.db.postgres_client import db
+from src.services.favorites import rebuild_frequencies
+
+
+def main():
+    """Rebuild user_food_frequency."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--users", type=int, nargs="+", help="Only these user_ids")
+    args = parser.parse_args()
+
+    print("Initializing database...")
+    db.create_tables()
+
+    start = time.perf_counter()
+    written = rebuild_frequencies(args.users)
+    print(f"\nDone in {time.perf_counter() - start:.1f}s! Wrote {written} frequency rows.")
+
+
+if __name__ == "__main__":
+    main()
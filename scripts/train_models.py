@@ -0,0 +1,45 @@
+"""
+Train the recommender artifacts and publish them as a new models/ version.
+
+Usage:
+    python scripts/train_models.py
+    python scripts/train_models.py --only cooccurrence popularity
+    python scripts/train_models.py --keep-versions 5
+
+Meant to run nightly (e.g. from cron) and after bulk catalog loads. Running
+app processes swap in the new version within models.check_interval_s.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.db.postgres_client import db
+from src.services.model_training import TRAINERS, train_models
+
+
+def main():
+    """Run the training pipeline."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--only", nargs="+", choices=sorted(TRAINERS), help="Artifacts to train")
+    parser.add_argument("--keep-versions", type=int, help="Version directories to keep")
+    args = parser.parse_args()
+
+    print("Initializing database...")
+    db.create_tables()
+
+    def on_step(name: str, meta: dict) -> None:
+        details = ", ".join(f"{key}={value}" for key, value in meta.items() if key != "seconds")
+        print(f"  {name}: {meta['seconds']:.1f}s ({details})")
+
+    start = time.perf_counter()
+    result = train_models(args.only, args.keep_versions, on_step=on_step)
+    print(f"\nDone in {time.perf_counter() - start:.1f}s! Published models version {result['version']}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ from pathlib import Path
 
 from sqlalchemy import (
     create_engine,
+    inspect,
+    text,
     Column,
     Integer,
     String,
@@ -12,7 +14,9 @@ from sqlalchemy import (
     Boolean,
     DateTime,
     Date,
+    Float,
     ForeignKey,
+    Index,
     Text,
 )
 from sqlalchemy.orm import sessionmaker, relationship, declarative_base
@@ -61,6 +65,10 @@ class User(Base):
     protein_target = Column(Integer)
     carb_target = Column(Integer)
     fat_target = Column(Integer)
+    # Older logs counted into user_food_frequency; null for users that predate it
+    frequencies_rebuilt = Column(Boolean, default=True)
+    # Bumped with every meal log write; keys the pages' cached reads
+    data_version = Column(Integer, default=0)
     created_at = Column(DateTime, server_default=func.now())
 
     meal_logs = relationship("MealLog", back_populates="user")
@@ -83,6 +91,26 @@ class MealLog(Base):
     user = relationship("User", back_populates="meal_logs")
     food = relationship("Food", back_populates="meal_logs")
 
+    __table_args__ = (
+        # Per-user food counts (favorites fallback, frequency rebuilds)
+        Index("ix_meal_logs_user_food", "user_id", "food_id"),
+    )
+
+
+class UserFoodFrequency(Base):
+    """How often each user logs each food; maintained on meal log writes."""
+    __tablename__ = "user_food_frequency"
+
+    user_id = Column(Integer, ForeignKey("users.user_id"), primary_key=True)
+    food_id = Column(Integer, ForeignKey("foods.food_id"), primary_key=True)
+    log_count = Column(Integer, nullable=False, default=0)
+    # Recency-weighted count; see src/services/favorites.py
+    score = Column(Float, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_user_food_frequency_user_score", "user_id", "score"),
+    )
+
 
 class DailySummary(Base):
     """Aggregated daily nutrition summaries."""
@@ -111,16 +139,41 @@ class MealPlan(Base):
     meal_type = Column(String(20), nullable=False)
     food_id = Column(Integer, ForeignKey("foods.food_id"), nullable=False)
     servings = Column(Numeric(5, 2), default=1)
+    plan_key = Column(String(64), index=True)  # PlanCache key digest
+    catalog_version = Column(Integer)  # Catalog version the plan was built from
     created_at = Column(DateTime, server_default=func.now())
 
     user = relationship("User", back_populates="meal_plans")
     food = relationship("Food", back_populates="meal_plans")
 
 
+class CatalogVersion(Base):
+    """Single-row counter bumped whenever the foods table changes."""
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
 # ============================================================================
 # Database Connection
 # ============================================================================
 
+# Columns and indexes added to tables that existing databases already have;
+# create_all() skips tables that exist, so create_tables() adds them
+ADDED_COLUMNS = (
+    ("meal_plans", "plan_key"),
+    ("meal_plans", "catalog_version"),
+    ("users", "frequencies_rebuilt"),
+    ("users", "data_version"),
+)
+ADDED_INDEXES = (
+    ("meal_plans", "ix_meal_plans_plan_key"),
+    ("meal_logs", "ix_meal_logs_user_food"),
+)
+
+
 class DatabaseClient:
     """Manages database connections (PostgreSQL or SQLite)."""
 
@@ -158,10 +211,33 @@ class DatabaseClient:
         print(f"Connected to {self.db_type} database")
 
     def create_tables(self) -> None:
-        """Create all tables if they don't exist."""
+        """Create all tables if they don't exist, and add newer columns and indexes."""
         if self.engine is None:
             self.connect()
         Base.metadata.create_all(self.engine)
+        self._upgrade_tables()
+
+    def _upgrade_tables(self) -> None:
+        """Add ADDED_COLUMNS and ADDED_INDEXES where missing; safe to run repeatedly."""
+        inspector = inspect(self.engine)
+        with self.engine.begin() as conn:
+            for table_name, column_name in ADDED_COLUMNS:
+                existing = {column["name"] for column in inspector.get_columns(table_name)}
+                if column_name not in existing:
+                    column = Base.metadata.tables[table_name].c[column_name]
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    conn.execute(text(
+                        f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"
+                    ))
+
+            for table_name, index_name in ADDED_INDEXES:
+                existing = {index["name"] for index in inspector.get_indexes(table_name)}
+                if index_name not in existing:
+                    index = next(
+                        index for index in Base.metadata.tables[table_name].indexes
+                        if index.name == index_name
+                    )
+                    index.create(conn)
 
     def drop_tables(self) -> None:
         """Drop all tables. Use with caution."""
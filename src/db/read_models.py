@@ -0,0 +1,102 @@
+"""Immutable read models for display paths.
+
+FoodView and MealLogView have the attribute names of the Food and MealLog
+ORM models, so display code accepts either, but they are plain tuples: no
+session or identity-map state, no instrumentation, and floats instead of
+Decimals. Read-only service methods return them when called with
+view=True, built from FOOD_VIEW_COLUMNS / MEAL_LOG_VIEW_COLUMNS rows (or
+from the catalog snapshot) without ORM hydration.
+"""
+
+from datetime import date, datetime
+from typing import NamedTuple, Optional
+
+from sqlalchemy import Float, type_coerce
+
+from src.db.postgres_client import Food, MealLog
+
+
+class FoodView(NamedTuple):
+    """Read-only food row; missing nutrient values are 0.0."""
+
+    food_id: int
+    fdc_id: Optional[int]
+    name: str
+    brand: Optional[str]
+    category: Optional[str]
+    serving_size: float
+    serving_unit: Optional[str]
+    calories: float
+    protein_g: float
+    carbs_g: float
+    fat_g: float
+    fiber_g: float
+    sugar_g: float
+    sodium_mg: float
+
+    @classmethod
+    def from_row(cls, row) -> "FoodView":
+        """Build from a row of FOOD_VIEW_COLUMNS."""
+        food_id, fdc_id, name, brand, category, serving_size, serving_unit, *nutrients = row
+        return cls(
+            food_id,
+            fdc_id,
+            name,
+            brand,
+            category,
+            float(serving_size or 0),
+            serving_unit,
+            *[float(value or 0) for value in nutrients],
+        )
+
+    @classmethod
+    def from_food(cls, food: Food) -> "FoodView":
+        """Build from an ORM Food (e.g. one just loaded from USDA)."""
+        return cls.from_row([getattr(food, field) for field in cls._fields])
+
+
+class MealLogView(NamedTuple):
+    """Read-only meal log row."""
+
+    log_id: int
+    user_id: int
+    food_id: int
+    meal_type: str
+    servings: float
+    logged_at: Optional[datetime]
+    log_date: date
+
+    @classmethod
+    def from_row(cls, row) -> "MealLogView":
+        """Build from a row of MEAL_LOG_VIEW_COLUMNS."""
+        log_id, user_id, food_id, meal_type, servings, logged_at, log_date = row
+        return cls(log_id, user_id, food_id, meal_type, float(servings or 0), logged_at, log_date)
+
+
+def _as_float(column):
+    """Select a Numeric column as a float, skipping the Decimal conversion."""
+    return type_coerce(column, Float).label(column.key)
+
+
+# Columns to select for FoodView.from_row, in field order
+FOOD_VIEW_COLUMNS = (
+    Food.food_id,
+    Food.fdc_id,
+    Food.name,
+    Food.brand,
+    Food.category,
+    _as_float(Food.serving_size),
+    Food.serving_unit,
+    *[_as_float(getattr(Food, field)) for field in FoodView._fields[7:]],
+)
+
+# Columns to select for MealLogView.from_row, in field order
+MEAL_LOG_VIEW_COLUMNS = (
+    MealLog.log_id,
+    MealLog.user_id,
+    MealLog.food_id,
+    MealLog.meal_type,
+    _as_float(MealLog.servings),
+    MealLog.logged_at,
+    MealLog.log_date,
+)
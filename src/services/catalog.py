@@ -0,0 +1,450 @@
+"""In-memory columnar snapshot of the foods catalog.
+
+The foods table is small and rarely changes, so each process keeps one
+read-only copy of it as NumPy arrays. A version counter in the database is
+bumped on every catalog write; the snapshot is reloaded when it changes.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.db.postgres_client import db, Food, CatalogVersion
+from src.db.read_models import FoodView
+from src.services.model_store import models
+from src.utils import load_config
+
+# Column order of CatalogSnapshot.nutrients
+NUTRIENT_COLUMNS = (
+    "calories",
+    "protein_g",
+    "carbs_g",
+    "fat_g",
+    "fiber_g",
+    "sugar_g",
+    "sodium_mg",
+)
+NUTRIENT_INDEX = {name: i for i, name in enumerate(NUTRIENT_COLUMNS)}
+
+
+def get_catalog_version(session: Session) -> int:
+    """Read the current catalog version (0 if never bumped)."""
+    version = session.query(CatalogVersion.version).filter(CatalogVersion.id == 1).scalar()
+    return version or 0
+
+
+def bump_catalog_version(session: Session) -> None:
+    """
+    Increment the catalog version inside the caller's transaction.
+
+    Call this from any code path that inserts, updates or deletes foods,
+    before committing. The local snapshot is invalidated once the
+    transaction commits.
+    """
+    updated = (
+        session.query(CatalogVersion)
+        .filter(CatalogVersion.id == 1)
+        .update({CatalogVersion.version: CatalogVersion.version + 1})
+    )
+    if not updated:
+        session.add(CatalogVersion(id=1, version=1))
+    session.info["catalog_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    """Drop the local snapshot as soon as a catalog write is committed."""
+    if session.info.pop("catalog_changed", False):
+        catalog.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop("catalog_changed", None)
+
+
+class CatalogSnapshot:
+    """Immutable columnar copy of the foods table, ordered by food_id."""
+
+    def __init__(
+        self,
+        version: int,
+        food_ids: np.ndarray,
+        fdc_ids: np.ndarray,
+        names: list[str],
+        brands: list[Optional[str]],
+        category_codes: np.ndarray,
+        categories: list[str],
+        serving_sizes: np.ndarray,
+        serving_units: list[Optional[str]],
+        nutrients: np.ndarray
+    ):
+        self.version = version
+        self.food_ids = food_ids
+        self.fdc_ids = fdc_ids
+        self.names = names
+        self.brands = brands
+        self.category_codes = category_codes
+        self.categories = categories
+        self.serving_sizes = serving_sizes
+        self.serving_units = serving_units
+        self.nutrients = nutrients
+        self._category_index = {name: code for code, name in enumerate(categories)}
+        self._fdc_order: Optional[np.ndarray] = None
+        # Values computed from this snapshot by other modules (e.g. masks)
+        self.derived: dict = {}
+
+        for array in (food_ids, fdc_ids, category_codes, serving_sizes, nutrients):
+            array.flags.writeable = False
+
+    @classmethod
+    def load(cls, session: Session) -> "CatalogSnapshot":
+        """Read the whole foods table without ORM hydration."""
+        version = get_catalog_version(session)
+        rows = (
+            session.query(
+                Food.food_id,
+                Food.fdc_id,
+                Food.name,
+                Food.brand,
+                Food.category,
+                Food.serving_size,
+                Food.serving_unit,
+                *[getattr(Food, column) for column in NUTRIENT_COLUMNS],
+            )
+            .order_by(Food.food_id)
+            .all()
+        )
+
+        count = len(rows)
+        food_ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=count)
+        fdc_ids = np.fromiter((r[1] or -1 for r in rows), dtype=np.int64, count=count)
+        categories, category_codes = np.unique(
+            np.array([r[4] or "" for r in rows], dtype=object),
+            return_inverse=True,
+        )
+        serving_sizes = np.fromiter((float(r[5] or 0) for r in rows), dtype=np.float32, count=count)
+        nutrients = np.array(
+            [[float(v or 0) for v in r[7:]] for r in rows],
+            dtype=np.float32,
+        ).reshape(count, len(NUTRIENT_COLUMNS))
+
+        return cls(
+            version=version,
+            food_ids=food_ids,
+            fdc_ids=fdc_ids,
+            names=[r[2] for r in rows],
+            brands=[r[3] for r in rows],
+            category_codes=category_codes.astype(np.int32),
+            categories=list(categories),
+            serving_sizes=serving_sizes,
+            serving_units=[r[6] for r in rows],
+            nutrients=nutrients,
+        )
+
+    def __len__(self) -> int:
+        return len(self.food_ids)
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def nutrient(self, name: str) -> np.ndarray:
+        """Column view of one nutrient, e.g. 'protein_g'."""
+        return self.nutrients[:, NUTRIENT_INDEX[name]]
+
+    def rows_for_ids(self, food_ids) -> np.ndarray:
+        """Map food_ids to row indices; unknown ids map to -1."""
+        ids = np.asarray(food_ids, dtype=np.int64)
+        if len(self) == 0:
+            return np.full(ids.shape, -1, dtype=np.int64)
+
+        rows = np.minimum(np.searchsorted(self.food_ids, ids), len(self) - 1)
+        return np.where(self.food_ids[rows] == ids, rows, -1)
+
+    def rows_for_fdc_ids(self, fdc_ids) -> np.ndarray:
+        """Map USDA fdc_ids to row indices; unknown ids and None map to -1."""
+        # Foods without an fdc_id are stored as -1, so None must never match it
+        ids = np.array([-1 if i is None else i for i in fdc_ids], dtype=np.int64)
+        if len(self) == 0:
+            return np.full(ids.shape, -1, dtype=np.int64)
+
+        if self._fdc_order is None:
+            self._fdc_order = np.argsort(self.fdc_ids, kind="stable")
+        sorted_fdc = self.fdc_ids[self._fdc_order]
+        pos = np.minimum(np.searchsorted(sorted_fdc, ids), len(self) - 1)
+        return np.where((sorted_fdc[pos] == ids) & (ids >= 0), self._fdc_order[pos], -1)
+
+    def row_for_id(self, food_id: int) -> int:
+        """Row index of a single food_id, or -1."""
+        return int(self.rows_for_ids([food_id])[0])
+
+    def category_codes_for(self, categories: list[str]) -> np.ndarray:
+        """Codes of the given category names that exist in the catalog."""
+        return np.array(
+            [self._category_index[c] for c in categories if c in self._category_index],
+            dtype=np.int32,
+        )
+
+    # ------------------------------------------------------------------
+    # Filter / sort
+    # ------------------------------------------------------------------
+
+    def mask(
+        self,
+        categories: list[str] = None,
+        exclude_categories: list[str] = None,
+        min_values: dict[str, float] = None,
+        max_values: dict[str, float] = None,
+        exclude_ids: list[int] = None
+    ) -> np.ndarray:
+        """
+        Boolean row mask, the in-memory equivalent of a WHERE clause.
+
+        Args:
+            categories: Keep only these categories
+            exclude_categories: Drop these categories
+            min_values: Nutrient lower bounds (inclusive), e.g. {"protein_g": 10}
+            max_values: Nutrient upper bounds (inclusive)
+            exclude_ids: food_ids to drop
+
+        Returns:
+            Boolean array with one entry per row
+        """
+        keep = np.ones(len(self), dtype=bool)
+
+        if categories is not None:
+            keep &= np.isin(self.category_codes, self.category_codes_for(categories))
+        if exclude_categories:
+            keep &= ~np.isin(self.category_codes, self.category_codes_for(exclude_categories))
+        for name, value in (min_values or {}).items():
+            keep &= self.nutrient(name) >= value
+        for name, value in (max_values or {}).items():
+            keep &= self.nutrient(name) <= value
+        if exclude_ids:
+            keep &= ~np.isin(self.food_ids, np.asarray(exclude_ids, dtype=np.int64))
+
+        return keep
+
+    def top_k(
+        self,
+        key: str,
+        k: int,
+        mask: np.ndarray = None,
+        descending: bool = True
+    ) -> np.ndarray:
+        """
+        Rows with the k largest (or smallest) values of a nutrient.
+
+        Ties are broken by food_id so results are stable across reloads.
+        """
+        rows = np.flatnonzero(mask) if mask is not None else np.arange(len(self))
+        values = self.nutrient(key)[rows]
+        if descending:
+            values = -values
+
+        if 0 < k < len(rows):
+            # Partition first so the full sort only touches the candidates
+            part = np.argpartition(values, k - 1)
+            cutoff = values[part[k - 1]]
+            keep = values <= cutoff
+            rows, values = rows[keep], values[keep]
+
+        order = np.lexsort((self.food_ids[rows], values))
+        return rows[order][:k]
+
+    # ------------------------------------------------------------------
+    # Materialization
+    # ------------------------------------------------------------------
+
+    def to_food(self, row: int) -> Food:
+        """Build a transient (session-less) Food for a row."""
+        values = self.nutrients[row]
+        fdc_id = int(self.fdc_ids[row])
+        code = self.category_codes[row]
+        return Food(
+            food_id=int(self.food_ids[row]),
+            fdc_id=fdc_id if fdc_id >= 0 else None,
+            name=self.names[row],
+            brand=self.brands[row],
+            category=self.categories[code] or None,
+            serving_size=round(float(self.serving_sizes[row]), 2),
+            serving_unit=self.serving_units[row],
+            **{
+                column: round(float(values[i]), 2)
+                for i, column in enumerate(NUTRIENT_COLUMNS)
+            },
+        )
+
+    def to_foods(self, rows) -> list[Food]:
+        """Build transient Foods for a sequence of rows (skipping -1)."""
+        return [self.to_food(int(row)) for row in rows if row >= 0]
+
+    def to_food_view(self, row: int) -> FoodView:
+        """Build a FoodView for a row (same values as to_food)."""
+        return self.to_food_views([row])[0]
+
+    def to_food_views(self, rows) -> list[FoodView]:
+        """Build FoodViews for a sequence of rows (skipping -1), column-wise."""
+        rows = [int(row) for row in rows if row >= 0]
+        food_ids = self.food_ids[rows].tolist()
+        fdc_ids = self.fdc_ids[rows].tolist()
+        codes = self.category_codes[rows].tolist()
+        serving_sizes = self.serving_sizes[rows].tolist()
+        nutrients = self.nutrients[rows].tolist()
+        return [
+            FoodView(
+                food_id,
+                fdc_id if fdc_id >= 0 else None,
+                self.names[row],
+                self.brands[row],
+                self.categories[code] or None,
+                round(serving_size, 2),
+                self.serving_units[row],
+                *[round(value, 2) for value in values],
+            )
+            for row, food_id, fdc_id, code, serving_size, values in zip(
+                rows, food_ids, fdc_ids, codes, serving_sizes, nutrients
+            )
+        ]
+
+
+class FoodCatalog:
+    """Process-wide holder that reloads the snapshot when the version changes."""
+
+    def __init__(self):
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._check_interval = None
+
+    def invalidate(self) -> None:
+        """Force a version check on the next get()."""
+        self._checked_at = 0.0
+
+    def get(self, session: Session = None) -> CatalogSnapshot:
+        """
+        Return the current snapshot, reloading it if the catalog changed.
+
+        The version counter is read at most once per
+        catalog.version_check_interval_s seconds.
+        """
+        if self._check_interval is None:
+            self._check_interval = load_config()["catalog"]["version_check_interval_s"]
+
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self._check_interval:
+            return snapshot
+
+        with self._lock:
+            if (
+                self._snapshot is not None
+                and time.monotonic() - self._checked_at < self._check_interval
+            ):
+                return self._snapshot
+
+            close_session = session is None
+            session = session or db.get_session()
+            try:
+                if self._snapshot is None or get_catalog_version(session) != self._snapshot.version:
+                    self._snapshot = CatalogSnapshot.load(session)
+                self._checked_at = time.monotonic()
+                return self._snapshot
+            finally:
+                if close_session:
+                    session.close()
+
+
+# Convenience instance
+catalog = FoodCatalog()
+
+
+class CatalogIndex(ABC):
+    """
+    Base for per-process structures derived from the catalog snapshot.
+
+    Subclasses implement build(); implementing extend() lets append-only
+    catalog growth (the common case: foods saved from USDA) be applied
+    incrementally instead of rebuilding from scratch.
+
+    Subclasses that set `artifact` and implement load() start from the
+    trained artifact of that name (see model_store.py) instead of building,
+    and swap in a newly published one on the next get().
+    """
+
+    # Name of the trained artifact in the models manifest, if any
+    artifact: Optional[str] = None
+
+    def __init__(self):
+        self._index = None
+        self._version = None
+        self._food_ids: Optional[np.ndarray] = None
+        self._models_version = None
+        self._lock = threading.RLock()
+
+    @abstractmethod
+    def build(self, snapshot: CatalogSnapshot):
+        """Build the structure from a full snapshot."""
+
+    def extend(self, index, snapshot: CatalogSnapshot, rows: np.ndarray) -> bool:
+        """Add new snapshot rows in place; return False to force a rebuild."""
+        return False
+
+    def load(self, directory: Path) -> Optional[tuple[object, int, np.ndarray]]:
+        """
+        Open a trained artifact.
+
+        Returns:
+            (structure, catalog version, food_ids) it was built from, or
+            None to keep the current structure
+        """
+        return None
+
+    def load_trained(self) -> bool:
+        """Swap in the published artifact if the manifest changed since the last check."""
+        if self.artifact is None or models.version == self._models_version:
+            return False
+
+        with self._lock:
+            version = models.version
+            if version == self._models_version:
+                return False
+            self._models_version = version
+            directory = models.path(self.artifact)
+            trained = self.load(directory) if directory is not None else None
+            # Keep a structure already built from a newer catalog
+            if trained is None or (self._index is not None and trained[1] < self._version):
+                return False
+            self._index, self._version, self._food_ids = trained
+            return True
+
+    def get(self):
+        """Return the structure, rebuilding or extending it if the catalog changed."""
+        self.load_trained()
+        snapshot = catalog.get()
+        if self._index is not None and self._version == snapshot.version:
+            return self._index
+
+        with self._lock:
+            if self._index is not None and self._version == snapshot.version:
+                return self._index
+
+            index = self._index
+            extended = False
+            if index is not None and np.isin(self._food_ids, snapshot.food_ids).all():
+                new_rows = np.flatnonzero(~np.isin(snapshot.food_ids, self._food_ids))
+                extended = self.extend(index, snapshot, new_rows)
+
+            if not extended:
+                index = self.build(snapshot)
+
+            self._index = index
+            self._version = snapshot.version
+            self._food_ids = snapshot.food_ids
+            return index
@@ -0,0 +1,241 @@
+"""Declarative dietary constraints.
+
+A DietaryConstraints value says which foods are allowed: diet flags, macro
+thresholds, excluded categories or foods, and allergens. It compiles either
+to a SQLAlchemy predicate (for queries) or to a boolean row mask over the
+catalog snapshot (for in-memory paths), so every caller filters once, at
+the cheapest layer it has.
+"""
+
+from typing import Iterable
+
+import numpy as np
+from sqlalchemy import and_, func, or_, true
+
+from src.db.postgres_client import Food
+from src.services.catalog import CatalogSnapshot, NUTRIENT_COLUMNS
+
+# Categories removed by each diet flag
+DIET_EXCLUDED_CATEGORIES = {
+    "vegetarian": ("Poultry", "Fish", "Beef"),
+    "vegan": ("Poultry", "Fish", "Beef", "Dairy", "Eggs"),
+    "pescatarian": ("Poultry", "Beef"),
+}
+
+# Per-serving nutrient bounds added by each diet flag
+DIET_MIN_VALUES = {
+    "high_protein": {"protein_g": 10},
+}
+DIET_MAX_VALUES = {
+    "low_carb": {"carbs_g": 15},
+}
+
+DIETS = frozenset(DIET_EXCLUDED_CATEGORIES) | frozenset(DIET_MIN_VALUES) | frozenset(DIET_MAX_VALUES)
+
+# Allergens are tracked per category; foods carry no ingredient lists
+ALLERGEN_CATEGORIES = {
+    "dairy": ("Dairy",),
+    "eggs": ("Eggs",),
+    "fish": ("Fish",),
+    "nuts": ("Nuts",),
+}
+
+# Constraint masks kept per snapshot
+MASK_CACHE_SIZE = 64
+
+
+class DietaryConstraints:
+    """
+    Immutable description of allowed foods.
+
+    Equal constraints compare and hash equal, so they can be used in cache
+    keys.
+    """
+
+    def __init__(
+        self,
+        diets: Iterable[str] = (),
+        min_values: dict[str, float] = None,
+        max_values: dict[str, float] = None,
+        exclude_categories: Iterable[str] = (),
+        exclude_food_ids: Iterable[int] = (),
+        allergens: Iterable[str] = ()
+    ):
+        """
+        Args:
+            diets: Diet flags, e.g. 'vegetarian', 'high_protein', 'low_carb'
+            min_values: Nutrient lower bounds per serving, e.g. {"protein_g": 20}
+            max_values: Nutrient upper bounds per serving
+            exclude_categories: Categories to drop
+            exclude_food_ids: Individual foods to drop
+            allergens: Allergens to avoid, e.g. 'nuts'
+        """
+        unknown = set(diets) - DIETS
+        if unknown:
+            raise ValueError(f"Unknown diet: {', '.join(sorted(unknown))}")
+        unknown = set(allergens) - set(ALLERGEN_CATEGORIES)
+        if unknown:
+            raise ValueError(f"Unknown allergen: {', '.join(sorted(unknown))}")
+        unknown = (set(min_values or {}) | set(max_values or {})) - set(NUTRIENT_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown nutrient: {', '.join(sorted(unknown))}")
+
+        self.diets = tuple(sorted(set(diets)))
+        self.allergens = tuple(sorted(set(allergens)))
+        self.exclude_food_ids = tuple(sorted(set(int(i) for i in exclude_food_ids)))
+
+        categories = set(exclude_categories)
+        for diet in self.diets:
+            categories.update(DIET_EXCLUDED_CATEGORIES.get(diet, ()))
+        for allergen in self.allergens:
+            categories.update(ALLERGEN_CATEGORIES[allergen])
+        self.excluded_categories = tuple(sorted(categories))
+
+        # Combine bounds from flags and explicit values; the tighter one wins
+        lower = dict(min_values or {})
+        upper = dict(max_values or {})
+        for diet in self.diets:
+            for name, value in DIET_MIN_VALUES.get(diet, {}).items():
+                lower[name] = max(lower.get(name, value), value)
+            for name, value in DIET_MAX_VALUES.get(diet, {}).items():
+                upper[name] = min(upper.get(name, value), value)
+        self.min_values = tuple(sorted(lower.items()))
+        self.max_values = tuple(sorted(upper.items()))
+
+    @classmethod
+    def from_flags(
+        cls,
+        vegetarian: bool = False,
+        high_protein: bool = False,
+        low_carb: bool = False,
+        **kwargs
+    ) -> "DietaryConstraints":
+        """Build constraints from the planner's checkbox flags."""
+        diets = [
+            name for name, enabled in (
+                ("vegetarian", vegetarian),
+                ("high_protein", high_protein),
+                ("low_carb", low_carb),
+            )
+            if enabled
+        ]
+        return cls(diets=diets + list(kwargs.pop("diets", ())), **kwargs)
+
+    @classmethod
+    def resolve(
+        cls,
+        constraints: "DietaryConstraints" = None,
+        vegetarian: bool = False,
+        high_protein: bool = False,
+        low_carb: bool = False
+    ) -> "DietaryConstraints":
+        """Explicit constraints when given, otherwise ones built from the flags."""
+        if constraints is not None:
+            return constraints
+        return cls.from_flags(vegetarian, high_protein, low_carb)
+
+    def _key(self) -> tuple:
+        return (
+            self.diets,
+            self.allergens,
+            self.excluded_categories,
+            self.min_values,
+            self.max_values,
+            self.exclude_food_ids,
+        )
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, DietaryConstraints) and self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        # Stable across processes; used in persisted cache keys
+        return (
+            f"DietaryConstraints(diets={self.diets!r}, allergens={self.allergens!r}, "
+            f"excluded_categories={self.excluded_categories!r}, "
+            f"min_values={self.min_values!r}, max_values={self.max_values!r}, "
+            f"exclude_food_ids={self.exclude_food_ids!r})"
+        )
+
+    def __bool__(self) -> bool:
+        """False when nothing is excluded."""
+        return any(self._key()[2:])
+
+    # ------------------------------------------------------------------
+    # Compilation
+    # ------------------------------------------------------------------
+
+    def to_sql(self):
+        """
+        SQLAlchemy predicate over Food matching the snapshot mask.
+
+        Missing categories are allowed and missing nutrients count as 0,
+        as they do in the catalog snapshot.
+        """
+        clauses = []
+        if self.excluded_categories:
+            clauses.append(or_(
+                Food.category.is_(None),
+                Food.category.not_in(self.excluded_categories),
+            ))
+        for name, value in self.min_values:
+            clauses.append(func.coalesce(getattr(Food, name), 0) >= value)
+        for name, value in self.max_values:
+            clauses.append(func.coalesce(getattr(Food, name), 0) <= value)
+        if self.exclude_food_ids:
+            clauses.append(Food.food_id.not_in(self.exclude_food_ids))
+        return and_(*clauses) if clauses else true()
+
+    def apply(self, query):
+        """Filter a Food query; a no-op for empty constraints."""
+        return query.filter(self.to_sql()) if self else query
+
+    def mask(self, snapshot: CatalogSnapshot) -> np.ndarray:
+        """
+        Boolean row mask of allowed foods, cached on the snapshot.
+
+        The returned array is shared; combine it with & rather than
+        modifying it in place.
+        """
+        masks = snapshot.derived.setdefault("constraint_masks", {})
+        mask = masks.get(self)
+        if mask is None:
+            mask = snapshot.mask(
+                exclude_categories=list(self.excluded_categories),
+                min_values=dict(self.min_values),
+                max_values=dict(self.max_values),
+                exclude_ids=list(self.exclude_food_ids),
+            )
+            mask.flags.writeable = False
+            if len(masks) >= MASK_CACHE_SIZE:
+                masks.clear()
+            masks[self] = mask
+        return mask
+
+    def allows(self, food: Food) -> bool:
+        """Check a single Food object (e.g. one just fetched from USDA)."""
+        if food.category in self.excluded_categories:
+            return False
+        if food.food_id is not None and food.food_id in self.exclude_food_ids:
+            return False
+        for name, value in self.min_values:
+            if float(getattr(food, name) or 0) < value:
+                return False
+        for name, value in self.max_values:
+            if float(getattr(food, name) or 0) > value:
+                return False
+        return True
+
+    def filter_ids(self, snapshot: CatalogSnapshot, food_ids: list[int]) -> list[int]:
+        """Keep the allowed food_ids, in order (ids not in the snapshot are kept)."""
+        if not self:
+            return list(food_ids)
+        rows = snapshot.rows_for_ids(food_ids)
+        allowed = self.mask(snapshot)
+        return [i for i, row in zip(food_ids, rows) if row < 0 or allowed[row]]
+
+
+# No restrictions
+UNCONSTRAINED = DietaryConstraints()
@@ -0,0 +1,442 @@
+"""Item-item co-occurrence: "people who log X also log Y".
+
+Two foods co-occur when the same user logs both in the same meal on the
+same day. The model keeps the symmetric count matrix of co-occurring
+baskets and, per food, its top related foods ranked by cosine similarity
+count(x, y) / sqrt(count(x) * count(y)), both as CSR arrays. The training
+pipeline saves them as the "cooccurrence" artifact, memory-mapped on load.
+
+Logs written after the model was built are applied incrementally by
+log_id. Foods touched by such updates are re-ranked from the count matrix
+plus the pending counts; once enough updates pile up the model is rebuilt
+in the background. Deleted logs stay counted until the next rebuild.
+"""
+
+import threading
+import time
+from datetime import date
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import scipy.sparse as sp
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+from src.db.postgres_client import db, MealLog
+from src.services.model_store import (
+    csr_arrays,
+    csr_from_arrays,
+    load_arrays,
+    models,
+    save_arrays,
+)
+from src.utils import load_config
+
+
+def basket_ids(user_ids: np.ndarray, days: np.ndarray, meal_codes: np.ndarray) -> np.ndarray:
+    """Dense basket number per log, one basket per (user, day, meal)."""
+    if not len(user_ids):
+        return np.zeros(0, dtype=np.int64)
+    order = np.lexsort((meal_codes, days, user_ids))
+    keys = np.stack([user_ids[order], days[order], meal_codes[order]], axis=1)
+    starts = np.concatenate([[True], (np.diff(keys, axis=0) != 0).any(axis=1)])
+    baskets = np.empty(len(order), dtype=np.int64)
+    baskets[order] = np.cumsum(starts) - 1
+    return baskets
+
+
+def load_logs(session: Session, after_log_id: int = 0) -> dict[str, np.ndarray]:
+    """
+    meal_logs columns needed for baskets, as arrays ordered by log_id.
+
+    Days are date ordinals and meal types small integer codes into
+    meal_names.
+    """
+    meal_codes: dict[str, int] = {}
+    log_ids, user_ids, days, meals, food_ids = [], [], [], [], []
+    query = (
+        session.query(
+            MealLog.log_id,
+            MealLog.user_id,
+            MealLog.log_date,
+            MealLog.meal_type,
+            MealLog.food_id,
+        )
+        .filter(MealLog.log_id > after_log_id)
+        .order_by(MealLog.log_id)
+    )
+    for row in query.yield_per(10000):
+        log_ids.append(row.log_id)
+        user_ids.append(row.user_id)
+        days.append(row.log_date.toordinal())
+        meals.append(meal_codes.setdefault(row.meal_type, len(meal_codes)))
+        food_ids.append(row.food_id)
+
+    return {
+        "log_ids": np.asarray(log_ids, dtype=np.int64),
+        "user_ids": np.asarray(user_ids, dtype=np.int64),
+        "days": np.asarray(days, dtype=np.int64),
+        "meal_codes": np.asarray(meals, dtype=np.int64),
+        "food_ids": np.asarray(food_ids, dtype=np.int64),
+        "meal_names": np.array(list(meal_codes), dtype=object),
+    }
+
+
+def basket_keys(logs: dict[str, np.ndarray]) -> list[tuple[int, int, str]]:
+    """(user_id, day ordinal, meal_type) of each log from load_logs()."""
+    names = logs["meal_names"]
+    return [
+        (user_id, day, names[meal])
+        for user_id, day, meal in zip(
+            logs["user_ids"].tolist(), logs["days"].tolist(), logs["meal_codes"].tolist()
+        )
+    ]
+
+
+class CooccurrenceModel:
+    """Co-occurrence counts and precomputed top-k related foods."""
+
+    def __init__(
+        self,
+        food_ids: np.ndarray,
+        item_counts: np.ndarray,
+        counts: sp.csr_matrix,
+        top: sp.csr_matrix,
+        last_log_id: int = 0,
+        min_count: int = 2
+    ):
+        """
+        Args:
+            food_ids: Sorted food_id of each matrix row/column
+            item_counts: Baskets containing each food
+            counts: Baskets containing both foods (zero diagonal)
+            top: Per row, the top related foods and their scores
+            last_log_id: Newest meal log included
+            min_count: Fewest shared baskets for a pair to be related
+        """
+        self.food_ids = food_ids
+        self.item_counts = item_counts
+        self.counts = counts
+        self.top = top
+        self.last_log_id = last_log_id
+        self.min_count = min_count
+        # Updates since the build, keyed by food_id
+        self.pending_pairs: dict[int, Counter] = defaultdict(Counter)
+        self.pending_counts: Counter = Counter()
+
+    @classmethod
+    def fit(
+        cls,
+        baskets: np.ndarray,
+        food_ids: np.ndarray,
+        last_log_id: int = 0,
+        top_k: int = 50,
+        min_count: int = 2
+    ) -> "CooccurrenceModel":
+        """
+        Build from one basket number and food_id per log.
+
+        A food logged twice in one basket counts once.
+        """
+        items, columns = np.unique(food_ids, return_inverse=True)
+        n_baskets = int(baskets.max()) + 1 if len(baskets) else 0
+        incidence = sp.csr_matrix(
+            (np.ones(len(baskets), dtype=np.float32), (baskets, columns)),
+            shape=(n_baskets, len(items)),
+        )
+        incidence.data[:] = 1.0
+
+        counts = (incidence.T @ incidence).tocsr()
+        item_counts = counts.diagonal().astype(np.float32)
+        counts.setdiag(0)
+        counts.eliminate_zeros()
+        counts.sort_indices()
+
+        return cls(
+            food_ids=items.astype(np.int64),
+            item_counts=item_counts,
+            counts=counts.astype(np.float32),
+            top=cls._top_lists(counts, item_counts, top_k, min_count),
+            last_log_id=last_log_id,
+            min_count=min_count,
+        )
+
+    @staticmethod
+    def _top_lists(
+        counts: sp.csr_matrix,
+        item_counts: np.ndarray,
+        top_k: int,
+        min_count: int
+    ) -> sp.csr_matrix:
+        """Per row, the top_k columns by cosine score, best first."""
+        rows = np.repeat(np.arange(counts.shape[0]), np.diff(counts.indptr))
+        columns = counts.indices
+        scores = counts.data / np.sqrt(item_counts[rows] * item_counts[columns])
+        keep = counts.data >= min_count
+        rows, columns, scores = rows[keep], columns[keep], scores[keep]
+
+        # Sort every row at once: by row, then score desc, then column
+        order = np.lexsort((columns, -scores, rows))
+        rows, columns, scores = rows[order], columns[order], scores[order]
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=counts.shape[0]))])
+        rank = np.arange(len(rows)) - indptr[rows]
+        keep = rank < top_k
+        kept_per_row = np.bincount(rows[keep], minlength=counts.shape[0])
+
+        return sp.csr_matrix(
+            (
+                scores[keep].astype(np.float32),
+                columns[keep].astype(np.int32),
+                np.concatenate([[0], np.cumsum(kept_per_row)]),
+            ),
+            shape=counts.shape,
+        )
+
+    def __len__(self) -> int:
+        return len(self.food_ids)
+
+    @property
+    def pending_updates(self) -> int:
+        """Pair updates applied since the build."""
+        return sum(len(c) for c in self.pending_pairs.values())
+
+    def _rows_for(self, food_ids: np.ndarray) -> np.ndarray:
+        """Matrix row of each food_id, -1 if the model hasn't seen it."""
+        food_ids = np.asarray(food_ids, dtype=np.int64)
+        rows = np.searchsorted(self.food_ids, food_ids)
+        rows = np.minimum(rows, max(len(self.food_ids) - 1, 0))
+        found = (self.food_ids[rows] == food_ids) if len(self.food_ids) else np.zeros(len(food_ids), bool)
+        return np.where(found, rows, -1)
+
+    def _base_row(self, food_id: int) -> dict[int, float]:
+        row = int(self._rows_for([food_id])[0])
+        if row < 0:
+            return {}
+        start, end = self.counts.indptr[row], self.counts.indptr[row + 1]
+        return dict(zip(
+            self.food_ids[self.counts.indices[start:end]].tolist(),
+            self.counts.data[start:end].tolist(),
+        ))
+
+    def _item_counts(self, food_ids: list[int]) -> np.ndarray:
+        rows = self._rows_for(food_ids)
+        base = np.where(rows >= 0, self.item_counts[np.maximum(rows, 0)], 0) if len(self) else np.zeros(len(rows))
+        return base + np.array([self.pending_counts.get(i, 0) for i in food_ids], dtype=np.float32)
+
+    def apply_logs(self, logs: dict[str, np.ndarray], existing: dict[tuple, set]) -> None:
+        """
+        Count newly written logs.
+
+        Args:
+            logs: New rows from load_logs(), in log_id order
+            existing: Foods already in each touched basket (see basket_keys())
+                before these logs; updated in place
+        """
+        for log_id, key, food_id in zip(
+            logs["log_ids"].tolist(), basket_keys(logs), logs["food_ids"].tolist()
+        ):
+            basket = existing.setdefault(key, set())
+            if food_id not in basket:
+                for other in basket:
+                    self.pending_pairs[food_id][other] += 1
+                    self.pending_pairs[other][food_id] += 1
+                self.pending_counts[food_id] += 1
+                basket.add(food_id)
+            self.last_log_id = max(self.last_log_id, log_id)
+
+    def related(self, food_id: int, k: int = 10) -> list[tuple[int, float]]:
+        """
+        Foods most often logged in the same meal as food_id.
+
+        Returns:
+            (food_id, score) pairs, best first, ties broken by food_id
+        """
+        if food_id not in self.pending_pairs and food_id not in self.pending_counts:
+            row = int(self._rows_for([food_id])[0])
+            if row < 0:
+                return []
+            start = self.top.indptr[row]
+            end = min(self.top.indptr[row + 1], start + k)
+            return list(zip(
+                self.food_ids[self.top.indices[start:end]].tolist(),
+                self.top.data[start:end].tolist(),
+            ))
+
+        # Touched since the build: rank from counts plus pending updates
+        counts = self._base_row(food_id)
+        for other, count in self.pending_pairs.get(food_id, {}).items():
+            counts[other] = counts.get(other, 0) + count
+        others = [other for other, count in counts.items() if count >= self.min_count]
+        if not others:
+            return []
+
+        shared = np.array([counts[other] for other in others], dtype=np.float32)
+        n_x = float(self._item_counts([food_id])[0])
+        scores = shared / np.sqrt(n_x * self._item_counts(others))
+        ids = np.array(others, dtype=np.int64)
+        order = np.lexsort((ids, -scores))[:k]
+        return [(int(ids[i]), float(scores[i])) for i in order]
+
+    def save(self, directory: Path) -> None:
+        """Write the built model; pending updates are not saved."""
+        save_arrays(
+            directory,
+            {
+                "food_ids": self.food_ids,
+                "item_counts": self.item_counts,
+                **csr_arrays("counts", self.counts),
+                **csr_arrays("top", self.top),
+            },
+            {
+                "last_log_id": int(self.last_log_id),
+                "min_count": self.min_count,
+                "shape": list(self.counts.shape),
+            },
+        )
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional["CooccurrenceModel"]:
+        """Memory-map a saved model; None if there is none."""
+        saved = load_arrays(directory)
+        if saved is None:
+            return None
+        arrays, meta = saved
+        return cls(
+            food_ids=arrays["food_ids"],
+            item_counts=arrays["item_counts"],
+            counts=csr_from_arrays("counts", arrays, meta["shape"]),
+            top=csr_from_arrays("top", arrays, meta["shape"]),
+            last_log_id=meta["last_log_id"],
+            min_count=meta["min_count"],
+        )
+
+
+class FoodCooccurrence:
+    """
+    Process-wide co-occurrence model, kept current with meal_logs.
+
+    Loads the trained artifact (or builds a model) on first use, then
+    applies newer logs at most every cooccurrence.refresh_interval_s. When
+    pending updates exceed cooccurrence.rebuild_growth of the built pairs,
+    a full rebuild runs on a background thread and is swapped in. A newly
+    published artifact replaces the model on the next get().
+    """
+
+    artifact = "cooccurrence"
+
+    def __init__(self):
+        self._model: Optional[CooccurrenceModel] = None
+        self._models_version = None
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+        self._rebuild_thread: Optional[threading.Thread] = None
+        config = load_config()["cooccurrence"]
+        self.top_k = config["top_k"]
+        self.min_count = config["min_count"]
+        self.refresh_interval_s = config["refresh_interval_s"]
+        self.rebuild_growth = config["rebuild_growth"]
+
+    def build(self) -> CooccurrenceModel:
+        """Build from all of meal_logs."""
+        session = db.get_session()
+        try:
+            logs = load_logs(session)
+        finally:
+            session.close()
+
+        model = CooccurrenceModel.fit(
+            basket_ids(logs["user_ids"], logs["days"], logs["meal_codes"]),
+            logs["food_ids"],
+            last_log_id=int(logs["log_ids"].max()) if len(logs["log_ids"]) else 0,
+            top_k=self.top_k,
+            min_count=self.min_count,
+        )
+        return model
+
+    def train(self, directory: Path) -> dict:
+        """Build from meal_logs and save as an artifact; returns manifest metadata."""
+        model = self.build()
+        model.save(directory)
+        return {"last_log_id": int(model.last_log_id), "foods": len(model), "pairs": int(model.counts.nnz)}
+
+    def load_trained(self) -> None:
+        """Swap in the published artifact if the manifest changed since the last check."""
+        version = models.version
+        if version == self._models_version:
+            return
+        self._models_version = version
+        directory = models.path(self.artifact)
+        model = CooccurrenceModel.load(directory) if directory is not None else None
+        # Keep a model that has already seen newer logs
+        if model is not None and (self._model is None or model.last_log_id >= self._model.last_log_id):
+            self._model = model
+            self._checked_at = 0.0
+
+    def get(self) -> CooccurrenceModel:
+        """The model, with logs written since the last check applied."""
+        with self._lock:
+            self.load_trained()
+            if self._model is None:
+                self._model = self.build()
+                self._checked_at = 0.0
+            if time.monotonic() - self._checked_at >= self.refresh_interval_s:
+                self._catch_up(self._model)
+                self._checked_at = time.monotonic()
+            return self._model
+
+    def _catch_up(self, model: CooccurrenceModel) -> None:
+        """Apply logs newer than the model's last_log_id."""
+        session = db.get_session()
+        try:
+            logs = load_logs(session, after_log_id=model.last_log_id)
+            if not len(logs["log_ids"]):
+                return
+
+            # Foods already in the touched baskets, from logs the model has seen
+            existing: dict[tuple, set] = {key: set() for key in basket_keys(logs)}
+            keys = [(user_id, date.fromordinal(day), meal) for user_id, day, meal in existing]
+            for i in range(0, len(keys), 500):
+                rows = session.query(
+                    MealLog.user_id, MealLog.log_date, MealLog.meal_type, MealLog.food_id
+                ).filter(
+                    tuple_(MealLog.user_id, MealLog.log_date, MealLog.meal_type).in_(keys[i:i + 500]),
+                    MealLog.log_id <= model.last_log_id,
+                )
+                for row in rows:
+                    existing[(row.user_id, row.log_date.toordinal(), row.meal_type)].add(row.food_id)
+        finally:
+            session.close()
+
+        model.apply_logs(logs, existing)
+        if model.pending_updates > self.rebuild_growth * max(model.counts.nnz, 1):
+            self.rebuild_async()
+
+    def rebuild(self) -> CooccurrenceModel:
+        """Rebuild from meal_logs and swap in."""
+        model = self.build()
+        with self._lock:
+            self._model = model
+            self._checked_at = 0.0
+        return model
+
+    def rebuild_async(self) -> None:
+        """Start a background rebuild unless one is already running."""
+        with self._lock:
+            if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+                return
+            self._rebuild_thread = threading.Thread(
+                target=self.rebuild, name="cooccurrence-rebuild", daemon=True
+            )
+            self._rebuild_thread.start()
+
+    def related(self, food_id: int, k: int = 10) -> list[tuple[int, float]]:
+        """(food_id, score) pairs for foods logged in the same meals as food_id."""
+        model = self.get()
+        with self._lock:
+            return model.related(food_id, k)
+
+
+# Convenience instance
+cooccurrence = FoodCooccurrence()
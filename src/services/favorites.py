@@ -0,0 +1,171 @@
+"""Per-user food frequencies for favorites.
+
+Every meal log write adjusts one user_food_frequency row in the same
+transaction, so favorites are a single indexed read of the top rows by
+score instead of a count over the user's whole history.
+
+Scores decay with a half-life using forward decay: a log on date d adds
+2 ** ((d - DECAY_EPOCH) / half_life) instead of shrinking every older
+entry as time passes. Each stored score is the decayed count scaled by the
+same factor for all foods, so ordering by the stored score ranks foods by
+their decayed counts at any point in time.
+"""
+
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import func, insert as sql_insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from src.db.postgres_client import db, Food, MealLog, User, UserFoodFrequency
+from src.services.constraints import DietaryConstraints
+from src.utils import load_config
+
+DECAY_EPOCH = date(2020, 1, 1)
+
+
+def decay_weight(log_date: date, half_life_days: float) -> float:
+    """Score contributed by one log on log_date."""
+    return 2.0 ** ((log_date - DECAY_EPOCH).days / half_life_days)
+
+
+def record_log(
+    session: Session,
+    user_id: int,
+    food_id: int,
+    log_date: date,
+    delta: int = 1,
+    half_life_days: float = None
+) -> None:
+    """
+    Count one log added (delta=1) or removed (delta=-1).
+
+    Runs in the caller's transaction; nothing is committed here.
+    """
+    half_life_days = half_life_days or load_config()["favorites"]["half_life_days"]
+    weight = decay_weight(log_date, half_life_days) * delta
+
+    if delta < 0:
+        session.query(UserFoodFrequency).filter(
+            UserFoodFrequency.user_id == user_id,
+            UserFoodFrequency.food_id == food_id,
+        ).update(
+            {
+                UserFoodFrequency.log_count: UserFoodFrequency.log_count + delta,
+                UserFoodFrequency.score: UserFoodFrequency.score + weight,
+            },
+            synchronize_session=False,
+        )
+        session.query(UserFoodFrequency).filter(
+            UserFoodFrequency.user_id == user_id,
+            UserFoodFrequency.food_id == food_id,
+            UserFoodFrequency.log_count <= 0,
+        ).delete(synchronize_session=False)
+        return
+
+    dialect = postgresql if session.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(UserFoodFrequency).values(
+        user_id=user_id, food_id=food_id, log_count=delta, score=weight
+    )
+    session.execute(statement.on_conflict_do_update(
+        index_elements=["user_id", "food_id"],
+        set_={
+            "log_count": UserFoodFrequency.log_count + statement.excluded.log_count,
+            "score": UserFoodFrequency.score + statement.excluded.score,
+        },
+    ))
+
+
+def top_food_ids(
+    session: Session,
+    user_id: int,
+    limit: int = 5,
+    constraints: Optional[DietaryConstraints] = None
+) -> list[int]:
+    """
+    The user's most logged foods, recency-weighted, best first.
+
+    Reads user_food_frequency once the user's older logs have been counted
+    into it (users.frequencies_rebuilt); until then, e.g. for users whose
+    logs predate the table, counts meal_logs in SQL instead.
+    """
+    rebuilt = session.query(User.frequencies_rebuilt).filter(User.user_id == user_id).scalar()
+    if not rebuilt:
+        return most_logged_food_ids(session, user_id, limit, constraints)
+
+    query = (
+        session.query(UserFoodFrequency.food_id)
+        .filter(UserFoodFrequency.user_id == user_id)
+        .order_by(UserFoodFrequency.score.desc(), UserFoodFrequency.food_id)
+    )
+    if constraints:
+        query = query.join(Food, Food.food_id == UserFoodFrequency.food_id).filter(constraints.to_sql())
+    return [row.food_id for row in query.limit(limit)]
+
+
+def most_logged_food_ids(
+    session: Session,
+    user_id: int,
+    limit: int = 5,
+    constraints: Optional[DietaryConstraints] = None
+) -> list[int]:
+    """Lifetime log counts, counted by the database (no recency weighting)."""
+    count = func.count(MealLog.log_id)
+    query = (
+        session.query(MealLog.food_id)
+        .filter(MealLog.user_id == user_id)
+        .group_by(MealLog.food_id)
+        .order_by(count.desc(), MealLog.food_id)
+    )
+    if constraints:
+        query = query.join(Food, Food.food_id == MealLog.food_id).filter(constraints.to_sql())
+    return [row.food_id for row in query.limit(limit)]
+
+
+def rebuild_frequencies(user_ids: list[int] = None) -> int:
+    """
+    Recompute user_food_frequency from meal_logs and mark the users rebuilt.
+
+    Args:
+        user_ids: Users to rebuild (default: everyone)
+
+    Returns:
+        Number of frequency rows written
+    """
+    half_life = load_config()["favorites"]["half_life_days"]
+    session = db.get_session()
+    try:
+        query = session.query(
+            MealLog.user_id,
+            MealLog.food_id,
+            MealLog.log_date,
+            func.count(MealLog.log_id).label("logs"),
+        ).group_by(MealLog.user_id, MealLog.food_id, MealLog.log_date)
+        stale = session.query(UserFoodFrequency)
+        users = session.query(User)
+        if user_ids is not None:
+            query = query.filter(MealLog.user_id.in_(user_ids))
+            stale = stale.filter(UserFoodFrequency.user_id.in_(user_ids))
+            users = users.filter(User.user_id.in_(user_ids))
+
+        totals: dict[tuple[int, int], list] = {}
+        for row in query.yield_per(10000):
+            entry = totals.setdefault((row.user_id, row.food_id), [0, 0.0])
+            entry[0] += row.logs
+            entry[1] += row.logs * decay_weight(row.log_date, half_life)
+
+        stale.delete(synchronize_session=False)
+        users.update({User.frequencies_rebuilt: True}, synchronize_session=False)
+        if totals:
+            session.execute(sql_insert(UserFoodFrequency), [
+                {"user_id": user_id, "food_id": food_id, "log_count": count, "score": score}
+                for (user_id, food_id), (count, score) in totals.items()
+            ])
+        session.commit()
+        return len(totals)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
@@ -0,0 +1,91 @@
+"""Batched, memoized food lookups for one unit of work."""
+
+from typing import Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from src.db.postgres_client import db, Food
+from src.utils import load_config
+
+
+class FoodLoader:
+    """
+    Collects food lookups by food_id or fdc_id and resolves them in bulk.
+
+    Ids queued with load()/load_fdc() are fetched together with chunked
+    IN (...) queries on the next dispatch(), and every result (including
+    misses) is memoized for the lifetime of the loader. Create one loader
+    per request or job; it is not meant to outlive its session.
+    """
+
+    def __init__(self, session: Session = None, chunk_size: int = None):
+        self._session = session
+        self.chunk_size = chunk_size or load_config()["food_loader"]["chunk_size"]
+        self._by_id: dict[int, Optional[Food]] = {}
+        self._by_fdc_id: dict[int, Optional[Food]] = {}
+        self._pending_ids: set[int] = set()
+        self._pending_fdc_ids: set[int] = set()
+        self.queries = 0
+
+    def load(self, food_ids: Iterable[int]) -> None:
+        """Queue food_ids for the next dispatch (None is skipped)."""
+        self._pending_ids.update(i for i in food_ids if i is not None and i not in self._by_id)
+
+    def load_fdc(self, fdc_ids: Iterable[int]) -> None:
+        """Queue USDA fdc_ids for the next dispatch (None is skipped)."""
+        self._pending_fdc_ids.update(i for i in fdc_ids if i is not None and i not in self._by_fdc_id)
+
+    def dispatch(self) -> None:
+        """Resolve every queued id with as few queries as possible."""
+        if not (self._pending_ids or self._pending_fdc_ids):
+            return
+
+        close_session = self._session is None
+        session = self._session or db.get_session()
+        try:
+            self._fetch(session, Food.food_id, self._pending_ids, self._by_id)
+            self._fetch(session, Food.fdc_id, self._pending_fdc_ids, self._by_fdc_id)
+        finally:
+            if close_session:
+                session.close()
+
+    def _fetch(self, session: Session, column, pending: set[int], memo: dict) -> None:
+        ids = sorted(pending)
+        pending.clear()
+
+        for start in range(0, len(ids), self.chunk_size):
+            chunk = ids[start:start + self.chunk_size]
+            memo.update(dict.fromkeys(chunk))
+            for food in session.query(Food).filter(column.in_(chunk)):
+                self._remember(food)
+            self.queries += 1
+
+    def _remember(self, food: Food) -> None:
+        if food.food_id is not None:
+            self._by_id[food.food_id] = food
+        if food.fdc_id is not None:
+            self._by_fdc_id[food.fdc_id] = food
+
+    def prime(self, food: Food) -> None:
+        """Record a food the caller already holds (e.g. one just inserted)."""
+        self._remember(food)
+
+    def get(self, food_id: int) -> Optional[Food]:
+        """Food for one food_id, dispatching any queued lookups first."""
+        return self.get_many([food_id])[0]
+
+    def get_by_fdc(self, fdc_id: int) -> Optional[Food]:
+        """Food for one fdc_id, dispatching any queued lookups first."""
+        return self.get_many_by_fdc([fdc_id])[0]
+
+    def get_many(self, food_ids: list[int]) -> list[Optional[Food]]:
+        """Foods for food_ids, in input order (None for unknown or None ids)."""
+        self.load(food_ids)
+        self.dispatch()
+        return [self._by_id.get(i) for i in food_ids]
+
+    def get_many_by_fdc(self, fdc_ids: list[int]) -> list[Optional[Food]]:
+        """Foods for USDA fdc_ids, in input order (None for unknown or None ids)."""
+        self.load_fdc(fdc_ids)
+        self.dispatch()
+        return [self._by_fdc_id.get(i) for i in fdc_ids]
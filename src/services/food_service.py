@@ -1,23 +1,106 @@
 """Food data service - search, load, and manage foods."""
 
-from typing import Optional
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import NamedTuple, Optional
 
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import and_, case, or_
 
 from src.db.postgres_client import db, Food
+from src.db.read_models import FoodView, FOOD_VIEW_COLUMNS
 from src.api.usda_client import usda
+from src.services.catalog import catalog, bump_catalog_version
+from src.services.constraints import DietaryConstraints
+from src.services.typeahead import typeahead
+from src.services.fuzzy_search import fuzzy_search
+from src.services.name_similarity import name_similarity
+from src.services.food_loader import FoodLoader
+from src.utils import load_config
+
+# Index lookups fetch this many times the limit when constraints will drop some
+CONSTRAINED_OVERFETCH = 4
+
+
+class SearchCursor(NamedTuple):
+    """Keyset position of the last food on a search page."""
+
+    relevance: int
+    food_id: int
+
+
+class SearchPage(NamedTuple):
+    """One page of search_page() results."""
+
+    foods: list
+    # Pass back to search_page() for the next page; None on the last page
+    next_cursor: Optional[SearchCursor]
+
+
+def _relevance(query: str):
+    """Match tier of a food name: 0 starts with the query, 1 a later word does, 2 contains it."""
+    return case(
+        (Food.name.ilike(f"{query}%"), 0),
+        (Food.name.ilike(f"% {query}%"), 1),
+        else_=2,
+    )
+
+
+class HybridResults:
+    """Local matches available now, plus USDA matches arriving in the background."""
+
+    def __init__(
+        self,
+        local: list[Food],
+        close_matches: bool = False,
+        pending: Optional[Future] = None
+    ):
+        self.local = local
+        self.close_matches = close_matches
+        self.pending = pending
+
+    @property
+    def usda_pending(self) -> bool:
+        """True while a background USDA search is still running."""
+        return self.pending is not None and not self.pending.done()
+
+    def merged(self, timeout: float = None) -> list[Food]:
+        """
+        Local results followed by new USDA hits, deduped by fdc_id.
+
+        Blocks up to timeout seconds for the USDA search; on timeout or
+        error only the local results are returned.
+        """
+        if self.pending is None:
+            return self.local
+        try:
+            return self.pending.result(timeout=timeout)
+        except Exception:
+            return self.local
 
 
 class FoodService:
     """Handles food search, storage, and retrieval."""
 
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight: dict[tuple, Future] = {}
+        # Normalized query -> (fdc_ids of its USDA hits, monotonic time fetched)
+        self._usda_results: OrderedDict[str, tuple[list[int], float]] = OrderedDict()
+        self._lock = threading.Lock()
+
     def search_local(
         self,
         query: str,
         limit: int = 20,
-        session: Session = None
-    ) -> list[Food]:
+        session: Session = None,
+        fuzzy: bool = False,
+        constraints: DietaryConstraints = None,
+        view: bool = False
+    ) -> list[Food | FoodView]:
         """
         Search foods in local database.
 
@@ -25,25 +108,313 @@ class FoodService:
             query: Search term
             limit: Max results to return
             session: Optional existing session
+            fuzzy: Use the typo-tolerant trigram index instead of ILIKE
+            constraints: Only return foods these constraints allow
+            view: Return FoodView tuples, selected without ORM hydration
 
         Returns:
-            List of matching Food objects
+            List of matching Food objects (FoodViews with view=True)
         """
+        if fuzzy:
+            return self.search_fuzzy(query, limit, constraints, view)
+
         close_session = session is None
         session = session or db.get_session()
 
         try:
             results = (
-                session.query(Food)
-                .filter(Food.name.ilike(f"%{query}%"))
-                .limit(limit)
-                .all()
-            )
-            return results
+                session.query(*FOOD_VIEW_COLUMNS) if view else session.query(Food)
+            ).filter(Food.name.ilike(f"%{query}%"))
+            if constraints:
+                results = constraints.apply(results)
+            results = results.limit(limit).all()
+            return [FoodView.from_row(row) for row in results] if view else results
+        finally:
+            if close_session:
+                session.close()
+
+    def search_page(
+        self,
+        query: str,
+        page_size: int = 20,
+        cursor: SearchCursor = None,
+        constraints: DietaryConstraints = None,
+        view: bool = False,
+        session: Session = None
+    ) -> SearchPage:
+        """
+        One page of foods whose names contain the query.
+
+        Ordered by relevance (names starting with the query, then names
+        with a word starting with it, then the rest), then food_id. Pages
+        are keyset-paginated: the cursor filters past the previous page
+        instead of using OFFSET, so a page costs the same however deep it is.
+
+        Args:
+            query: Search term
+            page_size: Foods per page
+            cursor: next_cursor of the previous page (None for the first)
+            constraints: Only return foods these constraints allow
+            view: Return FoodView tuples, selected without ORM hydration
+            session: Optional existing session
+
+        Returns:
+            SearchPage with the foods and the cursor of the next page
+        """
+        close_session = session is None
+        session = session or db.get_session()
+        query = query.strip()
+        relevance = _relevance(query).label("relevance")
+
+        try:
+            results = (
+                session.query(*FOOD_VIEW_COLUMNS, relevance) if view else session.query(Food, relevance)
+            ).filter(Food.name.ilike(f"%{query}%"))
+            if constraints:
+                results = constraints.apply(results)
+            if cursor:
+                results = results.filter(or_(
+                    relevance > cursor.relevance,
+                    and_(relevance == cursor.relevance, Food.food_id > cursor.food_id),
+                ))
+            # One extra row tells whether another page follows
+            rows = results.order_by(relevance, Food.food_id).limit(page_size + 1).all()
         finally:
             if close_session:
                 session.close()
 
+        more = len(rows) > page_size
+        rows = rows[:page_size]
+        foods = [FoodView.from_row(row[:-1]) if view else row[0] for row in rows]
+        next_cursor = SearchCursor(rows[-1][-1], foods[-1].food_id) if more else None
+        return SearchPage(foods, next_cursor)
+
+    def _to_foods(
+        self,
+        food_ids: list[int],
+        limit: int,
+        constraints: Optional[DietaryConstraints],
+        view: bool = False
+    ) -> list[Food | FoodView]:
+        """Build snapshot Foods (or FoodViews) for index hits, dropping disallowed ones."""
+        snapshot = catalog.get()
+        if constraints:
+            food_ids = constraints.filter_ids(snapshot, food_ids)
+        rows = snapshot.rows_for_ids(food_ids[:limit])
+        return snapshot.to_food_views(rows) if view else snapshot.to_foods(rows)
+
+    def autocomplete(
+        self,
+        query: str,
+        limit: int = 10,
+        constraints: DietaryConstraints = None,
+        view: bool = False
+    ) -> list[Food | FoodView]:
+        """
+        Prefix-match food names for typeahead, most popular first.
+
+        Served from the in-memory prefix index; foods are transient
+        objects built from the catalog snapshot (FoodViews with view=True).
+        """
+        fetch = limit * CONSTRAINED_OVERFETCH if constraints else limit
+        return self._to_foods(typeahead.search(query, fetch), limit, constraints, view)
+
+    def search_fuzzy(
+        self,
+        query: str,
+        limit: int = 20,
+        constraints: DietaryConstraints = None,
+        view: bool = False
+    ) -> list[Food | FoodView]:
+        """
+        Typo-tolerant search, e.g. "chiken brest" finds chicken breast.
+
+        Served from the in-memory trigram index; foods are transient
+        objects built from the catalog snapshot (FoodViews with view=True).
+        """
+        fetch = limit * CONSTRAINED_OVERFETCH if constraints else limit
+        return self._to_foods(fuzzy_search.search(query, fetch), limit, constraints, view)
+
+    def find_similar_names(
+        self,
+        name: str,
+        limit: int = 10,
+        constraints: DietaryConstraints = None,
+        view: bool = False
+    ) -> list[Food | FoodView]:
+        """
+        Foods whose names look like the given text, most similar first.
+
+        Ranked by cosine similarity of character n-gram TF-IDF vectors, so
+        word order, plurals and spelling variants still match.
+        """
+        fetch = limit * CONSTRAINED_OVERFETCH if constraints else limit
+        food_ids = [food_id for food_id, _ in name_similarity.similar_to_name(name, fetch)]
+        return self._to_foods(food_ids, limit, constraints, view)
+
+    def local_matches(
+        self,
+        query: str,
+        limit: int = 10,
+        constraints: DietaryConstraints = None,
+        view: bool = False
+    ) -> tuple[list[Food | FoodView], bool]:
+        """
+        The local part of search_hybrid().
+
+        Tries the prefix index, then ILIKE, then fuzzy search.
+
+        Returns:
+            (foods, close_matches) where close_matches is set when only
+            fuzzy search found anything; foods are FoodViews with view=True
+        """
+        local = self.autocomplete(query, limit, constraints, view)
+        if len(local) < limit:
+            seen = {food.food_id for food in local}
+            local += [
+                f for f in self.search_local(query, limit, constraints=constraints, view=view)
+                if f.food_id not in seen
+            ]
+            local = local[:limit]
+
+        if local:
+            return local, False
+        local = self.search_fuzzy(query, limit, constraints, view)
+        return local, bool(local)
+
+    def search_hybrid(
+        self,
+        query: str,
+        limit: int = 10,
+        constraints: DietaryConstraints = None,
+        local: tuple[list[Food], bool] = None,
+        view: bool = False
+    ) -> HybridResults:
+        """
+        Answer from local indexes now; top up from USDA in the background.
+
+        Local lookup is local_matches(). When fewer than
+        hybrid_search.min_local_results foods are found, a USDA search is
+        started on a worker thread; its new hits are saved through
+        bulk_save_from_usda and merged behind the local results.
+
+        Args:
+            query: Search term
+            limit: Max results
+            constraints: Only return foods these constraints allow
+            local: local_matches() result to reuse (e.g. from a cache)
+            view: Return FoodView tuples instead of transient Foods
+
+        Returns:
+            HybridResults with local results and an optional pending search
+        """
+        config = load_config()["hybrid_search"]
+        local, close_matches = local or self.local_matches(query, limit, constraints, view)
+
+        pending = None
+        if len(local) < config["min_local_results"]:
+            pending = self._submit_usda_search(query, limit, local, config, constraints, view)
+
+        return HybridResults(local, close_matches, pending)
+
+    def _submit_usda_search(
+        self,
+        query: str,
+        limit: int,
+        local: list[Food],
+        config: dict,
+        constraints: DietaryConstraints = None,
+        view: bool = False
+    ) -> Future:
+        """
+        Start (or join) a background USDA search for this query.
+
+        A query answered within hybrid_search.usda_cache_ttl_s (even with
+        no hits) is merged from the remembered answer instead, as an
+        already completed future, so page reruns don't query USDA again.
+        """
+        normalized = query.strip().lower()
+        key = (normalized, limit, constraints, view)
+        with self._lock:
+            remembered = self._usda_results.get(normalized)
+            if remembered is not None and time.monotonic() - remembered[1] > config["usda_cache_ttl_s"]:
+                del self._usda_results[normalized]
+                remembered = None
+        if remembered is not None:
+            future = Future()
+            future.set_result(self._merge_usda(remembered[0], limit, local, constraints, view))
+            return future
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=config["workers"],
+                    thread_name_prefix="usda-search",
+                )
+            future = self._executor.submit(
+                self._fetch_and_merge, query, limit, local, config, constraints, view
+            )
+            self._in_flight[key] = future
+
+        def _forget(_):
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+        future.add_done_callback(_forget)
+        return future
+
+    def _fetch_and_merge(
+        self,
+        query: str,
+        limit: int,
+        local: list[Food],
+        config: dict,
+        constraints: DietaryConstraints = None,
+        view: bool = False
+    ) -> list[Food | FoodView]:
+        """Search USDA, persist unseen foods and merge them after local results."""
+        usda_foods = [
+            f for f in self.search_usda(query, limit=config["usda_page_size"]) if f.get("fdc_id")
+        ]
+
+        try:
+            self.bulk_save_from_usda(usda_foods)
+        except IntegrityError:
+            # Another search saved some of these first; the retry skips them
+            self.bulk_save_from_usda(usda_foods)
+
+        fdc_ids = [f["fdc_id"] for f in usda_foods]
+        with self._lock:
+            self._usda_results[query.strip().lower()] = (fdc_ids, time.monotonic())
+            while len(self._usda_results) > config["usda_cache_size"]:
+                self._usda_results.popitem(last=False)
+        return self._merge_usda(fdc_ids, limit, local, constraints, view)
+
+    def _merge_usda(
+        self,
+        fdc_ids: list[int],
+        limit: int,
+        local: list[Food],
+        constraints: DietaryConstraints = None,
+        view: bool = False
+    ) -> list[Food | FoodView]:
+        """Append saved USDA foods to the local results, skipping ones already shown."""
+        merged = list(local)
+        seen = {food.fdc_id for food in local if food.fdc_id}
+        for food in self.get_many_by_fdc_ids(fdc_ids, view=view):
+            if len(merged) >= limit:
+                break
+            if food is None or food.fdc_id in seen:
+                continue
+            seen.add(food.fdc_id)
+            if constraints is None or constraints.allows(food):
+                merged.append(food)
+        return merged
+
     def search_usda(self, query: str, limit: int = 20) -> list[dict]:
         """
         Search USDA API and return parsed results.
@@ -72,12 +443,30 @@ class FoodService:
 
         return foods
 
-    def get_by_id(self, food_id: int, session: Session = None) -> Optional[Food]:
-        """Get food by local database ID."""
+    def get_by_id(
+        self,
+        food_id: int,
+        session: Session = None,
+        view: bool = False
+    ) -> Optional[Food | FoodView]:
+        """
+        Get food by local database ID.
+
+        Served from the catalog snapshot as a transient Food (a FoodView
+        with view=True); falls back to the database for foods added since
+        the snapshot was taken.
+        """
         close_session = session is None
         session = session or db.get_session()
 
         try:
+            snapshot = catalog.get(session)
+            row = snapshot.row_for_id(food_id)
+            if row >= 0:
+                return snapshot.to_food_view(row) if view else snapshot.to_food(row)
+            if view:
+                row = session.query(*FOOD_VIEW_COLUMNS).filter(Food.food_id == food_id).first()
+                return FoodView.from_row(row) if row else None
             return session.query(Food).filter(Food.food_id == food_id).first()
         finally:
             if close_session:
@@ -94,6 +483,61 @@ class FoodService:
             if close_session:
                 session.close()
 
+    def get_many_by_ids(
+        self,
+        food_ids: list[int],
+        session: Session = None,
+        view: bool = False
+    ) -> list[Optional[Food | FoodView]]:
+        """
+        Get foods by local database IDs, in input order.
+
+        Served from the catalog snapshot (as FoodViews with view=True); ids
+        missing from it are resolved with one batched query. Unknown ids
+        yield None.
+        """
+        snapshot = catalog.get(session)
+        return self._snapshot_or_load(
+            snapshot, snapshot.rows_for_ids(food_ids), food_ids,
+            FoodLoader(session).get_many, view,
+        )
+
+    def get_many_by_fdc_ids(
+        self,
+        fdc_ids: list[int],
+        session: Session = None,
+        view: bool = False
+    ) -> list[Optional[Food | FoodView]]:
+        """
+        Get foods by USDA FDC IDs, in input order.
+
+        Resolved like get_many_by_ids(): from the catalog snapshot, then
+        one batched query for the rest. Unknown ids yield None.
+        """
+        snapshot = catalog.get(session)
+        return self._snapshot_or_load(
+            snapshot, snapshot.rows_for_fdc_ids(fdc_ids), fdc_ids,
+            FoodLoader(session).get_many_by_fdc, view,
+        )
+
+    @staticmethod
+    def _snapshot_or_load(snapshot, rows, ids: list[int], load_many, view: bool) -> list:
+        """Foods for snapshot rows, with ids missing from the snapshot (row -1) loaded by load_many."""
+        if view:
+            found = iter(snapshot.to_food_views(rows))
+            foods = [next(found) if row >= 0 else None for row in rows]
+        else:
+            foods = [snapshot.to_food(row) if row >= 0 else None for row in rows]
+
+        missing = [i for i, food in zip(ids, foods) if food is None]
+        if missing:
+            loaded = load_many(missing)
+            if view:
+                loaded = [FoodView.from_food(food) if food else None for food in loaded]
+            loaded = dict(zip(missing, loaded))
+            foods = [food or loaded.get(i) for i, food in zip(ids, foods)]
+        return foods
+
     def save_from_usda(self, food_data: dict, session: Session = None) -> Food:
         """
         Save a food from USDA search results to local database.
@@ -130,6 +574,7 @@ class FoodService:
                 sodium_mg=food_data.get("sodium_mg", 0),
             )
             session.add(food)
+            bump_catalog_version(session)
             session.commit()
             session.refresh(food)
             return food
@@ -160,9 +605,13 @@ class FoodService:
         added = 0
 
         try:
+            # One batched existence check instead of a query per food
+            loader = FoodLoader(session)
+            loader.load_fdc(food_data["fdc_id"] for food_data in foods_data)
+            loader.dispatch()
+
             for food_data in foods_data:
-                existing = self.get_by_fdc_id(food_data["fdc_id"], session)
-                if existing:
+                if loader.get_by_fdc(food_data["fdc_id"]):
                     continue
 
                 food = Food(
@@ -181,8 +630,12 @@ class FoodService:
                     sodium_mg=food_data.get("sodium_mg", 0),
                 )
                 session.add(food)
+                # Later duplicates of the same fdc_id in this batch are skipped
+                loader.prime(food)
                 added += 1
 
+            if added:
+                bump_catalog_version(session)
             session.commit()
             return added
         except Exception:
@@ -0,0 +1,218 @@
+"""Typo-tolerant food search backed by a character-trigram index.
+
+Every name token is padded and split into trigrams; each trigram maps to the
+rows that contain it. A query counts trigram hits per row, keeps the rows
+sharing enough trigrams, and re-ranks that short list by per-token edit
+distance, so "chiken brest" still finds "Chicken Breast, grilled".
+"""
+
+from array import array
+
+import numpy as np
+
+from src.services.catalog import CatalogIndex, CatalogSnapshot
+from src.services.typeahead import tokenize
+from src.utils import load_config
+
+
+def token_trigrams(token: str) -> set[str]:
+    """Trigrams of a single token, padded like pg_trgm ("  ab " style)."""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def text_trigrams(text: str) -> set[str]:
+    """Union of trigrams over all tokens of a name or query."""
+    grams = set()
+    for token in tokenize(text):
+        grams |= token_trigrams(token)
+    return grams
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Edit distance counting adjacent swaps as one edit ("brocolli" style typos).
+
+    Returns limit + 1 as soon as the distance is known to exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    before = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            cost = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            )
+            if before and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def typo_budget(token: str) -> int:
+    """Edits tolerated for a query token of this length."""
+    if len(token) <= 4:
+        return 1
+    if len(token) <= 8:
+        return 2
+    return 3
+
+
+class TrigramIndex:
+    """Inverted trigram index with candidate pruning and edit-distance re-ranking."""
+
+    # Trigrams present in more than this share of rows carry little signal
+    STOPGRAM_FRACTION = 0.2
+
+    def __init__(self, max_candidates: int = 200, min_overlap: float = 0.3):
+        self.max_candidates = max_candidates
+        self.min_overlap = min_overlap
+        self._food_ids = array("q")
+        self._names: list[str] = []
+        self._postings: dict[str, array] = {}
+
+    @classmethod
+    def build(
+        cls,
+        food_ids,
+        names: list[str],
+        max_candidates: int = 200,
+        min_overlap: float = 0.3
+    ) -> "TrigramIndex":
+        """Bulk-build an index from parallel id/name sequences."""
+        index = cls(max_candidates=max_candidates, min_overlap=min_overlap)
+        for food_id, name in zip(food_ids, names):
+            index.add(int(food_id), name)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._food_ids)
+
+    def add(self, food_id: int, name: str) -> None:
+        """Append one food; postings stay sorted because rows only grow."""
+        row = len(self._food_ids)
+        self._food_ids.append(food_id)
+        self._names.append(name)
+        for gram in text_trigrams(name):
+            posting = self._postings.get(gram)
+            if posting is None:
+                posting = self._postings[gram] = array("i")
+            posting.append(row)
+
+    def _candidates(self, grams: set[str]) -> tuple[np.ndarray, np.ndarray]:
+        """Rows sharing enough trigrams with the query, and their hit counts."""
+        postings = sorted(
+            (self._postings[g] for g in grams if g in self._postings),
+            key=len,
+        )
+        if not postings:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        # Drop very common trigrams as long as a few selective ones remain
+        stop_len = self.STOPGRAM_FRACTION * len(self)
+        selective = [p for p in postings if len(p) <= stop_len]
+        if len(selective) >= 3:
+            postings = selective
+
+        counts = np.bincount(
+            np.concatenate([np.frombuffer(p, dtype=np.int32) for p in postings]),
+            minlength=len(self),
+        )
+        min_hits = max(1, int(len(postings) * self.min_overlap))
+        rows = np.flatnonzero(counts >= min_hits)
+
+        if len(rows) > self.max_candidates:
+            keep = np.argpartition(-counts[rows], self.max_candidates - 1)
+            rows = rows[keep[:self.max_candidates]]
+        return rows, counts[rows]
+
+    def search(self, query: str, k: int = 10) -> list[int]:
+        """
+        Top-k food_ids whose names approximately match every query token.
+
+        Args:
+            query: Raw user input, possibly misspelled
+            k: Max results
+
+        Returns:
+            food_ids ordered by total edit distance, then trigram overlap
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        rows, hits = self._candidates(text_trigrams(query))
+
+        # Candidates share many tokens, so remember each term/token distance
+        distances: dict[tuple[str, str], int] = {}
+        term_grams = {term: token_trigrams(term) for term in terms}
+
+        def distance(term: str, token: str, budget: int) -> int:
+            key = (term, token)
+            if key not in distances:
+                best = budget + 1
+                # Let a partially typed word match a longer one
+                forms = (token, token[:len(term)]) if len(token) > len(term) else (token,)
+                for form in forms:
+                    # Each edit destroys at most 3 trigrams: skip hopeless pairs
+                    shared = len(term_grams[term] & token_trigrams(form))
+                    if shared >= max(len(term), len(form)) + 1 - 3 * budget:
+                        best = min(best, edit_distance(term, form, budget))
+                distances[key] = best
+            return distances[key]
+
+        scored = []
+        for row, hit_count in zip(rows.tolist(), hits.tolist()):
+            name = self._names[row]
+            name_tokens = tokenize(name)
+            total = 0
+            for term in terms:
+                budget = typo_budget(term)
+                best = min(
+                    (distance(term, token, budget) for token in name_tokens),
+                    default=budget + 1,
+                )
+                if best > budget:
+                    break
+                total += best
+            else:
+                scored.append((total, -hit_count, len(name), self._food_ids[row]))
+
+        scored.sort()
+        return [food_id for *_, food_id in scored[:k]]
+
+
+class FoodFuzzySearch(CatalogIndex):
+    """Process-wide trigram index kept in step with the catalog snapshot."""
+
+    def build(self, snapshot: CatalogSnapshot) -> TrigramIndex:
+        config = load_config()["fuzzy_search"]
+        return TrigramIndex.build(
+            snapshot.food_ids,
+            snapshot.names,
+            max_candidates=config["max_candidates"],
+            min_overlap=config["min_overlap"],
+        )
+
+    def extend(self, index: TrigramIndex, snapshot: CatalogSnapshot, rows: np.ndarray) -> bool:
+        for row in rows:
+            index.add(int(snapshot.food_ids[row]), snapshot.names[row])
+        return True
+
+    def search(self, query: str, k: int = 10) -> list[int]:
+        """Top-k food_ids approximately matching the query."""
+        index = self.get()
+        with self._lock:
+            return index.search(query, k)
+
+
+# Convenience instance
+fuzzy_search = FoodFuzzySearch()
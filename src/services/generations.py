@@ -0,0 +1,58 @@
+"""Write generations for cache keys.
+
+A cache entry keyed by the generations of the data it was computed from
+stays valid exactly until that data changes, with no TTL:
+
+- a user's generation is users.data_version, which every write to their
+  meal logs bumps in the same transaction (LoggingService calls
+  bump_user_version), so writes from any process retire cached entries;
+- the catalog generation is the catalog version, which every FoodService
+  write already bumps (see catalog.bump_catalog_version).
+"""
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from src.db.postgres_client import db, User
+from src.services.catalog import catalog
+
+
+def get_user_version(session: Session, user_id: int) -> int:
+    """Read a user's data version (0 if never bumped)."""
+    version = session.query(User.data_version).filter(User.user_id == user_id).scalar()
+    return version or 0
+
+
+def bump_user_version(session: Session, user_id: int) -> None:
+    """
+    Increment the user's data version inside the caller's transaction.
+
+    Call this from any code path that writes the user's meal logs, before
+    committing.
+    """
+    session.query(User).filter(User.user_id == user_id).update(
+        {User.data_version: func.coalesce(User.data_version, 0) + 1},
+        synchronize_session=False,
+    )
+
+
+class WriteGenerations:
+    """Current generations of the data pages cache."""
+
+    @staticmethod
+    def user(user_id: int) -> int:
+        """Generation of one user's logged data."""
+        session = db.get_session()
+        try:
+            return get_user_version(session, user_id)
+        finally:
+            session.close()
+
+    @staticmethod
+    def catalog() -> int:
+        """Generation of the foods catalog (its version counter)."""
+        return catalog.get().version
+
+
+# Convenience instance
+generations = WriteGenerations()
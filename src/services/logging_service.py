@@ -1,14 +1,28 @@
 """Meal logging service - CRUD operations for meal logs."""
 
 from datetime import date, datetime
+from decimal import Decimal
 from typing import Optional
 
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 from src.db.postgres_client import db, MealLog, Food, User, DailySummary
+from src.db.read_models import MealLogView, MEAL_LOG_VIEW_COLUMNS
+from src.services.favorites import record_log
+from src.services.generations import bump_user_version
 from src.utils import load_config
 
+# Meal types in display order
+MEAL_TYPES = ("breakfast", "lunch", "dinner", "snack")
+
+
+def is_target_met(total: float, target: Optional[float], tolerance: float) -> bool:
+    """Check whether a daily total lands within tolerance of its target."""
+    if not target:
+        return False
+    return abs(total - target) / target <= tolerance
+
 
 class LoggingService:
     """Handles meal logging CRUD operations."""
@@ -52,6 +66,11 @@ class LoggingService:
                 log_date=log_date,
             )
             session.add(meal_log)
+            record_log(
+                session, user_id, food_id, log_date,
+                half_life_days=self.config["favorites"]["half_life_days"],
+            )
+            bump_user_version(session, user_id)
             session.commit()
             session.refresh(meal_log)
             return meal_log
@@ -66,20 +85,21 @@ class LoggingService:
         self,
         user_id: int,
         log_date: date = None,
-        session: Session = None
-    ) -> list[MealLog]:
-        """Get all meal logs for a user on a specific date."""
+        session: Session = None,
+        view: bool = False
+    ) -> list[MealLog | MealLogView]:
+        """Get all meal logs for a user on a specific date (as MealLogViews with view=True)."""
         close_session = session is None
         session = session or db.get_session()
         log_date = log_date or date.today()
 
         try:
-            return (
-                session.query(MealLog)
-                .filter(MealLog.user_id == user_id, MealLog.log_date == log_date)
-                .order_by(MealLog.logged_at)
-                .all()
-            )
+            logs = (
+                session.query(*MEAL_LOG_VIEW_COLUMNS) if view else session.query(MealLog)
+            ).filter(
+                MealLog.user_id == user_id, MealLog.log_date == log_date
+            ).order_by(MealLog.logged_at).all()
+            return [MealLogView.from_row(row) for row in logs] if view else logs
         finally:
             if close_session:
                 session.close()
@@ -89,23 +109,23 @@ class LoggingService:
         user_id: int,
         meal_type: str,
         log_date: date = None,
-        session: Session = None
-    ) -> list[MealLog]:
-        """Get meal logs filtered by meal type."""
+        session: Session = None,
+        view: bool = False
+    ) -> list[MealLog | MealLogView]:
+        """Get meal logs filtered by meal type (as MealLogViews with view=True)."""
         close_session = session is None
         session = session or db.get_session()
         log_date = log_date or date.today()
 
         try:
-            return (
-                session.query(MealLog)
-                .filter(
-                    MealLog.user_id == user_id,
-                    MealLog.log_date == log_date,
-                    MealLog.meal_type == meal_type
-                )
-                .all()
-            )
+            logs = (
+                session.query(*MEAL_LOG_VIEW_COLUMNS) if view else session.query(MealLog)
+            ).filter(
+                MealLog.user_id == user_id,
+                MealLog.log_date == log_date,
+                MealLog.meal_type == meal_type
+            ).all()
+            return [MealLogView.from_row(row) for row in logs] if view else logs
         finally:
             if close_session:
                 session.close()
@@ -118,6 +138,11 @@ class LoggingService:
         try:
             log = session.query(MealLog).filter(MealLog.log_id == log_id).first()
             if log:
+                record_log(
+                    session, log.user_id, log.food_id, log.log_date, delta=-1,
+                    half_life_days=self.config["favorites"]["half_life_days"],
+                )
+                bump_user_version(session, log.user_id)
                 session.delete(log)
                 session.commit()
                 return True
@@ -143,6 +168,7 @@ class LoggingService:
             log = session.query(MealLog).filter(MealLog.log_id == log_id).first()
             if log:
                 log.servings = servings
+                bump_user_version(session, log.user_id)
                 session.commit()
                 session.refresh(log)
                 return log
@@ -194,6 +220,92 @@ class LoggingService:
             if close_session:
                 session.close()
 
+    def get_day_view(
+        self,
+        user_id: int,
+        log_date: date = None,
+        session: Session = None
+    ) -> dict:
+        """
+        Everything a day's pages show, from one query.
+
+        Args:
+            user_id: User's ID
+            log_date: Date to read (default today)
+            session: Optional existing session
+
+        Returns:
+            Plain dict (cheap to cache or pickle):
+            - date
+            - totals: as calculate_daily_totals()
+            - meals: per meal type in MEAL_TYPES order (logged types only),
+              its calories/protein/carbs/fat and its items, oldest first;
+              each item has log_id, food_id, name, servings and the
+              nutrients for those servings
+        """
+        close_session = session is None
+        session = session or db.get_session()
+        log_date = log_date or date.today()
+
+        try:
+            rows = (
+                session.query(
+                    MealLog.log_id,
+                    MealLog.food_id,
+                    MealLog.meal_type,
+                    MealLog.servings,
+                    Food.name,
+                    Food.calories,
+                    Food.protein_g,
+                    Food.carbs_g,
+                    Food.fat_g,
+                )
+                .join(Food, MealLog.food_id == Food.food_id)
+                .filter(MealLog.user_id == user_id, MealLog.log_date == log_date)
+                .order_by(MealLog.logged_at, MealLog.log_id)
+                .all()
+            )
+        finally:
+            if close_session:
+                session.close()
+
+        # Sum exactly (Numeric columns) so totals match the SQL aggregate
+        sums = {key: Decimal(0) for key in ("calories", "protein", "carbs", "fat")}
+        meals: dict[str, dict] = {}
+        for row in rows:
+            servings = row.servings if row.servings is not None else Decimal(1)
+            amounts = {
+                "calories": (row.calories or 0) * servings,
+                "protein": (row.protein_g or 0) * servings,
+                "carbs": (row.carbs_g or 0) * servings,
+                "fat": (row.fat_g or 0) * servings,
+            }
+            meal = meals.setdefault(row.meal_type, {
+                "calories": 0.0, "protein": 0.0, "carbs": 0.0, "fat": 0.0, "items": []
+            })
+            for key, amount in amounts.items():
+                sums[key] += amount
+                meal[key] += float(amount)
+            meal["items"].append({
+                "log_id": row.log_id,
+                "food_id": row.food_id,
+                "name": row.name,
+                "servings": float(servings),
+                **{key: float(amount) for key, amount in amounts.items()},
+            })
+
+        order = {meal_type: i for i, meal_type in enumerate(MEAL_TYPES)}
+        return {
+            "date": log_date,
+            "totals": {
+                "total_calories": int(sums["calories"]),
+                "total_protein": int(sums["protein"]),
+                "total_carbs": int(sums["carbs"]),
+                "total_fat": int(sums["fat"]),
+            },
+            "meals": dict(sorted(meals.items(), key=lambda item: order.get(item[0], len(order)))),
+        }
+
     def update_daily_summary(
         self,
         user_id: int,
@@ -221,16 +333,12 @@ class LoggingService:
             # Check if targets met (within tolerance)
             tolerance = self.config["nutrition"]["target_tolerance"]
 
-            calorie_target_met = False
-            protein_target_met = False
-
-            if user.calorie_target:
-                diff = abs(totals["total_calories"] - user.calorie_target) / user.calorie_target
-                calorie_target_met = diff <= tolerance
-
-            if user.protein_target:
-                diff = abs(totals["total_protein"] - user.protein_target) / user.protein_target
-                protein_target_met = diff <= tolerance
+            calorie_target_met = is_target_met(
+                totals["total_calories"], user.calorie_target, tolerance
+            )
+            protein_target_met = is_target_met(
+                totals["total_protein"], user.protein_target, tolerance
+            )
 
             # Update or create summary
             summary = (
@@ -1,9 +1,95 @@
 """Meal plan optimizer - generates daily/weekly meal plans."""
 
-from typing import Optional
+from typing import Iterator, Optional
 import random
 
-from src.db.postgres_client import db, Food
+import numpy as np
+
+from src.db.postgres_client import Food
+from src.services.catalog import catalog, CatalogSnapshot, NUTRIENT_INDEX
+from src.services.constraints import DietaryConstraints, MASK_CACHE_SIZE, UNCONSTRAINED
+from src.services.plan_optimizer import BeamSearchOptimizer, MACRO_COLUMNS
+from src.utils import load_config
+
+# Macro keys of plan items, meals and day targets
+PLAN_MACROS = ("calories", "protein", "carbs", "fat")
+
+
+class FoodPool:
+    """
+    Candidate foods for one plan request.
+
+    Dietary constraints run once against a single catalog snapshot, and the
+    per-meal candidate lists are shared by every day and meal of the plan.
+    Foods are materialized on first use and reused.
+    """
+
+    # Foods offered when no food fits a meal's categories
+    FALLBACK_SIZE = 20
+
+    def __init__(
+        self,
+        snapshot: CatalogSnapshot,
+        meal_categories: dict[str, list[str]],
+        constraints: DietaryConstraints = UNCONSTRAINED
+    ):
+        self.snapshot = snapshot
+        self.constraints = constraints
+        diet = constraints.mask(snapshot)
+        self.rows = {
+            meal_type: np.flatnonzero(
+                diet & snapshot.mask(categories=categories) if categories else diet
+            )
+            for meal_type, categories in meal_categories.items()
+        }
+        self._foods: dict[int, Food] = {}
+
+    def candidate_rows(
+        self,
+        meal_type: str,
+        limit: int = None,
+        by_protein: bool = False,
+        rng: random.Random = None
+    ) -> np.ndarray:
+        """
+        Snapshot rows of candidate foods for a meal type.
+
+        Falls back to a small set of any foods when nothing matches. With a
+        limit, returns the highest in protein (ties in random order) when
+        by_protein, otherwise a random sample drawn from rng (default: the
+        random module).
+        """
+        rows = self.rows.get(meal_type)
+        if rows is None or not len(rows):
+            # Fallback: get any foods
+            rows = np.arange(min(self.FALLBACK_SIZE, len(self.snapshot)))
+
+        if limit is not None and len(rows) > limit:
+            rng = np.random.default_rng((rng or random).getrandbits(64))
+            if by_protein:
+                protein = self.snapshot.nutrient("protein_g")[rows]
+                order = np.lexsort((rng.random(len(rows)), -protein))
+                rows = rows[order[:limit]]
+            else:
+                rows = rng.choice(rows, limit, replace=False)
+        return rows
+
+    def foods_for(
+        self,
+        meal_type: str,
+        limit: int = None,
+        by_protein: bool = False,
+        rng: random.Random = None
+    ) -> list[Food]:
+        """Candidate foods for a meal type; see candidate_rows()."""
+        return [self.food(int(row)) for row in self.candidate_rows(meal_type, limit, by_protein, rng)]
+
+    def food(self, row: int) -> Food:
+        """Transient Food for a snapshot row, built once per pool."""
+        food = self._foods.get(row)
+        if food is None:
+            food = self._foods[row] = self.snapshot.to_food(row)
+        return food
 
 
 class MealPlanner:
@@ -25,43 +111,301 @@ class MealPlanner:
         "snack": ["Fruits", "Nuts", "Dairy", "Snacks"]
     }
 
-    def __init__(self):
+    MODES = ("greedy", "optimized")
+
+    def __init__(self, mode: str = None):
+        """
+        Args:
+            mode: 'greedy' fills calories and protein food by food;
+                'optimized' searches servings against all four macro
+                targets. Defaults to meal_planner.mode in config.yaml.
+        """
         self.session = None
+        self.config = load_config()["meal_planner"]
+        self.mode = mode or self.config["mode"]
+        if self.mode not in self.MODES:
+            raise ValueError(f"Unknown planner mode: {self.mode}")
+
+    def build_pool(
+        self,
+        constraints: DietaryConstraints = None,
+        snapshot: CatalogSnapshot = None
+    ) -> FoodPool:
+        """
+        Filter the catalog (or a given snapshot) once for a plan request.
+
+        Pools are cached on the snapshot per constraints, so later edits
+        to a plan reuse the candidates it was built from.
+        """
+        snapshot = snapshot or catalog.get()
+        constraints = constraints or UNCONSTRAINED
+        pools = snapshot.derived.setdefault("food_pools", {})
+        pool = pools.get(constraints)
+        if pool is None:
+            if len(pools) >= MASK_CACHE_SIZE:
+                pools.clear()
+            pool = pools[constraints] = FoodPool(snapshot, self.MEAL_CATEGORIES, constraints)
+        return pool
+
+    @staticmethod
+    def meal_entry(meal_type: str, selected_foods: list[dict]) -> dict:
+        """Meal dict with per-macro totals of its items."""
+        return {
+            "meal_type": meal_type,
+            "foods": selected_foods,
+            "calories": sum(f["calories"] for f in selected_foods),
+            "protein": sum(f["protein"] for f in selected_foods),
+            "carbs": sum(f["carbs"] for f in selected_foods),
+            "fat": sum(f["fat"] for f in selected_foods)
+        }
+
+    @staticmethod
+    def plan_item(food: Food, servings: float) -> dict:
+        """Plan entry for a food at a number of servings."""
+        return {
+            "food_id": food.food_id,
+            "name": food.name,
+            "servings": servings,
+            "calories": float(food.calories or 0) * servings,
+            "protein": float(food.protein_g or 0) * servings,
+            "carbs": float(food.carbs_g or 0) * servings,
+            "fat": float(food.fat_g or 0) * servings
+        }
+
+    @staticmethod
+    def day_totals(day_plan: dict) -> dict:
+        """Macro totals over all meals of a day plan."""
+        return {m: sum(meal[m] for meal in day_plan["meals"]) for m in PLAN_MACROS}
+
+    def _plan_meals_greedy(
+        self,
+        pool: FoodPool,
+        calorie_target: float,
+        protein_target: float,
+        rng: random.Random = None
+    ) -> list[dict]:
+        """Fill each meal's calorie share, favouring protein."""
+        meals = []
+
+        for meal_type, cal_fraction in self.MEAL_DISTRIBUTION.items():
+            meal_cal_target = calorie_target * cal_fraction
+            meal_protein_target = protein_target * cal_fraction
+
+            # Get suitable foods; selection only considers num_items * 2 of
+            # them, so let the pool pick those without building the rest
+            num_items = 2 if meal_type == "snack" else 3
+            foods = pool.foods_for(
+                meal_type,
+                limit=num_items * 2,
+                by_protein=meal_protein_target > 0,
+                rng=rng
+            )
+
+            # Select foods for this meal
+            selected_foods = self._select_foods_for_target(
+                foods,
+                meal_cal_target,
+                meal_protein_target,
+                num_items=num_items,
+                rng=rng
+            )
+
+            if selected_foods:
+                meals.append(self.meal_entry(meal_type, selected_foods))
+
+        return meals
+
+    def _plan_meals_optimized(
+        self,
+        pool: FoodPool,
+        targets: np.ndarray,
+        rng: random.Random = None
+    ) -> list[dict]:
+        """
+        Optimize each meal against its share of all four macro targets.
+
+        Meals are planned in order and each one aims at its share of what
+        is still left for the day, so later meals correct earlier misses.
+        """
+        optimizer = BeamSearchOptimizer(
+            beam_width=self.config["beam_width"],
+            tolerance=load_config()["nutrition"]["target_tolerance"],
+        )
+        columns = [NUTRIENT_INDEX[c] for c in MACRO_COLUMNS]
+        np_rng = np.random.default_rng((rng or random).getrandbits(64))
+        remaining = targets.astype(np.float32)
+        remaining_fraction = 1.0
+        meals = []
+
+        for meal_type, fraction in self.MEAL_DISTRIBUTION.items():
+            meal_targets = np.maximum(remaining, 0) * (fraction / remaining_fraction)
+            remaining_fraction -= fraction
+
+            rows = pool.candidate_rows(meal_type, limit=self.config["candidates"], rng=rng)
+            num_items = 2 if meal_type == "snack" else 3
+            choice = optimizer.optimize(
+                pool.snapshot.nutrients[rows][:, columns],
+                meal_targets,
+                max_items=num_items,
+                rng=np_rng,
+                jitter=self.config["variety"],
+            )
+            if choice is None:
+                continue
+
+            selected_foods = [
+                self.plan_item(pool.food(int(rows[i])), float(servings))
+                for i, servings in zip(choice.rows, choice.servings)
+            ]
+            meals.append(self.meal_entry(meal_type, selected_foods))
+            remaining -= choice.totals
 
-    def _get_foods_for_meal(
+        return meals
+
+    def _refill_meal(
         self,
+        day_plan: dict,
         meal_type: str,
-        vegetarian: bool = False,
-        high_protein: bool = False
-    ) -> list[Food]:
-        """Get suitable foods for a meal type."""
-        session = db.get_session()
-        try:
-            categories = self.MEAL_CATEGORIES.get(meal_type, [])
+        keep: list[dict],
+        exclude_ids: set[int],
+        max_items: int,
+        pool: FoodPool,
+        seed: Optional[int]
+    ) -> dict:
+        """
+        Add up to max_items foods to a meal's kept items.
 
-            query = session.query(Food)
+        Only this meal is searched: every other meal and the kept items are
+        fixed, and the new foods aim at what they leave of the day targets.
+        Returns a new day plan; the given one is not modified.
+        """
+        meals = day_plan["meals"]
+        index = next((i for i, m in enumerate(meals) if m["meal_type"] == meal_type), None)
+        if index is None:
+            raise ValueError(f"No {meal_type} in this plan")
+
+        targets = np.array([day_plan["targets"][m] for m in PLAN_MACROS], dtype=np.float32)
+        used = np.array(
+            [
+                sum(m[macro] for i, m in enumerate(meals) if i != index)
+                + sum(item[macro] for item in keep)
+                for macro in PLAN_MACROS
+            ],
+            dtype=np.float32,
+        )
+        budget = np.maximum(targets - used, 0)
+
+        # No repeats within the day, and never the foods being replaced
+        exclude = set(exclude_ids)
+        exclude.update(item["food_id"] for m in meals for item in m["foods"])
+        rows = pool.candidate_rows(meal_type)
+        rows = rows[~np.isin(pool.snapshot.food_ids[rows], np.fromiter(exclude, np.int64))]
+
+        rng = np.random.default_rng(seed)
+        limit = self.config["edit_candidates"]
+        if len(rows) > limit:
+            rows = rng.choice(rows, limit, replace=False)
+
+        optimizer = BeamSearchOptimizer(
+            beam_width=self.config["beam_width"],
+            tolerance=load_config()["nutrition"]["target_tolerance"],
+        )
+        columns = [NUTRIENT_INDEX[c] for c in MACRO_COLUMNS]
+        choice = optimizer.optimize(
+            pool.snapshot.nutrients[rows][:, columns],
+            budget,
+            max_items=max_items,
+            rng=rng,
+            jitter=self.config["variety"],
+        )
+
+        items = list(keep)
+        if choice is not None:
+            items += [
+                self.plan_item(pool.food(int(rows[i])), float(servings))
+                for i, servings in zip(choice.rows, choice.servings)
+            ]
+        updated = list(meals)
+        updated[index] = self.meal_entry(meal_type, items)
+        return {**day_plan, "meals": updated}
+
+    def swap_item(
+        self,
+        day_plan: dict,
+        meal_type: str,
+        food_id: int,
+        exclude_ids: list[int] = (),
+        constraints: DietaryConstraints = None,
+        pool: FoodPool = None,
+        seed: int = None
+    ) -> dict:
+        """
+        Replace one food in a plan, keeping everything else as it is.
+
+        The replacement (and its servings) is the candidate that best fills
+        what the rest of the day leaves of the targets.
+
+        Args:
+            day_plan: Day plan as returned by generate_day_plan()
+            meal_type: Meal holding the food
+            food_id: Food to replace
+            exclude_ids: Other foods not to offer, e.g. earlier rejections
+            constraints: Allowed foods, as the plan was generated with
+            pool: Candidate pool (default: build_pool(constraints))
+            seed: Picks among replacements that score about the same
+
+        Returns:
+            Updated day plan with recomputed meal totals
+        """
+        meal = next((m for m in day_plan["meals"] if m["meal_type"] == meal_type), None)
+        if meal is None or not any(item["food_id"] == food_id for item in meal["foods"]):
+            raise ValueError(f"Food {food_id} is not in {meal_type}")
+
+        keep = [item for item in meal["foods"] if item["food_id"] != food_id]
+        return self._refill_meal(
+            day_plan, meal_type, keep, set(exclude_ids), 1,
+            pool or self.build_pool(constraints), seed,
+        )
 
-            if categories:
-                query = query.filter(Food.category.in_(categories))
+    def reoptimize_meal(
+        self,
+        day_plan: dict,
+        meal_type: str,
+        exclude_ids: list[int] = (),
+        constraints: DietaryConstraints = None,
+        pool: FoodPool = None,
+        seed: int = None
+    ) -> dict:
+        """
+        Re-plan one meal with different foods, keeping the other meals.
 
-            if vegetarian:
-                # Exclude meat categories
-                query = query.filter(~Food.category.in_(["Poultry", "Fish", "Beef"]))
+        The new meal aims at whatever the other meals leave of the day
+        targets, so it also corrects misses elsewhere in the day.
 
-            if high_protein:
-                query = query.filter(Food.protein_g >= 10)
+        Args:
+            day_plan: Day plan as returned by generate_day_plan()
+            meal_type: Meal to re-plan
+            exclude_ids: Other foods not to use
+            constraints: Allowed foods, as the plan was generated with
+            pool: Candidate pool (default: build_pool(constraints))
+            seed: Picks among meals that score about the same
 
-            foods = query.all()
-            return foods
-        finally:
-            session.close()
+        Returns:
+            Updated day plan with recomputed meal totals
+        """
+        num_items = 2 if meal_type == "snack" else 3
+        return self._refill_meal(
+            day_plan, meal_type, [], set(exclude_ids), num_items,
+            pool or self.build_pool(constraints), seed,
+        )
 
     def _select_foods_for_target(
         self,
         foods: list[Food],
         calorie_target: float,
         protein_target: float,
-        num_items: int = 2
+        num_items: int = 2,
+        rng: random.Random = None
     ) -> list[dict]:
         """Select foods to meet calorie/protein targets."""
         if not foods:
@@ -73,7 +417,7 @@ class MealPlanner:
 
         # Shuffle for variety
         foods_copy = foods.copy()
-        random.shuffle(foods_copy)
+        (rng or random).shuffle(foods_copy)
 
         # Prioritize high-protein foods if needed
         if protein_target > 0:
@@ -123,53 +467,33 @@ class MealPlanner:
         carb_target: int = 200,
         fat_target: int = 65,
         vegetarian: bool = False,
-        high_protein: bool = False
+        high_protein: bool = False,
+        low_carb: bool = False,
+        constraints: DietaryConstraints = None,
+        pool: FoodPool = None,
+        rng: random.Random = None
     ) -> Optional[dict]:
         """
         Generate a single day meal plan.
 
-        Returns dict with meals list, each containing foods and totals.
+        Diet flags are shorthand for DietaryConstraints; explicit
+        constraints take precedence. Pass a pool from build_pool() to reuse
+        one candidate set across several days, and an rng for draws that
+        don't touch the shared random module. Returns dict with meals
+        list, each containing foods and totals.
         """
-        meals = []
-
-        for meal_type, cal_fraction in self.MEAL_DISTRIBUTION.items():
-            meal_cal_target = calorie_target * cal_fraction
-            meal_protein_target = protein_target * cal_fraction
-
-            # Get suitable foods
-            foods = self._get_foods_for_meal(meal_type, vegetarian, high_protein)
-
-            if not foods:
-                # Fallback: get any foods
-                session = db.get_session()
-                try:
-                    foods = session.query(Food).limit(20).all()
-                finally:
-                    session.close()
-
-            # Select foods for this meal
-            num_items = 2 if meal_type == "snack" else 3
-            selected_foods = self._select_foods_for_target(
-                foods,
-                meal_cal_target,
-                meal_protein_target,
-                num_items=num_items
+        if pool is None:
+            constraints = DietaryConstraints.resolve(constraints, vegetarian, high_protein, low_carb)
+            pool = self.build_pool(constraints)
+
+        if self.mode == "optimized":
+            targets = np.array(
+                [calorie_target, protein_target, carb_target, fat_target],
+                dtype=np.float32,
             )
-
-            if selected_foods:
-                meal_cals = sum(f["calories"] for f in selected_foods)
-                meal_protein = sum(f["protein"] for f in selected_foods)
-                meal_carbs = sum(f["carbs"] for f in selected_foods)
-                meal_fat = sum(f["fat"] for f in selected_foods)
-
-                meals.append({
-                    "meal_type": meal_type,
-                    "foods": selected_foods,
-                    "calories": meal_cals,
-                    "protein": meal_protein,
-                    "carbs": meal_carbs,
-                    "fat": meal_fat
-                })
+            meals = self._plan_meals_optimized(pool, targets, rng)
+        else:
+            meals = self._plan_meals_greedy(pool, calorie_target, protein_target, rng)
 
         if not meals:
             return None
@@ -184,29 +508,91 @@ class MealPlanner:
             }
         }
 
-    def generate_week_plan(
+    def iter_plan(
         self,
+        days: int = 1,
+        seed: int = None,
         calorie_target: int = 2000,
         protein_target: int = 150,
         carb_target: int = 200,
         fat_target: int = 65,
         vegetarian: bool = False,
-        high_protein: bool = False
-    ) -> list[dict]:
-        """Generate a 7-day meal plan."""
-        week_plan = []
+        high_protein: bool = False,
+        low_carb: bool = False,
+        constraints: DietaryConstraints = None,
+        pool: FoodPool = None
+    ) -> Iterator[dict]:
+        """
+        Yield day plans one at a time from one shared candidate pool.
+
+        Each day is ready as soon as it is planned, so callers can show the
+        first day without waiting for the rest. With a seed, every day is
+        seeded on its own random.Random, so the plan is reproducible for the
+        same catalog snapshot whatever other threads draw meanwhile.
+        """
+        if pool is None:
+            constraints = DietaryConstraints.resolve(constraints, vegetarian, high_protein, low_carb)
+            pool = self.build_pool(constraints)
 
-        for day in range(7):
+        for day in range(days):
+            rng = random.Random(f"{seed}:{day}") if seed is not None else None
             day_plan = self.generate_day_plan(
                 calorie_target=calorie_target,
                 protein_target=protein_target,
                 carb_target=carb_target,
                 fat_target=fat_target,
-                vegetarian=vegetarian,
-                high_protein=high_protein
+                pool=pool,
+                rng=rng
             )
             if day_plan:
                 day_plan["day"] = day
-                week_plan.append(day_plan)
+                yield day_plan
 
-        return week_plan
+    def generate_plan(
+        self,
+        days: int = 1,
+        seed: int = None,
+        calorie_target: int = 2000,
+        protein_target: int = 150,
+        carb_target: int = 200,
+        fat_target: int = 65,
+        vegetarian: bool = False,
+        high_protein: bool = False,
+        low_carb: bool = False,
+        constraints: DietaryConstraints = None,
+        pool: FoodPool = None
+    ) -> list[dict]:
+        """
+        Generate day plans for several days from one shared candidate pool.
+
+        A seed makes the plan reproducible for the same catalog snapshot.
+        """
+        return list(self.iter_plan(
+            days, seed,
+            calorie_target, protein_target, carb_target, fat_target,
+            vegetarian, high_protein, low_carb, constraints, pool
+        ))
+
+    def generate_week_plan(
+        self,
+        calorie_target: int = 2000,
+        protein_target: int = 150,
+        carb_target: int = 200,
+        fat_target: int = 65,
+        vegetarian: bool = False,
+        high_protein: bool = False,
+        low_carb: bool = False,
+        constraints: DietaryConstraints = None
+    ) -> list[dict]:
+        """Generate a 7-day meal plan from one shared candidate pool."""
+        return self.generate_plan(
+            days=7,
+            calorie_target=calorie_target,
+            protein_target=protein_target,
+            carb_target=carb_target,
+            fat_target=fat_target,
+            vegetarian=vegetarian,
+            high_protein=high_protein,
+            low_carb=low_carb,
+            constraints=constraints
+        )
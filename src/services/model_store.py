@@ -0,0 +1,219 @@
+"""Versioned model artifacts under models/.
+
+The training pipeline (see model_training.py) writes every artifact of a
+run into a new version directory, then publishes it by replacing
+models/manifest.json:
+
+    models/
+        manifest.json        {"version": 3, "artifacts": {"cooccurrence":
+                              {"path": "v0003/cooccurrence", ...}, ...}}
+        v0002/...
+        v0003/cooccurrence/  food_ids.npy, counts_data.npy, ..., meta.json
+
+Version directories are never modified after publishing, so readers can
+memory-map them freely, and the manifest swap is atomic: a process sees
+either the old or the new set of artifacts. Running processes re-read the
+manifest at most every models.check_interval_s and load a changed
+artifact the next time it is used.
+
+An artifact is a directory of .npy arrays plus meta.json (save_arrays /
+load_arrays); objects without a plain-array form, such as KD-trees, are
+stored with joblib, which memory-maps the arrays inside them on load.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import joblib
+import numpy as np
+import scipy.sparse as sp
+
+from src.utils import get_project_root, load_config
+
+MODELS_ROOT = get_project_root() / "models"
+MANIFEST_NAME = "manifest.json"
+
+
+def save_arrays(directory: Path, arrays: dict[str, np.ndarray], meta: dict) -> None:
+    """Write arrays and metadata to directory, replacing any previous copy."""
+    directory = Path(directory)
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=f"{directory.name}.", dir=directory.parent))
+
+    for name, array in arrays.items():
+        np.save(tmp / f"{name}.npy", np.asarray(array))
+    with open(tmp / "meta.json", "w") as f:
+        json.dump(meta, f)
+
+    previous = directory.with_name(f"{directory.name}.old")
+    shutil.rmtree(previous, ignore_errors=True)
+    if directory.exists():
+        os.replace(directory, previous)
+    os.replace(tmp, directory)
+    shutil.rmtree(previous, ignore_errors=True)
+
+
+def load_arrays(directory: Path, mmap: bool = True) -> Optional[tuple[dict[str, np.ndarray], dict]]:
+    """
+    Arrays and metadata saved by save_arrays(), or None if there are none.
+
+    With mmap, arrays are read-only views of the files.
+    """
+    directory = Path(directory)
+    if not (directory / "meta.json").exists():
+        return None
+
+    with open(directory / "meta.json") as f:
+        meta = json.load(f)
+    arrays = {
+        path.stem: np.load(path, mmap_mode="r" if mmap else None)
+        for path in directory.glob("*.npy")
+    }
+    return arrays, meta
+
+
+def save_object(path: Path, obj) -> None:
+    """Write an object holding NumPy arrays (e.g. a KD-tree) with joblib."""
+    joblib.dump(obj, path)
+
+
+def load_object(path: Path, mmap: bool = True):
+    """Load a save_object() file, memory-mapping its arrays."""
+    return joblib.load(path, mmap_mode="r" if mmap else None)
+
+
+def csr_arrays(prefix: str, matrix: sp.csr_matrix) -> dict[str, np.ndarray]:
+    """A CSR matrix as named arrays for save_arrays()."""
+    return {
+        f"{prefix}_data": matrix.data,
+        f"{prefix}_indices": matrix.indices,
+        f"{prefix}_indptr": matrix.indptr,
+    }
+
+
+def csr_from_arrays(prefix: str, arrays: dict[str, np.ndarray], shape: tuple[int, int]) -> sp.csr_matrix:
+    """Rebuild a CSR matrix from csr_arrays() output without copying."""
+    return sp.csr_matrix(
+        (arrays[f"{prefix}_data"], arrays[f"{prefix}_indices"], arrays[f"{prefix}_indptr"]),
+        shape=tuple(shape),
+        copy=False,
+    )
+
+
+class ModelRegistry:
+    """Reads and publishes the versioned artifacts of one models directory."""
+
+    def __init__(self, root: Path = MODELS_ROOT):
+        self.root = Path(root)
+        self._manifest: dict = {}
+        self._checked_at = 0.0
+        self._check_interval = None
+        self._lock = threading.Lock()
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self.root / MANIFEST_NAME) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def manifest(self) -> dict:
+        """
+        The published manifest ({} before the first training run).
+
+        The file is re-read at most once per models.check_interval_s.
+        """
+        if self._check_interval is None:
+            self._check_interval = load_config()["models"]["check_interval_s"]
+        if time.monotonic() - self._checked_at < self._check_interval:
+            return self._manifest
+
+        with self._lock:
+            if time.monotonic() - self._checked_at >= self._check_interval:
+                self._manifest = self._read_manifest()
+                self._checked_at = time.monotonic()
+            return self._manifest
+
+    def invalidate(self) -> None:
+        """Re-read the manifest on the next lookup."""
+        self._checked_at = 0.0
+
+    @property
+    def version(self) -> int:
+        """Published version number (0 if nothing is published)."""
+        return self.manifest().get("version", 0)
+
+    def entry(self, name: str) -> Optional[dict]:
+        """Manifest entry of one artifact, or None."""
+        return self.manifest().get("artifacts", {}).get(name)
+
+    def path(self, name: str) -> Optional[Path]:
+        """Directory of the published artifact, or None."""
+        entry = self.entry(name)
+        return self.root / entry["path"] if entry else None
+
+    def stage(self) -> Path:
+        """A fresh directory to write a new version into before publish()."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        return Path(tempfile.mkdtemp(prefix=".staging.", dir=self.root))
+
+    def publish(self, staging: Path, artifacts: dict[str, dict], keep_versions: int = None) -> int:
+        """
+        Make a staged directory the current version.
+
+        Args:
+            staging: Directory from stage(), one subdirectory per artifact
+            artifacts: Manifest metadata per artifact written to staging;
+                published artifacts not listed are carried over unchanged
+            keep_versions: Version directories to keep (older unused ones
+                are deleted; default models.keep_versions)
+
+        Returns:
+            The new version number
+        """
+        current = self._read_manifest()
+        version = current.get("version", 0) + 1
+        directory = self.root / f"v{version:04d}"
+        os.replace(staging, directory)
+
+        entries = dict(current.get("artifacts", {}))
+        for name, meta in artifacts.items():
+            entries[name] = {**meta, "path": f"{directory.name}/{name}"}
+        manifest = {
+            "version": version,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "artifacts": entries,
+        }
+
+        tmp = self.root / f".{MANIFEST_NAME}.{version}"
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, self.root / MANIFEST_NAME)
+        self.invalidate()
+
+        self.prune(manifest, keep_versions or load_config()["models"]["keep_versions"])
+        return version
+
+    def prune(self, manifest: dict, keep_versions: int) -> None:
+        """
+        Delete old version directories that the manifest doesn't use.
+
+        Processes still mapping files of a deleted version keep working;
+        the files go away when they are unmapped.
+        """
+        in_use = {entry["path"].split("/")[0] for entry in manifest.get("artifacts", {}).values()}
+        versions = sorted(path for path in self.root.glob("v[0-9][0-9][0-9][0-9]") if path.is_dir())
+        for path in versions[:-keep_versions] if keep_versions > 0 else versions:
+            if path.name not in in_use:
+                shutil.rmtree(path, ignore_errors=True)
+
+
+# Convenience instance
+models = ModelRegistry()
@@ -0,0 +1,68 @@
+"""Offline training of the recommender artifacts.
+
+One run builds every artifact (or a chosen subset) from the current
+catalog snapshot and meal_logs into a staging directory, then publishes
+it as a new version of models/ (see model_store.py). Running processes
+pick the new artifacts up lazily; until a first run, each service builds
+its structures in-process as before.
+"""
+
+import shutil
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from src.services.catalog import catalog, CatalogSnapshot
+from src.services.cooccurrence import cooccurrence
+from src.services.model_store import models
+from src.services.name_similarity import name_similarity
+from src.services.nutrient_similarity import density_similarity, nutrient_similarity
+from src.services.popularity import popularity
+
+# Artifact name -> function writing it to a directory and returning its manifest metadata
+TRAINERS: dict[str, Callable[[CatalogSnapshot, Path], dict]] = {
+    "name_tfidf": name_similarity.train,
+    "nutrient_knn": nutrient_similarity.train,
+    "density_knn": density_similarity.train,
+    "cooccurrence": lambda snapshot, directory: cooccurrence.train(directory),
+    "popularity": popularity.train,
+}
+
+
+def train_models(
+    names: list[str] = None,
+    keep_versions: int = None,
+    on_step: Optional[Callable[[str, dict], None]] = None
+) -> dict:
+    """
+    Train artifacts and publish them as one new version.
+
+    Args:
+        names: Artifacts to train (default: all of TRAINERS); the others
+            are carried over from the current version
+        keep_versions: Version directories to keep (default models.keep_versions)
+        on_step: Called with (artifact name, manifest metadata) after each one
+
+    Returns:
+        The new version number and the metadata of each trained artifact
+    """
+    names = names or list(TRAINERS)
+    unknown = set(names) - set(TRAINERS)
+    if unknown:
+        raise ValueError(f"Unknown artifact: {', '.join(sorted(unknown))}")
+
+    snapshot = catalog.get()
+    staging = models.stage()
+    try:
+        artifacts = {}
+        for name in names:
+            start = time.perf_counter()
+            meta = TRAINERS[name](snapshot, staging / name)
+            artifacts[name] = {**meta, "seconds": round(time.perf_counter() - start, 2)}
+            if on_step:
+                on_step(name, artifacts[name])
+        version = models.publish(staging, artifacts, keep_versions)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return {"version": version, "artifacts": artifacts}
@@ -0,0 +1,287 @@
+"""Food-name similarity from character n-gram TF-IDF vectors.
+
+Names are vectorized with scikit-learn's char_wb analyzer, so "Greek Yogurt,
+Plain" and "Plain greek yoghurt" score as close matches despite word order
+and spelling differences. The training pipeline saves the fitted matrix
+and vocabulary as the "name_tfidf" artifact (raw CSR arrays, memory-mapped
+on load), so a process starts by extending the trained model instead of
+refitting it.
+"""
+
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from src.services.catalog import catalog, CatalogIndex, CatalogSnapshot
+from src.services.model_store import csr_arrays, csr_from_arrays, load_arrays, save_arrays
+from src.utils import load_config
+
+
+def _make_vectorizer(ngram_range: tuple[int, int], min_df: int = 1) -> TfidfVectorizer:
+    return TfidfVectorizer(
+        analyzer="char_wb",
+        ngram_range=ngram_range,
+        min_df=min_df,
+        sublinear_tf=True,
+        dtype=np.float32,
+    )
+
+
+class NameVectors:
+    """
+    L2-normalized TF-IDF vectors for food names, with top-k cosine queries.
+
+    Fitted vectors are stored transposed, as one posting row per n-gram,
+    so a query only touches the n-grams it contains. Foods appended after
+    the fit are kept row-wise in a small tail matrix until the next refit.
+    """
+
+    def __init__(
+        self,
+        vectorizer: TfidfVectorizer,
+        postings: sp.csr_matrix,
+        food_ids: np.ndarray,
+        catalog_version: int,
+        tail: sp.csr_matrix = None
+    ):
+        self.vectorizer = vectorizer
+        self.postings = postings
+        self.food_ids = food_ids
+        self.catalog_version = catalog_version
+        self.tail = tail if tail is not None else sp.csr_matrix(
+            (0, postings.shape[0]), dtype=np.float32
+        )
+
+    @classmethod
+    def fit(
+        cls,
+        food_ids,
+        names: list[str],
+        catalog_version: int = 0,
+        ngram_range: tuple[int, int] = (2, 4),
+        min_df: int = 1
+    ) -> "NameVectors":
+        """Fit the vocabulary and IDF weights on the given names."""
+        vectorizer = _make_vectorizer(ngram_range, min_df)
+        matrix = vectorizer.fit_transform(names)
+        return cls(
+            vectorizer=vectorizer,
+            postings=matrix.T.tocsr(),
+            food_ids=np.asarray(food_ids, dtype=np.int64),
+            catalog_version=catalog_version,
+        )
+
+    def __len__(self) -> int:
+        return len(self.food_ids)
+
+    @property
+    def fitted_rows(self) -> int:
+        return self.postings.shape[1]
+
+    @property
+    def stale_rows(self) -> int:
+        """Rows appended since the vocabulary and IDF weights were fitted."""
+        return self.tail.shape[0]
+
+    def extend(self, food_ids, names: list[str], catalog_version: int) -> None:
+        """
+        Append names using the fitted vocabulary.
+
+        N-grams unseen at fit time are ignored until the next refit, so
+        appended rows are slightly less precise than fitted ones.
+        """
+        if len(names):
+            self.tail = sp.vstack([self.tail, self.vectorizer.transform(names)], format="csr")
+            self.food_ids = np.concatenate(
+                [self.food_ids, np.asarray(food_ids, dtype=np.int64)]
+            )
+        self.catalog_version = catalog_version
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def scores(self, vector: sp.csr_matrix) -> np.ndarray:
+        """Cosine similarity of one query vector against every row."""
+        fitted = vector.data @ self.postings[vector.indices]
+        if not self.stale_rows:
+            return fitted
+        appended = np.asarray((self.tail @ vector.T).todense()).ravel()
+        return np.concatenate([fitted, appended])
+
+    def similar_to_name(
+        self,
+        name: str,
+        k: int = 10,
+        min_score: float = 0.0,
+        exclude_ids: list[int] = None
+    ) -> list[tuple[int, float]]:
+        """
+        Foods whose names look most like the given text.
+
+        Returns:
+            (food_id, score) pairs, best first, ties broken by food_id
+        """
+        vector = self.vectorizer.transform([name])
+        if vector.nnz == 0 or len(self) == 0:
+            return []
+
+        scores = self.scores(vector)
+        if exclude_ids:
+            scores[np.isin(self.food_ids, np.asarray(exclude_ids, dtype=np.int64))] = 0.0
+
+        rows = np.flatnonzero(scores > min_score)
+        if len(rows) > k:
+            part = np.argpartition(-scores[rows], k - 1)
+            cutoff = scores[rows[part[k - 1]]]
+            rows = rows[scores[rows] >= cutoff]
+
+        order = np.lexsort((self.food_ids[rows], -scores[rows]))[:k]
+        return [(int(self.food_ids[r]), float(scores[r])) for r in rows[order]]
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, directory: Path) -> None:
+        """
+        Write the fitted vectors, replacing any previous copy. Appended
+        tail rows are not saved; load() callers re-append them.
+        """
+        vocabulary = sorted(self.vectorizer.vocabulary_, key=self.vectorizer.vocabulary_.get)
+        save_arrays(
+            directory,
+            {
+                **csr_arrays("postings", self.postings),
+                "food_ids": self.food_ids[:self.fitted_rows],
+                "idf": self.vectorizer.idf_.astype(np.float32),
+                "vocabulary": np.array(vocabulary, dtype=str),
+            },
+            {
+                "catalog_version": self.catalog_version,
+                "shape": list(self.postings.shape),
+                "ngram_range": list(self.vectorizer.ngram_range),
+                "min_df": self.vectorizer.min_df,
+            },
+        )
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional["NameVectors"]:
+        """Memory-map a saved model; None if there is none."""
+        saved = load_arrays(directory)
+        if saved is None:
+            return None
+        arrays, meta = saved
+
+        vectorizer = _make_vectorizer(tuple(meta["ngram_range"]), meta["min_df"])
+        vectorizer.vocabulary_ = {term: i for i, term in enumerate(arrays["vocabulary"].tolist())}
+        vectorizer.idf_ = np.asarray(arrays["idf"])
+
+        return cls(
+            vectorizer=vectorizer,
+            postings=csr_from_arrays("postings", arrays, meta["shape"]),
+            food_ids=np.asarray(arrays["food_ids"]),
+            catalog_version=meta["catalog_version"],
+        )
+
+
+class FoodNameSimilarity(CatalogIndex):
+    """
+    Process-wide name vectors kept in step with the catalog snapshot.
+
+    Starts from the trained "name_tfidf" artifact when there is one. New
+    foods are appended with the existing vocabulary; once
+    name_similarity.refit_growth of the rows are newer than the last fit, a
+    full refit runs on a background thread and is swapped in when done.
+    """
+
+    artifact = "name_tfidf"
+
+    def __init__(self):
+        super().__init__()
+        self._refit_thread: Optional[threading.Thread] = None
+
+    def build(self, snapshot: CatalogSnapshot) -> NameVectors:
+        return self._fit(snapshot)
+
+    def load(self, directory: Path) -> Optional[tuple[NameVectors, int, np.ndarray]]:
+        vectors = NameVectors.load(directory)
+        if vectors is None:
+            return None
+        return vectors, vectors.catalog_version, vectors.food_ids
+
+    def train(self, snapshot: CatalogSnapshot, directory: Path) -> dict:
+        """Fit on a snapshot and save as an artifact; returns manifest metadata."""
+        vectors = self._fit(snapshot)
+        vectors.save(directory)
+        return {"catalog_version": snapshot.version, "rows": len(vectors), "terms": vectors.postings.shape[0]}
+
+    def extend(self, index: NameVectors, snapshot: CatalogSnapshot, rows: np.ndarray) -> bool:
+        index.extend(
+            snapshot.food_ids[rows],
+            [snapshot.names[row] for row in rows],
+            snapshot.version,
+        )
+        if index.stale_rows > load_config()["name_similarity"]["refit_growth"] * max(index.fitted_rows, 1):
+            self.refit_async()
+        return True
+
+    def _fit(self, snapshot: CatalogSnapshot) -> NameVectors:
+        config = load_config()["name_similarity"]
+        return NameVectors.fit(
+            snapshot.food_ids,
+            snapshot.names,
+            catalog_version=snapshot.version,
+            ngram_range=(config["ngram_min"], config["ngram_max"]),
+            min_df=config["min_df"],
+        )
+
+    def refit(self) -> NameVectors:
+        """Refit on the current snapshot and swap it in."""
+        snapshot = catalog.get()
+        vectors = self._fit(snapshot)
+
+        with self._lock:
+            # Don't replace an index that already covers a newer catalog
+            if self._version is None or snapshot.version >= self._version:
+                self._index = vectors
+                self._version = snapshot.version
+                self._food_ids = snapshot.food_ids
+        return vectors
+
+    def refit_async(self) -> None:
+        """Start a background refit unless one is already running."""
+        with self._lock:
+            if self._refit_thread is not None and self._refit_thread.is_alive():
+                return
+            self._refit_thread = threading.Thread(
+                target=self.refit, name="name-similarity-refit", daemon=True
+            )
+            self._refit_thread.start()
+
+    def similar_to_name(self, name: str, k: int = 10) -> list[tuple[int, float]]:
+        """(food_id, score) pairs for foods named like the given string."""
+        min_score = load_config()["name_similarity"]["min_score"]
+        index = self.get()
+        with self._lock:
+            return index.similar_to_name(name, k, min_score)
+
+    def similar_to_food(self, food_id: int, k: int = 10) -> list[tuple[int, float]]:
+        """(food_id, score) pairs for foods named like the given food."""
+        snapshot = catalog.get()
+        row = snapshot.row_for_id(food_id)
+        if row < 0:
+            return []
+
+        min_score = load_config()["name_similarity"]["min_score"]
+        index = self.get()
+        with self._lock:
+            return index.similar_to_name(snapshot.names[row], k, min_score, exclude_ids=[food_id])
+
+
+# Convenience instance
+name_similarity = FoodNameSimilarity()
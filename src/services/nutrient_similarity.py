@@ -0,0 +1,256 @@
+"""Nearest-neighbour search over food nutrient profiles.
+
+Each food is a point of its calories, macros and fiber, scaled to unit
+variance so no nutrient dominates the distance. Points go into a
+scikit-learn KD-tree, so "foods like this one" is a k-nearest-neighbour
+query ranked by distance instead of a range filter. Profiles can also be
+taken per 100 kcal, which matches foods by composition rather than by
+serving size.
+
+The training pipeline saves fitted trees as the "nutrient_knn" and
+"density_knn" artifacts, which processes memory-map instead of building.
+"""
+
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from sklearn.neighbors import KDTree
+
+from src.services.catalog import catalog, CatalogIndex, CatalogSnapshot, NUTRIENT_INDEX
+from src.services.constraints import DietaryConstraints
+from src.services.model_store import load_arrays, load_object, save_arrays, save_object
+from src.utils import load_config
+
+# Nutrients compared, in feature order
+FEATURE_COLUMNS = ("calories", "protein_g", "carbs_g", "fat_g", "fiber_g")
+
+
+def nutrient_features(nutrients: np.ndarray, per_100kcal: bool = False) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Feature vectors for rows of a snapshot nutrient matrix.
+
+    Args:
+        nutrients: (n, len(NUTRIENT_COLUMNS)) snapshot nutrients
+        per_100kcal: Express nutrients per 100 kcal (calories then drop out)
+
+    Returns:
+        (features, valid) where valid marks rows that have a profile; foods
+        without calories have none per 100 kcal
+    """
+    columns = [NUTRIENT_INDEX[c] for c in FEATURE_COLUMNS]
+    features = np.asarray(nutrients[:, columns], dtype=np.float64)
+    if not per_100kcal:
+        return features, np.ones(len(features), dtype=bool)
+
+    calories = features[:, 0]
+    valid = calories > 0
+    per_kcal = features[:, 1:] / np.where(valid, calories, 1.0)[:, None] * 100
+    return per_kcal, valid
+
+
+class NutrientNeighbors:
+    """KD-tree over scaled nutrient profiles of a fixed set of foods."""
+
+    def __init__(
+        self,
+        tree: KDTree,
+        food_ids: np.ndarray,
+        scale: np.ndarray,
+        per_100kcal: bool,
+        catalog_version: int = 0
+    ):
+        self.tree = tree
+        self.food_ids = food_ids
+        self.scale = scale
+        self.per_100kcal = per_100kcal
+        self.catalog_version = catalog_version
+
+    @classmethod
+    def fit(
+        cls,
+        food_ids: np.ndarray,
+        nutrients: np.ndarray,
+        per_100kcal: bool = False,
+        leaf_size: int = 40,
+        catalog_version: int = 0
+    ) -> "NutrientNeighbors":
+        """Build the tree from snapshot nutrient rows."""
+        features, valid = nutrient_features(nutrients, per_100kcal)
+        features = features[valid]
+        scale = features.std(axis=0) if len(features) else np.ones(features.shape[1])
+        scale[scale == 0] = 1.0
+        return cls(
+            tree=KDTree(features / scale, leaf_size=leaf_size),
+            food_ids=np.asarray(food_ids, dtype=np.int64)[valid],
+            scale=scale,
+            per_100kcal=per_100kcal,
+            catalog_version=catalog_version,
+        )
+
+    def __len__(self) -> int:
+        return len(self.food_ids)
+
+    def query(
+        self,
+        nutrients: np.ndarray,
+        k: int = 10,
+        exclude_ids: list[int] = ()
+    ) -> list[tuple[int, float]]:
+        """
+        Foods nearest to one nutrient row.
+
+        Args:
+            nutrients: One row of snapshot nutrients
+            k: Neighbours to return
+            exclude_ids: Foods never returned (e.g. the reference food)
+
+        Returns:
+            (food_id, distance) pairs, nearest first, ties broken by food_id
+        """
+        features, valid = nutrient_features(np.asarray(nutrients)[None, :], self.per_100kcal)
+        if not valid[0] or len(self) == 0:
+            return []
+
+        fetch = min(k + len(exclude_ids), len(self))
+        distances, rows = self.tree.query(features / self.scale, k=fetch)
+        distances, rows = distances[0], rows[0]
+        food_ids = self.food_ids[rows]
+
+        keep = ~np.isin(food_ids, np.asarray(exclude_ids, dtype=np.int64))
+        food_ids, distances = food_ids[keep], distances[keep]
+        order = np.lexsort((food_ids, distances))[:k]
+        return [(int(food_ids[i]), float(distances[i])) for i in order]
+
+    def save(self, directory: Path) -> None:
+        """Write the tree (joblib) and its food_ids and scale (.npy)."""
+        save_arrays(
+            directory,
+            {"food_ids": self.food_ids, "scale": self.scale},
+            {"per_100kcal": self.per_100kcal, "catalog_version": self.catalog_version},
+        )
+        save_object(Path(directory) / "tree.joblib", self.tree)
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional["NutrientNeighbors"]:
+        """Memory-map a saved tree; None if there is none."""
+        saved = load_arrays(directory)
+        if saved is None:
+            return None
+        arrays, meta = saved
+        return cls(
+            tree=load_object(Path(directory) / "tree.joblib"),
+            food_ids=arrays["food_ids"],
+            scale=np.asarray(arrays["scale"]),
+            per_100kcal=meta["per_100kcal"],
+            catalog_version=meta["catalog_version"],
+        )
+
+
+class FoodNutrientSimilarity(CatalogIndex):
+    """
+    Process-wide nutrient KD-tree kept in step with the catalog snapshot.
+
+    The first query builds the tree. After a catalog change the previous
+    tree keeps answering while a new one is built on a background thread
+    and swapped in; reference foods are always read from the current
+    snapshot, so new foods can be looked up before the rebuild lands. A
+    trained artifact, when there is one, is the first tree served.
+    """
+
+    def __init__(self, per_100kcal: bool = False):
+        super().__init__()
+        self.per_100kcal = per_100kcal
+        self.artifact = "density_knn" if per_100kcal else "nutrient_knn"
+        self._rebuild_thread: Optional[threading.Thread] = None
+
+    def build(self, snapshot: CatalogSnapshot) -> NutrientNeighbors:
+        return NutrientNeighbors.fit(
+            snapshot.food_ids,
+            snapshot.nutrients,
+            per_100kcal=self.per_100kcal,
+            leaf_size=load_config()["nutrient_similarity"]["leaf_size"],
+            catalog_version=snapshot.version,
+        )
+
+    def load(self, directory: Path) -> Optional[tuple[NutrientNeighbors, int, np.ndarray]]:
+        neighbors = NutrientNeighbors.load(directory)
+        if neighbors is None:
+            return None
+        return neighbors, neighbors.catalog_version, neighbors.food_ids
+
+    def train(self, snapshot: CatalogSnapshot, directory: Path) -> dict:
+        """Build a tree from a snapshot and save it as an artifact; returns manifest metadata."""
+        neighbors = self.build(snapshot)
+        neighbors.save(directory)
+        return {"catalog_version": snapshot.version, "rows": len(neighbors)}
+
+    def get(self) -> NutrientNeighbors:
+        """Current tree, or the previous one while a rebuild is running."""
+        self.load_trained()
+        snapshot = catalog.get()
+        index = self._index
+        if index is not None and self._version != snapshot.version:
+            self.rebuild_async()
+            return index
+        return super().get()
+
+    def rebuild(self) -> NutrientNeighbors:
+        """Build a tree for the current snapshot and swap it in."""
+        snapshot = catalog.get()
+        index = self.build(snapshot)
+        with self._lock:
+            # Don't replace a tree that already covers a newer catalog
+            if self._version is None or snapshot.version >= self._version:
+                self._index = index
+                self._version = snapshot.version
+                self._food_ids = snapshot.food_ids
+        return index
+
+    def rebuild_async(self) -> None:
+        """Start a background rebuild unless one is already running."""
+        with self._lock:
+            if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+                return
+            self._rebuild_thread = threading.Thread(
+                target=self.rebuild, name="nutrient-similarity-rebuild", daemon=True
+            )
+            self._rebuild_thread.start()
+
+    def similar_to_food(
+        self,
+        food_id: int,
+        k: int = 10,
+        constraints: DietaryConstraints = None
+    ) -> list[tuple[int, float]]:
+        """
+        (food_id, distance) pairs for the foods nearest to the given food.
+
+        Foods the constraints rule out (or that left the catalog since the
+        tree was built) are skipped, widening the search until k are found.
+        """
+        snapshot = catalog.get()
+        row = snapshot.row_for_id(food_id)
+        if row < 0:
+            return []
+
+        index = self.get()
+        fetch = k
+        while True:
+            pairs = index.query(snapshot.nutrients[row], fetch, exclude_ids=[food_id])
+            food_ids = [i for i, _ in pairs]
+            rows = snapshot.rows_for_ids(food_ids)
+            allowed = set(constraints.filter_ids(snapshot, food_ids)) if constraints else None
+            matches = [
+                pair for pair, r in zip(pairs, rows)
+                if r >= 0 and (allowed is None or pair[0] in allowed)
+            ]
+            if len(matches) >= k or len(pairs) < fetch:
+                return matches[:k]
+            fetch *= 4
+
+
+# Convenience instances: per serving, and per 100 kcal
+nutrient_similarity = FoodNutrientSimilarity()
+density_similarity = FoodNutrientSimilarity(per_100kcal=True)
@@ -0,0 +1,227 @@
+"""Nightly precomputation of every user's week plan.
+
+Users are split into contiguous user_id ranges. For each range the parent
+reads the users' stored targets and the plan keys already in meal_plans;
+users whose key is already stored, with all of its foods still in the
+catalog, are skipped (a newer catalog version alone doesn't re-plan). The
+rest are planned in worker processes that map one shared copy of the
+catalog snapshot, and each range's plans are written back with one bulk
+insert under the same key plan_cache uses, so the Meal Planner page finds
+them through PlanCache.get_stored_plan().
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Optional
+
+from sqlalchemy import insert, tuple_
+
+from src.db.postgres_client import db, Food, MealPlan, User
+from src.services.catalog import catalog, CatalogSnapshot
+from src.services.constraints import UNCONSTRAINED
+from src.services.meal_planner import MealPlanner
+from src.services.plan_cache import plan_cache, PlanKey, prune_stored_plans
+from src.services.plan_search import SharedSnapshot, _init_worker, _worker
+from src.services.summary_backfill import plan_partitions
+from src.utils import load_config
+
+# Batch plans are the first variant of a full week
+BATCH_SEED = 0
+BATCH_DAYS = 7
+
+def plan_users(
+    keys: list[tuple[int, PlanKey]],
+    snapshot: CatalogSnapshot = None,
+    planner: MealPlanner = None
+) -> list[tuple[int, list[dict]]]:
+    """
+    Generate the plan for each (user_id, key) pair.
+
+    Runs in a worker (using its shared snapshot) or, with an explicit
+    snapshot and planner, in-process.
+
+    Returns:
+        (user_id, day plans) pairs
+    """
+    snapshot = snapshot or _worker["snapshot"]
+    planner = planner or _worker["planner"]
+    pool = planner.build_pool(UNCONSTRAINED, snapshot=snapshot)
+    return [
+        (user_id, planner.generate_plan(key.days, key.seed, **key.targets, pool=pool))
+        for user_id, key in keys
+    ]
+
+
+def stale_users(
+    low: int,
+    high: int,
+    snapshot: CatalogSnapshot,
+    force: bool = False
+) -> tuple[list[tuple[int, PlanKey]], int]:
+    """
+    Users in [low, high] without a usable stored plan for their current
+    key: none stored, or one referencing a food no longer in the catalog
+    (every user in the range when force is set).
+
+    Returns:
+        ((user_id, key) pairs to plan, users skipped as up to date)
+    """
+    defaults = load_config()["nutrition"]
+    session = db.get_session()
+    try:
+        users = (
+            session.query(
+                User.user_id,
+                User.calorie_target,
+                User.protein_target,
+                User.carb_target,
+                User.fat_target,
+            )
+            .filter(User.user_id.between(low, high))
+            .all()
+        )
+        keys = {
+            user.user_id: plan_cache.make_key(
+                snapshot,
+                seed=BATCH_SEED,
+                days=BATCH_DAYS,
+                calorie_target=user.calorie_target or defaults["default_calorie_target"],
+                protein_target=user.protein_target or defaults["default_protein_target"],
+                carb_target=user.carb_target or defaults["default_carb_target"],
+                fat_target=user.fat_target or defaults["default_fat_target"],
+            )
+            for user in users
+        }
+        digests = {user_id: key.digest() for user_id, key in keys.items()}
+        if force:
+            return list(keys.items()), 0
+        current = (
+            session.query(MealPlan.user_id, MealPlan.plan_key)
+            .filter(
+                MealPlan.user_id.between(low, high),
+                MealPlan.plan_key.in_(set(digests.values())),
+            )
+            .distinct()
+        )
+        broken = current.outerjoin(Food, Food.food_id == MealPlan.food_id).filter(Food.food_id.is_(None))
+        stored = set(current.all()) - set(broken.all())
+    finally:
+        session.close()
+
+    stale = [
+        (user_id, key) for user_id, key in keys.items()
+        if (user_id, digests[user_id]) not in stored
+    ]
+    return stale, len(keys) - len(stale)
+
+
+def write_plans(plans: list[tuple[int, PlanKey, list[dict]]]) -> int:
+    """
+    Store each user's plan under its key in one transaction.
+
+    Rows already stored for the same (user, key) are replaced. A user's
+    plans under other keys (e.g. ones PlanCache saved for other seeds or
+    targets) are kept, up to plan_cache.stored_per_user keys per user.
+
+    Returns:
+        Number of meal_plans rows written
+    """
+    if not plans:
+        return 0
+    stored = [(user_id, key.digest()) for user_id, key, _ in plans]
+    rows = [
+        {
+            "user_id": user_id,
+            "day_of_week": day_plan.get("day", 0),
+            "meal_type": meal["meal_type"],
+            "food_id": item["food_id"],
+            "servings": item["servings"],
+            "plan_key": key.digest(),
+            "catalog_version": key.catalog_version,
+        }
+        for user_id, key, plan in plans
+        for day_plan in plan
+        for meal in day_plan["meals"]
+        for item in meal["foods"]
+    ]
+
+    session = db.get_session()
+    try:
+        session.query(MealPlan).filter(
+            tuple_(MealPlan.user_id, MealPlan.plan_key).in_(stored)
+        ).delete(synchronize_session=False)
+        if rows:
+            session.execute(insert(MealPlan), rows)
+        prune_stored_plans(session, [user_id for user_id, _ in stored], plan_cache.stored_per_user)
+        session.commit()
+        return len(rows)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def run_batch(
+    workers: int = 4,
+    chunk_size: int = 500,
+    force: bool = False,
+    on_start: Optional[Callable[[int], None]] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None
+) -> dict:
+    """
+    Precompute and store the week plan of every user.
+
+    Args:
+        workers: Worker processes (1 runs in-process)
+        chunk_size: Users per partition
+        force: Re-plan users whose stored plan is already current
+        on_start: Called with the number of partitions
+        on_progress: Called with (users planned, users skipped) per partition
+
+    Returns:
+        Counts of users planned and skipped, and rows written
+    """
+    snapshot = catalog.get()
+    mode = plan_cache.default_mode
+    partitions = plan_partitions(chunk_size)
+    if on_start:
+        on_start(len(partitions))
+
+    stats = {"planned": 0, "skipped": 0, "rows": 0}
+    chunks = []
+    for low, high in partitions:
+        chunks.append(stale_users(low, high, snapshot, force))
+
+    def _done(keys: list[tuple[int, PlanKey]], plans: list[tuple[int, list[dict]]], skipped: int) -> None:
+        key_for = dict(keys)
+        stats["rows"] += write_plans([(user_id, key_for[user_id], plan) for user_id, plan in plans])
+        stats["planned"] += len(plans)
+        stats["skipped"] += skipped
+        if on_progress:
+            on_progress(len(plans), skipped)
+
+    if workers <= 1:
+        planner = MealPlanner(mode=mode)
+        for keys, skipped in chunks:
+            _done(keys, plan_users(keys, snapshot, planner) if keys else [], skipped)
+        return stats
+
+    shared = SharedSnapshot(snapshot)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(shared.spec, snapshot.version, snapshot.categories, len(snapshot), mode),
+        ) as pool:
+            futures = {}
+            for keys, skipped in chunks:
+                if keys:
+                    futures[pool.submit(plan_users, keys)] = (keys, skipped)
+                else:
+                    _done(keys, [], skipped)
+            for future in as_completed(futures):
+                keys, skipped = futures[future]
+                _done(keys, future.result(), skipped)
+    finally:
+        shared.close()
+    return stats
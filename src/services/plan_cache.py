@@ -0,0 +1,376 @@
+"""Cache of generated meal plans.
+
+A plan is reproducible from its targets, preferences, seed and the catalog
+version, so identical requests (and paging back and forth between seeds)
+can be answered without planning again. Plans live in a per-process LRU
+and, for known users, in the meal_plans table so they survive restarts.
+
+Stored plans are filed under a digest of everything but the catalog
+version, which is kept next to the rows instead: catalog writes (a USDA
+food saved by a search, a seed load) don't orphan them, and a stored plan
+is only planned again once one of its foods is gone from the catalog.
+Each user keeps at most plan_cache.stored_per_user stored plans; saving
+one prunes that user's least recently saved keys beyond it.
+"""
+
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session
+
+from src.db.postgres_client import db, MealPlan
+from src.services.catalog import catalog, CatalogSnapshot
+from src.services.constraints import DietaryConstraints, UNCONSTRAINED
+from src.services.food_service import food_service
+from src.services.meal_planner import MealPlanner
+from src.services.plan_search import plan_search
+from src.utils import load_config
+
+
+class PlanKey(NamedTuple):
+    """Everything that determines a generated plan."""
+    calorie_target: int
+    protein_target: int
+    carb_target: int
+    fat_target: int
+    constraints: DietaryConstraints
+    seed: int
+    catalog_version: int
+    days: int
+    mode: str
+    best_of: int
+
+    def digest(self) -> str:
+        """Stable 64-character id used as meal_plans.plan_key (all but catalog_version)."""
+        return hashlib.sha256(repr(tuple(self._replace(catalog_version=None))).encode()).hexdigest()
+
+    @property
+    def targets(self) -> dict:
+        return {
+            "calorie_target": self.calorie_target,
+            "protein_target": self.protein_target,
+            "carb_target": self.carb_target,
+            "fat_target": self.fat_target,
+        }
+
+
+def prune_stored_plans(session: Session, user_ids: Iterable[int], keep: int) -> int:
+    """
+    Delete each user's stored plans beyond the keep most recently saved keys.
+
+    Runs in the caller's transaction; nothing is committed here.
+
+    Returns:
+        Number of meal_plans rows deleted
+    """
+    saved = (
+        session.query(MealPlan.user_id, MealPlan.plan_key, func.max(MealPlan.plan_id).label("last_id"))
+        .filter(MealPlan.user_id.in_(set(user_ids)), MealPlan.plan_key.isnot(None))
+        .group_by(MealPlan.user_id, MealPlan.plan_key)
+        .all()
+    )
+    by_user: dict[int, list] = {}
+    for row in saved:
+        by_user.setdefault(row.user_id, []).append(row)
+
+    stale = [
+        (row.user_id, row.plan_key)
+        for rows in by_user.values()
+        for row in sorted(rows, key=lambda row: row.last_id, reverse=True)[keep:]
+    ]
+    if not stale:
+        return 0
+    return session.query(MealPlan).filter(
+        tuple_(MealPlan.user_id, MealPlan.plan_key).in_(stale)
+    ).delete(synchronize_session=False)
+
+
+class PlanCache:
+    """LRU cache of plans with optional persistence to meal_plans."""
+
+    def __init__(self, max_entries: int = None, persist: bool = None):
+        config = load_config()
+        self.max_entries = max_entries or config["plan_cache"]["max_entries"]
+        self.persist = config["plan_cache"]["persist"] if persist is None else persist
+        self.stored_per_user = config["plan_cache"]["stored_per_user"]
+        self.default_mode = config["meal_planner"]["mode"]
+        self._plans: OrderedDict[PlanKey, list[dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def get(self, key: PlanKey) -> Optional[list[dict]]:
+        """Cached plan for a key (a copy the caller may modify), or None."""
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is None:
+                return None
+            self._plans.move_to_end(key)
+        return copy.deepcopy(plan)
+
+    def put(self, key: PlanKey, plan: list[dict]) -> None:
+        """Store a plan, evicting the least recently used beyond max_entries."""
+        with self._lock:
+            self._plans[key] = copy.deepcopy(plan)
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+
+    def make_key(
+        self,
+        snapshot: CatalogSnapshot,
+        seed: int = 0,
+        days: int = 1,
+        mode: str = None,
+        best_of: int = 1,
+        calorie_target: int = 2000,
+        protein_target: int = 150,
+        carb_target: int = 200,
+        fat_target: int = 65,
+        constraints: DietaryConstraints = UNCONSTRAINED
+    ) -> PlanKey:
+        """Key of the plan these inputs produce against a catalog snapshot."""
+        return PlanKey(
+            calorie_target=int(calorie_target),
+            protein_target=int(protein_target),
+            carb_target=int(carb_target),
+            fat_target=int(fat_target),
+            constraints=constraints,
+            seed=int(seed),
+            catalog_version=snapshot.version,
+            days=int(days),
+            mode=mode or self.default_mode,
+            best_of=int(best_of),
+        )
+
+    def get_stored_plan(
+        self,
+        user_id: int,
+        seed: int = 0,
+        days: int = 7,
+        calorie_target: int = 2000,
+        protein_target: int = 150,
+        carb_target: int = 200,
+        fat_target: int = 65,
+        constraints: DietaryConstraints = UNCONSTRAINED
+    ) -> Optional[list[dict]]:
+        """
+        A plan already cached or persisted for these inputs, or None.
+
+        Never generates; this is how pages pick up the week plans written
+        by the nightly batch (see plan_batch.py), including ones built
+        against an older catalog version.
+        """
+        snapshot = catalog.get()
+        key = self.make_key(
+            snapshot, seed, days,
+            calorie_target=calorie_target,
+            protein_target=protein_target,
+            carb_target=carb_target,
+            fat_target=fat_target,
+            constraints=constraints,
+        )
+        return self._lookup(user_id, key)
+
+    def _lookup(self, user_id: Optional[int], key: PlanKey) -> Optional[list[dict]]:
+        """Plan from memory, else from meal_plans (and then kept in memory)."""
+        plan = self.get(key)
+        if plan is None and self.persist and user_id is not None:
+            plan = self._load(user_id, key)
+            if plan is not None:
+                self.put(key, plan)
+        return plan
+
+    def get_plan(
+        self,
+        user_id: int = None,
+        seed: int = 0,
+        days: int = 1,
+        mode: str = None,
+        best_of: int = 1,
+        calorie_target: int = 2000,
+        protein_target: int = 150,
+        carb_target: int = 200,
+        fat_target: int = 65,
+        vegetarian: bool = False,
+        high_protein: bool = False,
+        low_carb: bool = False,
+        constraints: DietaryConstraints = None
+    ) -> list[dict]:
+        """
+        Return the plan for these inputs, generating it only on a miss.
+
+        Args:
+            user_id: Owner for persisted plans (memory-only if omitted)
+            seed: Plan variant; page through alternatives by changing it
+            days: Days per plan (1 for a day plan, 7 for a week)
+            mode: MealPlanner mode (default meal_planner.mode)
+            best_of: Candidates compared via plan_search (1 = single plan)
+            constraints: Allowed foods (default: built from the diet flags)
+
+        Returns:
+            List of day plans, as from MealPlanner.generate_plan()
+        """
+        return list(self.iter_plan(
+            user_id, seed, days, mode, best_of,
+            calorie_target, protein_target, carb_target, fat_target,
+            vegetarian, high_protein, low_carb, constraints,
+        ))
+
+    def iter_plan(
+        self,
+        user_id: int = None,
+        seed: int = 0,
+        days: int = 1,
+        mode: str = None,
+        best_of: int = 1,
+        calorie_target: int = 2000,
+        protein_target: int = 150,
+        carb_target: int = 200,
+        fat_target: int = 65,
+        vegetarian: bool = False,
+        high_protein: bool = False,
+        low_carb: bool = False,
+        constraints: DietaryConstraints = None
+    ) -> Iterator[dict]:
+        """
+        Like get_plan(), but yields day plans as they become available.
+
+        On a miss each day is yielded as soon as it is planned (best-of-N
+        plans arrive all at once), and the plan is cached after its last
+        day; a plan abandoned part way is not cached.
+        """
+        snapshot = catalog.get()
+        key = self.make_key(
+            snapshot, seed, days, mode, best_of,
+            calorie_target=calorie_target,
+            protein_target=protein_target,
+            carb_target=carb_target,
+            fat_target=fat_target,
+            constraints=DietaryConstraints.resolve(constraints, vegetarian, high_protein, low_carb),
+        )
+
+        plan = self._lookup(user_id, key)
+        if plan is not None:
+            self.hits += 1
+            yield from plan
+            return
+        self.misses += 1
+
+        plan = []
+        for day_plan in self._generate(key, snapshot):
+            plan.append(day_plan)
+            yield copy.deepcopy(day_plan)
+
+        if self.persist and user_id is not None and plan:
+            self._save(user_id, key, plan)
+        self.put(key, plan)
+
+    def _generate(self, key: PlanKey, snapshot: CatalogSnapshot) -> Iterator[dict]:
+        if key.best_of > 1:
+            yield from plan_search.best_plan(
+                days=key.days,
+                candidates=key.best_of,
+                seed=key.seed,
+                mode=key.mode,
+                constraints=key.constraints,
+                **key.targets,
+            )
+            return
+
+        planner = MealPlanner(mode=key.mode)
+        pool = planner.build_pool(key.constraints, snapshot=snapshot)
+        yield from planner.iter_plan(key.days, key.seed, **key.targets, pool=pool)
+
+    def _load(self, user_id: int, key: PlanKey) -> Optional[list[dict]]:
+        """Rebuild a persisted plan from meal_plans rows, unless missing or one of its foods is gone."""
+        session = db.get_session()
+        try:
+            rows = (
+                session.query(
+                    MealPlan.day_of_week,
+                    MealPlan.meal_type,
+                    MealPlan.food_id,
+                    MealPlan.servings,
+                )
+                .filter(MealPlan.user_id == user_id, MealPlan.plan_key == key.digest())
+                .order_by(MealPlan.plan_id)
+                .all()
+            )
+        finally:
+            session.close()
+
+        if not rows:
+            return None
+        foods = food_service.get_many_by_ids([r.food_id for r in rows], view=True)
+        if None in foods:
+            return None
+
+        # Rows were written in plan order, so dicts keep day and meal order
+        days: dict[int, dict[str, list[dict]]] = {}
+        for row, food in zip(rows, foods):
+            items = days.setdefault(row.day_of_week, {}).setdefault(row.meal_type, [])
+            items.append(MealPlanner.plan_item(food, float(row.servings)))
+
+        return [
+            {
+                "meals": [MealPlanner.meal_entry(meal_type, items) for meal_type, items in meals.items()],
+                "targets": {
+                    "calories": key.calorie_target,
+                    "protein": key.protein_target,
+                    "carbs": key.carb_target,
+                    "fat": key.fat_target
+                },
+                "day": day,
+            }
+            for day, meals in days.items()
+        ]
+
+    def _save(self, user_id: int, key: PlanKey, plan: list[dict]) -> None:
+        """
+        Write a plan to meal_plans, replacing any rows under the same key and
+        pruning the user's plans beyond stored_per_user.
+        """
+        digest = key.digest()
+        session = db.get_session()
+        try:
+            session.query(MealPlan).filter(
+                MealPlan.user_id == user_id,
+                MealPlan.plan_key == digest,
+            ).delete(synchronize_session=False)
+            session.add_all([
+                MealPlan(
+                    user_id=user_id,
+                    day_of_week=day_plan.get("day", 0),
+                    meal_type=meal["meal_type"],
+                    food_id=item["food_id"],
+                    servings=item["servings"],
+                    plan_key=digest,
+                    catalog_version=key.catalog_version,
+                )
+                for day_plan in plan
+                for meal in day_plan["meals"]
+                for item in meal["foods"]
+            ])
+            prune_stored_plans(session, [user_id], self.stored_per_user)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+
+# Convenience instance
+plan_cache = PlanCache()
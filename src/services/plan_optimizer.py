@@ -0,0 +1,135 @@
+"""Meal optimizer - picks foods and servings to hit all four macro targets.
+
+Candidate foods are a NumPy matrix of per-serving macros. A beam search adds
+one (food, servings) item per step, scoring every extension of every kept
+partial meal at once, and returns the best meal seen at any size.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+# Macros scored by the optimizer, in matrix column order
+MACRO_COLUMNS = ("calories", "protein_g", "carbs_g", "fat_g")
+
+# Serving sizes the optimizer may choose (same 0.5 steps as the greedy path)
+SERVING_STEPS = np.array([0.5, 1.0, 1.5, 2.0], dtype=np.float32)
+
+# Relative importance of missing each macro target
+DEFAULT_WEIGHTS = np.array([2.0, 1.5, 1.0, 1.0], dtype=np.float32)
+
+
+def score_totals(
+    totals: np.ndarray,
+    targets: np.ndarray,
+    tolerance: float,
+    weights: np.ndarray = DEFAULT_WEIGHTS
+) -> np.ndarray:
+    """
+    Penalty for macro totals against targets; lower is better.
+
+    Relative misses inside the tolerance band cost little, misses beyond it
+    are squared. Works on any array whose last axis is the macro axis.
+    """
+    miss = np.abs(totals - targets) / np.maximum(targets, 1.0)
+    excess = np.maximum(miss - tolerance, 0.0)
+    return (weights * (excess ** 2 + 0.01 * miss ** 2)).sum(axis=-1)
+
+
+class MealChoice:
+    """Foods (as candidate rows) and servings picked for one meal."""
+
+    def __init__(self, rows: np.ndarray, servings: np.ndarray, totals: np.ndarray, score: float):
+        self.rows = rows
+        self.servings = servings
+        self.totals = totals
+        self.score = score
+
+
+class BeamSearchOptimizer:
+    """Beam search over (food, servings) items for a single meal."""
+
+    def __init__(
+        self,
+        beam_width: int = 32,
+        tolerance: float = 0.10,
+        servings: np.ndarray = SERVING_STEPS,
+        weights: np.ndarray = DEFAULT_WEIGHTS
+    ):
+        self.beam_width = beam_width
+        self.tolerance = tolerance
+        self.servings = np.asarray(servings, dtype=np.float32)
+        self.weights = np.asarray(weights, dtype=np.float32)
+
+    def optimize(
+        self,
+        nutrients: np.ndarray,
+        targets: np.ndarray,
+        max_items: int,
+        min_items: int = 1,
+        rng: np.random.Generator = None,
+        jitter: float = 0.0
+    ) -> Optional[MealChoice]:
+        """
+        Choose up to max_items distinct foods and their servings.
+
+        Args:
+            nutrients: (n_candidates, 4) per-serving macros, MACRO_COLUMNS order
+            targets: (4,) macro targets for the meal
+            max_items: Most foods in the meal
+            min_items: Fewest foods in the meal
+            rng: Source of score noise (required when jitter > 0)
+            jitter: Max random noise added to scores, so different seeds pick
+                different meals among ones that score about the same
+
+        Returns:
+            Best MealChoice, or None if there are no candidates
+        """
+        nutrients = np.asarray(nutrients, dtype=np.float32)
+        targets = np.asarray(targets, dtype=np.float32)
+        n_foods = len(nutrients)
+        if n_foods == 0:
+            return None
+
+        # Macros of every (food, servings) item: (n_foods, n_steps, 4)
+        items = nutrients[:, None, :] * self.servings[None, :, None]
+
+        # Beam state: chosen rows/step indices, totals, last row chosen.
+        # Rows are added in increasing order so each set is visited once.
+        rows = np.zeros((1, 0), dtype=np.int64)
+        steps = np.zeros((1, 0), dtype=np.int64)
+        totals = np.zeros((1, 4), dtype=np.float32)
+        last = np.full(1, -1, dtype=np.int64)
+        best: Optional[MealChoice] = None
+
+        for depth in range(1, min(max_items, n_foods) + 1):
+            # Score every extension of every beam state at once
+            candidate_totals = totals[:, None, None, :] + items[None, :, :, :]
+            scores = score_totals(candidate_totals, targets, self.tolerance, self.weights)
+            allowed = np.arange(n_foods)[None, :] > last[:, None]
+            if jitter:
+                scores = scores + rng.random(scores.shape, dtype=np.float32) * jitter
+            scores = np.where(allowed[:, :, None], scores, np.inf)
+
+            flat = scores.ravel()
+            keep = min(self.beam_width, int(np.isfinite(flat).sum()))
+            if keep == 0:
+                break
+            top = np.argpartition(flat, keep - 1)[:keep]
+            top = top[np.argsort(flat[top], kind="stable")]
+            state, food, step = np.unravel_index(top, scores.shape)
+
+            rows = np.concatenate([rows[state], food[:, None]], axis=1)
+            steps = np.concatenate([steps[state], step[:, None]], axis=1)
+            totals = candidate_totals[state, food, step]
+            last = food
+
+            if depth >= min_items and (best is None or flat[top[0]] < best.score):
+                best = MealChoice(
+                    rows=rows[0].copy(),
+                    servings=self.servings[steps[0]],
+                    totals=totals[0].copy(),
+                    score=float(flat[top[0]]),
+                )
+
+        return best
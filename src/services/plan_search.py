@@ -0,0 +1,284 @@
+"""Best-of-N meal planning across a process pool.
+
+The planner is randomized, so plan quality varies from run to run. This
+module generates several candidate plans in parallel, each from its own
+deterministic seed, scores them against the macro targets and keeps the
+best. The catalog's numeric columns are published once into shared memory
+and mapped read-only by every worker, so workers never reload the catalog.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from multiprocessing import get_all_start_methods, get_context, shared_memory
+from typing import Optional
+
+import numpy as np
+
+from src.services.catalog import catalog, CatalogSnapshot
+from src.services.constraints import DietaryConstraints
+from src.services.food_service import food_service
+from src.services.meal_planner import MealPlanner
+from src.services.plan_optimizer import score_totals
+from src.utils import load_config
+
+MACROS = ("calories", "protein", "carbs", "fat")
+
+# Snapshot columns shared with workers; text columns stay in the parent
+SHARED_COLUMNS = ("food_ids", "fdc_ids", "category_codes", "serving_sizes", "nutrients")
+
+
+def score_plan(days: list[dict]) -> float:
+    """Macro penalty summed over day plans (lower is better)."""
+    tolerance = load_config()["nutrition"]["target_tolerance"]
+    total = 0.0
+    for day in days:
+        targets = np.array([day["targets"][m] for m in MACROS], dtype=np.float32)
+        totals = np.array(
+            [sum(meal[m] for meal in day["meals"]) for m in MACROS], dtype=np.float32
+        )
+        total += float(score_totals(totals, targets, tolerance))
+    return total
+
+
+class SharedSnapshot:
+    """Numeric snapshot columns copied into named shared memory blocks."""
+
+    def __init__(self, snapshot: CatalogSnapshot):
+        self.version = snapshot.version
+        self.categories = snapshot.categories
+        self.size = len(snapshot)
+        self._blocks: list[shared_memory.SharedMemory] = []
+        self.spec = {}
+
+        for column in SHARED_COLUMNS:
+            array = getattr(snapshot, column)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            self._blocks.append(block)
+            self.spec[column] = (block.name, array.shape, array.dtype.str)
+
+    def close(self) -> None:
+        """Release and remove the shared blocks."""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    @staticmethod
+    def attach(spec: dict, version: int, categories: list[str], size: int):
+        """
+        Rebuild a CatalogSnapshot in a worker from the shared blocks.
+
+        Text columns are left blank; the parent fills in names when it
+        picks the winning plan.
+        """
+        blocks, arrays = [], {}
+        for column, (name, shape, dtype) in spec.items():
+            # Workers share the parent's resource tracker, which unlinks the
+            # blocks if the parent dies without calling close()
+            block = shared_memory.SharedMemory(name=name)
+            blocks.append(block)
+            arrays[column] = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+
+        blank = [None] * size
+        snapshot = CatalogSnapshot(
+            version=version,
+            names=[""] * size,
+            brands=blank,
+            categories=categories,
+            serving_units=blank,
+            **arrays,
+        )
+        return snapshot, blocks
+
+
+# Set per worker process by _init_worker
+_worker = {}
+
+
+def _init_worker(spec: dict, version: int, categories: list[str], size: int, mode: str) -> None:
+    snapshot, blocks = SharedSnapshot.attach(spec, version, categories, size)
+    _worker.update(snapshot=snapshot, blocks=blocks, planner=MealPlanner(mode=mode))
+
+
+def _ready() -> bool:
+    return True
+
+
+def _run_candidate(
+    seed: int,
+    days: int,
+    targets: dict,
+    constraints: DietaryConstraints,
+    deadline: float
+) -> Optional[list[dict]]:
+    """Plan in a worker; gives up (None) once time.time() passes deadline, checked per day."""
+    if time.time() > deadline:
+        return None
+    planner = _worker["planner"]
+    pool = planner.build_pool(constraints, snapshot=_worker["snapshot"])
+    plan = []
+    for day_plan in planner.iter_plan(days, seed, **targets, pool=pool):
+        if time.time() > deadline:
+            return None
+        plan.append(day_plan)
+    return plan
+
+
+class PlanSearch:
+    """Process pool that generates candidate plans and keeps the best."""
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._shared: Optional[SharedSnapshot] = None
+        self._mode: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self, snapshot: CatalogSnapshot, mode: str) -> ProcessPoolExecutor:
+        """
+        Long-lived pool whose workers map the current snapshot; restarted when it changes.
+
+        Workers are started with forkserver (spawn where unavailable):
+        forking the threaded app server, with its open connections, is
+        unsafe. A new pool is warmed up before it is returned, so worker
+        start-up doesn't count against a search's time budget.
+        """
+        with self._lock:
+            if (
+                self._executor is None
+                or self._shared.version != snapshot.version
+                or self._mode != mode
+            ):
+                self.shutdown()
+                self._shared = SharedSnapshot(snapshot)
+                self._mode = mode
+                workers = load_config()["plan_search"]["workers"]
+                start_method = "forkserver" if "forkserver" in get_all_start_methods() else "spawn"
+                self._executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=get_context(start_method),
+                    initializer=_init_worker,
+                    initargs=(
+                        self._shared.spec,
+                        snapshot.version,
+                        snapshot.categories,
+                        len(snapshot),
+                        mode,
+                    ),
+                )
+                wait([self._executor.submit(_ready) for _ in range(workers)])
+            return self._executor
+
+    def shutdown(self) -> None:
+        """Stop the workers and free the shared snapshot."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        if self._shared is not None:
+            self._shared.close()
+            self._shared = None
+
+    def best_plan(
+        self,
+        days: int = 1,
+        candidates: int = None,
+        seed: int = None,
+        time_budget_s: float = None,
+        mode: str = None,
+        calorie_target: int = 2000,
+        protein_target: int = 150,
+        carb_target: int = 200,
+        fat_target: int = 65,
+        vegetarian: bool = False,
+        high_protein: bool = False,
+        low_carb: bool = False,
+        constraints: DietaryConstraints = None
+    ) -> list[dict]:
+        """
+        Generate candidate plans in parallel and return the best-scoring one.
+
+        Candidate i uses seed + i, so a given seed always yields the same
+        candidates. The time budget starts once the worker pool is up.
+        Candidates still running when it runs out are dropped (workers
+        abandon them after the day they are on) and the best finished one
+        is returned; if none has finished, one candidate is generated
+        in-process instead.
+
+        Args:
+            days: Days per plan (1 for a day plan, 7 for a week)
+            candidates: Plans to generate (default plan_search.candidates)
+            seed: Base seed (random if omitted)
+            time_budget_s: Seconds to wait (default plan_search.time_budget_s)
+            mode: MealPlanner mode for the candidates
+            constraints: Allowed foods (default: built from the diet flags)
+
+        Returns:
+            Day plans of the best candidate, as from MealPlanner
+        """
+        config = load_config()["plan_search"]
+        candidates = candidates or config["candidates"]
+        time_budget_s = time_budget_s if time_budget_s is not None else config["time_budget_s"]
+        seed = seed if seed is not None else random.getrandbits(32)
+        mode = mode or load_config()["meal_planner"]["mode"]
+        if mode not in MealPlanner.MODES:
+            raise ValueError(f"Unknown planner mode: {mode}")
+        constraints = DietaryConstraints.resolve(constraints, vegetarian, high_protein, low_carb)
+        targets = {
+            "calorie_target": calorie_target,
+            "protein_target": protein_target,
+            "carb_target": carb_target,
+            "fat_target": fat_target,
+        }
+
+        snapshot = catalog.get()
+        executor = self._get_executor(snapshot, mode)
+        deadline = time.monotonic() + time_budget_s
+        # Wall-clock copy for the workers, whose monotonic clocks may differ
+        worker_deadline = time.time() + time_budget_s
+        futures: dict[Future, int] = {
+            executor.submit(
+                _run_candidate, seed + i, days, targets, constraints, worker_deadline
+            ): i
+            for i in range(candidates)
+        }
+
+        best = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(
+                pending,
+                timeout=max(deadline - time.monotonic(), 0),
+                return_when=FIRST_COMPLETED,
+            )
+            if not done:
+                break
+            for future in done:
+                plan = future.result()
+                if plan:
+                    # Ties go to the lower candidate index for determinism
+                    key = (score_plan(plan), futures[future])
+                    if best is None or key < best[0]:
+                        best = (key, plan)
+
+        for future in pending:
+            future.cancel()
+
+        if best is None:
+            # Nothing finished in time: fall back to one in-process plan
+            planner = MealPlanner(mode=mode)
+            pool = planner.build_pool(constraints, snapshot=snapshot)
+            return planner.generate_plan(days, seed, **targets, pool=pool)
+
+        plan = best[1]
+        # Workers only know food_ids; fill in names with one batched lookup
+        items = [item for day_plan in plan for meal in day_plan["meals"] for item in meal["foods"]]
+        foods = food_service.get_many_by_ids([item["food_id"] for item in items], view=True)
+        for item, food in zip(items, foods):
+            item["name"] = food.name if food else ""
+        return plan
+
+
+# Convenience instance
+plan_search = PlanSearch()
@@ -0,0 +1,157 @@
+"""Catalog-wide food popularity.
+
+Foods are ranked by how many different users logged them in the last
+popularity.window_days, then by how many times they were logged. The
+ranking is trained offline as the "popularity" artifact; a process without
+one counts meal_logs itself, again every popularity.refresh_interval_s.
+"""
+
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import func
+
+from src.db.postgres_client import db, MealLog
+from src.services.catalog import CatalogSnapshot
+from src.services.constraints import DietaryConstraints
+from src.services.model_store import load_arrays, models, save_arrays
+from src.utils import load_config
+
+
+class PopularityModel:
+    """Food ids in popularity order, with their user and log counts."""
+
+    def __init__(self, food_ids: np.ndarray, user_counts: np.ndarray, log_counts: np.ndarray, since: str):
+        self.food_ids = food_ids
+        self.user_counts = user_counts
+        self.log_counts = log_counts
+        self.since = since
+
+    @classmethod
+    def fit(cls, snapshot: CatalogSnapshot, window_days: int) -> "PopularityModel":
+        """Count recent logs of the snapshot's foods."""
+        since = date.today() - timedelta(days=window_days)
+        session = db.get_session()
+        try:
+            rows = (
+                session.query(
+                    MealLog.food_id,
+                    func.count(func.distinct(MealLog.user_id)),
+                    func.count(MealLog.log_id),
+                )
+                .filter(MealLog.log_date >= since)
+                .group_by(MealLog.food_id)
+                .all()
+            )
+        finally:
+            session.close()
+
+        food_ids = np.array([r[0] for r in rows], dtype=np.int64)
+        user_counts = np.array([r[1] for r in rows], dtype=np.int64)
+        log_counts = np.array([r[2] for r in rows], dtype=np.int64)
+
+        # Drop foods deleted from the catalog, then rank
+        keep = snapshot.rows_for_ids(food_ids) >= 0
+        food_ids, user_counts, log_counts = food_ids[keep], user_counts[keep], log_counts[keep]
+        order = np.lexsort((food_ids, -log_counts, -user_counts))
+        return cls(food_ids[order], user_counts[order], log_counts[order], since.isoformat())
+
+    def __len__(self) -> int:
+        return len(self.food_ids)
+
+    def top(
+        self,
+        snapshot: CatalogSnapshot,
+        k: int = 10,
+        constraints: Optional[DietaryConstraints] = None
+    ) -> list[int]:
+        """The k most popular food_ids still in the snapshot and allowed by constraints."""
+        allowed = constraints.mask(snapshot) if constraints else None
+        found: list[int] = []
+        start, block = 0, max(k * 4, 64)
+        while start < len(self) and len(found) < k:
+            food_ids = self.food_ids[start:start + block]
+            rows = snapshot.rows_for_ids(food_ids)
+            keep = rows >= 0
+            if allowed is not None:
+                keep &= allowed[np.maximum(rows, 0)]
+            found.extend(food_ids[keep].tolist())
+            start += block
+            block *= 2
+        return found[:k]
+
+    def save(self, directory: Path) -> None:
+        save_arrays(
+            directory,
+            {"food_ids": self.food_ids, "user_counts": self.user_counts, "log_counts": self.log_counts},
+            {"since": self.since},
+        )
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional["PopularityModel"]:
+        """Memory-map a saved ranking; None if there is none."""
+        saved = load_arrays(directory)
+        if saved is None:
+            return None
+        arrays, meta = saved
+        return cls(arrays["food_ids"], arrays["user_counts"], arrays["log_counts"], meta["since"])
+
+
+class FoodPopularity:
+    """Process-wide popularity ranking, swapped when a new artifact is published."""
+
+    artifact = "popularity"
+
+    def __init__(self):
+        self._model: Optional[PopularityModel] = None
+        self._models_version = None
+        # When the in-process ranking was counted; None for a published one
+        self._counted_at: Optional[float] = None
+        self._lock = threading.Lock()
+        config = load_config()["popularity"]
+        self.window_days = config["window_days"]
+        self.refresh_interval_s = config["refresh_interval_s"]
+
+    def train(self, snapshot: CatalogSnapshot, directory: Path) -> dict:
+        """Rank from meal_logs and save as an artifact; returns manifest metadata."""
+        model = PopularityModel.fit(snapshot, self.window_days)
+        model.save(directory)
+        return {"catalog_version": snapshot.version, "foods": len(model), "since": model.since}
+
+    def get(self, snapshot: CatalogSnapshot) -> PopularityModel:
+        """
+        The published ranking, or one counted in-process if none is published
+        (recounted once older than refresh_interval_s).
+        """
+        with self._lock:
+            version = models.version
+            if version != self._models_version:
+                self._models_version = version
+                directory = models.path(self.artifact)
+                published = PopularityModel.load(directory) if directory else None
+                if published is not None:
+                    self._model, self._counted_at = published, None
+            if self._model is None or (
+                self._counted_at is not None
+                and time.monotonic() - self._counted_at >= self.refresh_interval_s
+            ):
+                self._model = PopularityModel.fit(snapshot, self.window_days)
+                self._counted_at = time.monotonic()
+            return self._model
+
+    def top(
+        self,
+        snapshot: CatalogSnapshot,
+        k: int = 10,
+        constraints: DietaryConstraints = None
+    ) -> list[int]:
+        """The k most popular food_ids, best first."""
+        return self.get(snapshot).top(snapshot, k, constraints)
+
+
+# Convenience instance
+popularity = FoodPopularity()
@@ -1,9 +1,37 @@
 """Food recommendation engine."""
 
 from typing import Optional
-from collections import Counter
 
-from src.db.postgres_client import db, Food, MealLog
+import numpy as np
+
+from src.db.postgres_client import db, Food
+from src.db.read_models import FoodView
+from src.services.catalog import catalog, CatalogSnapshot
+from src.services.constraints import DietaryConstraints
+from src.services.cooccurrence import cooccurrence
+from src.services import favorites
+from src.services.food_service import food_service
+from src.services.name_similarity import name_similarity
+from src.services.nutrient_similarity import density_similarity, nutrient_similarity
+from src.services.popularity import popularity
+from src.services.suggestion_index import suggestion_rankings, SuggestionRankings
+
+# Foods per meal suggestion list
+SUGGESTION_COUNT = 3
+
+
+def _restrict(
+    snapshot: CatalogSnapshot,
+    mask: np.ndarray,
+    constraints: Optional[DietaryConstraints]
+) -> np.ndarray:
+    """Narrow a snapshot row mask to foods the constraints allow."""
+    return mask & constraints.mask(snapshot) if constraints else mask
+
+
+def _materialize(snapshot: CatalogSnapshot, rows, view: bool) -> list:
+    """Snapshot rows as transient Foods, or as FoodViews with view=True."""
+    return snapshot.to_food_views(rows) if view else snapshot.to_foods(rows)
 
 
 class FoodRecommender:
@@ -16,8 +44,10 @@ class FoodRecommender:
         self,
         macro: str,
         target_amount: float,
-        limit: int = 5
-    ) -> list[Food]:
+        limit: int = 5,
+        constraints: DietaryConstraints = None,
+        view: bool = False
+    ) -> list[Food | FoodView]:
         """
         Get food recommendations to hit a specific macro target.
 
@@ -25,125 +55,181 @@ class FoodRecommender:
             macro: 'protein', 'carbs', or 'fat'
             target_amount: Amount needed in grams
             limit: Max recommendations
+            constraints: Only recommend foods these constraints allow
+            view: Return FoodView tuples instead of transient Foods
 
         Returns:
             List of Food objects sorted by macro density
         """
-        session = db.get_session()
-        try:
-            macro_column = {
-                "protein": Food.protein_g,
-                "carbs": Food.carbs_g,
-                "fat": Food.fat_g
-            }.get(macro)
-
-            if not macro_column:
-                return []
-
-            # Get foods high in the target macro
-            foods = (
-                session.query(Food)
-                .filter(macro_column >= 10)  # At least 10g per serving
-                .order_by(macro_column.desc())
-                .limit(limit)
-                .all()
-            )
-
-            return foods
-        finally:
-            session.close()
+        macro_column = {
+            "protein": "protein_g",
+            "carbs": "carbs_g",
+            "fat": "fat_g"
+        }.get(macro)
+
+        if not macro_column:
+            return []
+
+        # Get foods high in the target macro (at least 10g per serving)
+        snapshot = catalog.get()
+        rows = snapshot.top_k(
+            macro_column,
+            limit,
+            mask=_restrict(snapshot, snapshot.mask(min_values={macro_column: 10}), constraints),
+        )
+        return _materialize(snapshot, rows, view)
+
+    def get_similar_foods(
+        self,
+        food_id: int,
+        limit: int = 5,
+        by: str = "macros",
+        constraints: DietaryConstraints = None,
+        view: bool = False
+    ) -> list[Food | FoodView]:
+        """
+        Get foods similar to a given food.
 
-    def get_similar_foods(self, food_id: int, limit: int = 5) -> list[Food]:
+        Args:
+            food_id: ID of reference food
+            limit: Max recommendations
+            by: 'macros' for the nearest nutrient profile per serving,
+                'density' for the nearest profile per 100 kcal, 'name' for
+                similar names
+            constraints: Only return foods these constraints allow
+            view: Return FoodView tuples instead of transient Foods
+
+        Returns:
+            List of similar Food objects, most similar first
+        """
+        snapshot = catalog.get()
+
+        if by == "name":
+            if not constraints:
+                food_ids = [i for i, _ in name_similarity.similar_to_food(food_id, limit)]
+                return _materialize(snapshot, snapshot.rows_for_ids(food_ids), view)
+            # Over-fetch, since the constraints may drop some of the hits
+            food_ids = [i for i, _ in name_similarity.similar_to_food(food_id, limit * 4)]
+            food_ids = constraints.filter_ids(snapshot, food_ids)[:limit]
+            return _materialize(snapshot, snapshot.rows_for_ids(food_ids), view)
+
+        engine = density_similarity if by == "density" else nutrient_similarity
+        food_ids = [i for i, _ in engine.similar_to_food(food_id, limit, constraints)]
+        return _materialize(snapshot, snapshot.rows_for_ids(food_ids), view)
+
+    def get_also_logged(
+        self,
+        food_id: int,
+        limit: int = 5,
+        constraints: DietaryConstraints = None,
+        view: bool = False
+    ) -> list[Food | FoodView]:
         """
-        Get foods similar to a given food (by macro profile).
+        Foods people often log in the same meal as the given food.
 
         Args:
             food_id: ID of reference food
             limit: Max recommendations
+            constraints: Only return foods these constraints allow
+            view: Return FoodView tuples instead of transient Foods
 
         Returns:
-            List of similar Food objects
+            List of Food objects, most often logged together first
         """
-        session = db.get_session()
-        try:
-            # Get reference food
-            ref_food = session.query(Food).filter(Food.food_id == food_id).first()
-            if not ref_food:
-                return []
-
-            # Find foods with similar macros (within 30% of each macro)
-            tolerance = 0.3
-
-            ref_protein = float(ref_food.protein_g or 0)
-            ref_carbs = float(ref_food.carbs_g or 0)
-            ref_fat = float(ref_food.fat_g or 0)
-
-            foods = (
-                session.query(Food)
-                .filter(
-                    Food.food_id != food_id,
-                    Food.protein_g.between(
-                        ref_protein * (1 - tolerance),
-                        ref_protein * (1 + tolerance)
-                    ),
-                    Food.carbs_g.between(
-                        ref_carbs * (1 - tolerance) if ref_carbs > 5 else 0,
-                        ref_carbs * (1 + tolerance) if ref_carbs > 5 else 10
-                    ),
-                )
-                .limit(limit)
-                .all()
-            )
-
-            return foods
-        finally:
-            session.close()
+        snapshot = catalog.get()
+        fetch = limit * 4 if constraints else limit
+        food_ids = [i for i, _ in cooccurrence.related(food_id, fetch)]
+        if constraints:
+            food_ids = constraints.filter_ids(snapshot, food_ids)
+        return _materialize(snapshot, snapshot.rows_for_ids(food_ids[:limit]), view)
+
+    def get_popular_foods(
+        self,
+        limit: int = 5,
+        constraints: DietaryConstraints = None,
+        view: bool = False
+    ) -> list[Food | FoodView]:
+        """
+        Foods logged by the most users recently.
 
-    def get_user_favorites(self, user_id: int, limit: int = 5) -> list[Food]:
+        Args:
+            limit: Max results
+            constraints: Only return foods these constraints allow
+            view: Return FoodView tuples instead of transient Foods
+
+        Returns:
+            List of Food objects, most popular first
+        """
+        snapshot = catalog.get()
+        food_ids = popularity.top(snapshot, limit, constraints)
+        return _materialize(snapshot, snapshot.rows_for_ids(food_ids), view)
+
+    def get_user_favorites(
+        self,
+        user_id: int,
+        limit: int = 5,
+        constraints: DietaryConstraints = None,
+        view: bool = False
+    ) -> list[Food | FoodView]:
         """
         Get user's most logged foods.
 
         Args:
             user_id: User's ID
             limit: Max results
+            constraints: Only return foods these constraints allow
+            view: Return FoodView tuples instead of transient Foods
 
         Returns:
             List of frequently logged Food objects
         """
         session = db.get_session()
         try:
-            # Count food occurrences in user's logs
-            logs = (
-                session.query(MealLog.food_id)
-                .filter(MealLog.user_id == user_id)
-                .all()
-            )
-
-            if not logs:
-                return []
-
-            food_counts = Counter([log.food_id for log in logs])
-            top_food_ids = [food_id for food_id, _ in food_counts.most_common(limit)]
-
-            foods = (
-                session.query(Food)
-                .filter(Food.food_id.in_(top_food_ids))
-                .all()
-            )
-
-            # Sort by frequency
-            foods.sort(key=lambda f: food_counts.get(f.food_id, 0), reverse=True)
-
-            return foods
+            # Already in favorites order
+            top_food_ids = favorites.top_food_ids(session, user_id, limit, constraints)
+            foods = food_service.get_many_by_ids(top_food_ids, session, view=view)
+            return [food for food in foods if food is not None]
         finally:
             session.close()
 
+    @staticmethod
+    def _suggestion_kind(remaining_calories: float, remaining_protein: float) -> tuple:
+        """Which ranking serves a budget, as a hashable key."""
+        # If low on protein, suggest high-protein foods
+        if remaining_protein > 20:
+            return ("protein",)
+        # If plenty of calories left, suggest filling options
+        if remaining_calories > 400:
+            return ("filling",)
+        # If low on calories, suggest light options
+        return ("budget", float(remaining_calories))
+
+    @staticmethod
+    def _suggestion_rows(rankings: SuggestionRankings, kind: tuple) -> np.ndarray:
+        if kind[0] == "protein":
+            return rankings.high_protein(SUGGESTION_COUNT)
+        if kind[0] == "filling":
+            return rankings.filling(SUGGESTION_COUNT)
+        return rankings.within_calories(kind[1], SUGGESTION_COUNT)
+
+    @staticmethod
+    def _suggestion(kind: tuple, food: Food) -> dict:
+        if kind[0] == "protein":
+            reason = f"High protein ({food.protein_g}g) to help hit your target"
+        elif kind[0] == "filling":
+            reason = f"High fiber ({food.fiber_g}g) and filling"
+        else:
+            reason = f"Fits your remaining {kind[1]:.0f} cal budget"
+        return {"food": food, "reason": reason}
+
     def get_meal_suggestions(
         self,
         user_id: int,
         meal_type: str,
         remaining_calories: float,
-        remaining_protein: float
+        remaining_protein: float,
+        constraints: DietaryConstraints = None,
+        view: bool = False
     ) -> list[dict]:
         """
         Get smart suggestions based on remaining daily budget.
@@ -153,63 +239,56 @@ class FoodRecommender:
             meal_type: breakfast, lunch, dinner, or snack
             remaining_calories: Calories left for the day
             remaining_protein: Protein left for the day
+            constraints: Only suggest foods these constraints allow
+            view: Suggest FoodView tuples instead of transient Foods
 
         Returns:
             List of suggestion dicts with food and reasoning
         """
-        suggestions = []
-        session = db.get_session()
+        snapshot = catalog.get()
+        rankings = suggestion_rankings(snapshot, constraints)
+        kind = self._suggestion_kind(remaining_calories, remaining_protein)
+        rows = self._suggestion_rows(rankings, kind)
+        return [self._suggestion(kind, food) for food in _materialize(snapshot, rows, view)]
 
-        try:
-            # If low on protein, suggest high-protein foods
-            if remaining_protein > 20:
-                high_protein = (
-                    session.query(Food)
-                    .filter(Food.protein_g >= 15)
-                    .order_by(Food.protein_g.desc())
-                    .limit(3)
-                    .all()
-                )
-                for food in high_protein:
-                    suggestions.append({
-                        "food": food,
-                        "reason": f"High protein ({food.protein_g}g) to help hit your target"
-                    })
-
-            # If plenty of calories left, suggest filling options
-            elif remaining_calories > 400:
-                filling = (
-                    session.query(Food)
-                    .filter(Food.fiber_g >= 3)
-                    .order_by(Food.calories.asc())
-                    .limit(3)
-                    .all()
-                )
-                for food in filling:
-                    suggestions.append({
-                        "food": food,
-                        "reason": f"High fiber ({food.fiber_g}g) and filling"
-                    })
-
-            # If low on calories, suggest light options
-            else:
-                light = (
-                    session.query(Food)
-                    .filter(Food.calories <= remaining_calories)
-                    .order_by(Food.protein_g.desc())
-                    .limit(3)
-                    .all()
-                )
-                for food in light:
-                    suggestions.append({
-                        "food": food,
-                        "reason": f"Fits your remaining {remaining_calories:.0f} cal budget"
-                    })
-
-            return suggestions[:5]
+    def get_meal_suggestions_for_users(
+        self,
+        budgets: list[dict],
+        constraints: DietaryConstraints = None,
+        view: bool = False
+    ) -> dict[int, list[dict]]:
+        """
+        Suggestions for many users at once.
 
-        finally:
-            session.close()
+        Users whose budgets select the same ranking share one lookup, and
+        each suggested food is built once (the Food objects are shared
+        between users' lists).
+
+        Args:
+            budgets: Dicts with user_id, meal_type, remaining_calories and
+                remaining_protein, as taken by get_meal_suggestions()
+            constraints: Only suggest foods these constraints allow
+            view: Suggest FoodView tuples instead of transient Foods
+
+        Returns:
+            Suggestion lists by user_id
+        """
+        snapshot = catalog.get()
+        rankings = suggestion_rankings(snapshot, constraints)
+        rows_by_kind: dict[tuple, np.ndarray] = {}
+        foods: dict[int, Food] = {}
+
+        suggestions = {}
+        for budget in budgets:
+            kind = self._suggestion_kind(budget["remaining_calories"], budget["remaining_protein"])
+            rows = rows_by_kind.get(kind)
+            if rows is None:
+                rows = rows_by_kind[kind] = self._suggestion_rows(rankings, kind)
+            for row in rows:
+                if row not in foods:
+                    foods[row] = (snapshot.to_food_view if view else snapshot.to_food)(int(row))
+            suggestions[budget["user_id"]] = [self._suggestion(kind, foods[row]) for row in rows]
+        return suggestions
 
 
 # Convenience instance
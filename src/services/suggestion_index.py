@@ -0,0 +1,113 @@
+"""Precomputed rankings behind meal suggestions.
+
+Meal suggestions depend only on the catalog and a few fixed thresholds, so
+the allowed foods are sorted once per ranking key and kept on the snapshot
+(a new catalog version gets new rankings). High-protein and filling
+suggestions are then the head of a sorted array.
+
+"Most protein within a calorie budget" is a binary search over the foods
+ordered by calories: the foods that fit are a prefix of that order. The
+order is cut into blocks, and for every block the best protein ranks of
+everything up to its end are stored, so a query merges one stored list
+with the part of a single block the prefix covers.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from src.services.catalog import CatalogSnapshot
+from src.services.constraints import DietaryConstraints, MASK_CACHE_SIZE
+
+# Foods suggested as high protein have at least this much per serving
+HIGH_PROTEIN_MIN_G = 15
+# Foods suggested as filling have at least this much fiber per serving
+FILLING_MIN_FIBER_G = 3
+
+# Foods per block of the calorie order
+BLOCK_SIZE = 1024
+# Best foods stored per block; larger budget queries merge the whole prefix
+PREFIX_DEPTH = 10
+
+
+class SuggestionRankings:
+    """Snapshot rows of the allowed foods, pre-sorted for each kind of suggestion."""
+
+    def __init__(self, snapshot: CatalogSnapshot, mask: np.ndarray = None):
+        rows = np.flatnonzero(mask) if mask is not None else np.arange(len(snapshot))
+        food_ids = snapshot.food_ids[rows]
+        protein = snapshot.nutrient("protein_g")[rows]
+        fiber = snapshot.nutrient("fiber_g")[rows]
+        calories = snapshot.nutrient("calories")[rows].astype(np.float64)
+
+        # Protein descending; ties by food_id, like CatalogSnapshot.top_k
+        protein_order = np.lexsort((food_ids, -protein))
+        self.by_protein = rows[protein_order]
+        self.high_protein_count = int((protein >= HIGH_PROTEIN_MIN_G).sum())
+
+        # Fiber-rich foods, fewest calories first
+        filling = np.flatnonzero(fiber >= FILLING_MIN_FIBER_G)
+        self.filling_rows = rows[filling[np.lexsort((food_ids[filling], calories[filling]))]]
+
+        # Protein rank of each food, in calorie order
+        calorie_order = np.lexsort((food_ids, calories))
+        protein_rank = np.empty(len(rows), dtype=np.int64)
+        protein_rank[protein_order] = np.arange(len(rows))
+        self.sorted_calories = calories[calorie_order]
+        self.calorie_ranks = protein_rank[calorie_order]
+
+        # Best PREFIX_DEPTH ranks up to the end of each block, padded with len(rows)
+        blocks = -(-len(rows) // BLOCK_SIZE)
+        self.prefix_best = np.full((blocks, PREFIX_DEPTH), len(rows), dtype=np.int64)
+        best = self.prefix_best[0, :0]
+        for block in range(blocks):
+            ranks = self.calorie_ranks[block * BLOCK_SIZE:(block + 1) * BLOCK_SIZE]
+            best = np.sort(np.concatenate([best, ranks]))[:PREFIX_DEPTH]
+            self.prefix_best[block, :len(best)] = best
+
+    def __len__(self) -> int:
+        return len(self.by_protein)
+
+    def high_protein(self, k: int) -> np.ndarray:
+        """Rows with the most protein among foods of at least HIGH_PROTEIN_MIN_G."""
+        return self.by_protein[:min(k, self.high_protein_count)]
+
+    def filling(self, k: int) -> np.ndarray:
+        """Rows with the fewest calories among foods of at least FILLING_MIN_FIBER_G fiber."""
+        return self.filling_rows[:k]
+
+    def within_calories(self, budget: float, k: int) -> np.ndarray:
+        """Rows with the most protein among foods of at most budget calories."""
+        fitting = int(np.searchsorted(self.sorted_calories, budget, side="right"))
+        if fitting == 0 or k <= 0:
+            return self.by_protein[:0]
+
+        full_blocks = fitting // BLOCK_SIZE
+        if full_blocks and k <= PREFIX_DEPTH:
+            ranks = np.concatenate([
+                self.prefix_best[full_blocks - 1],
+                self.calorie_ranks[full_blocks * BLOCK_SIZE:fitting],
+            ])
+            ranks = ranks[ranks < len(self)]
+        else:
+            ranks = self.calorie_ranks[:fitting]
+
+        if len(ranks) > k:
+            ranks = np.partition(ranks, k - 1)[:k]
+        return self.by_protein[np.sort(ranks)]
+
+
+def suggestion_rankings(
+    snapshot: CatalogSnapshot,
+    constraints: Optional[DietaryConstraints] = None
+) -> SuggestionRankings:
+    """Rankings of the foods constraints allow, built on first use and cached on the snapshot."""
+    cache = snapshot.derived.setdefault("suggestion_rankings", {})
+    key = constraints or None
+    rankings = cache.get(key)
+    if rankings is None:
+        if len(cache) >= MASK_CACHE_SIZE:
+            cache.clear()
+        mask = constraints.mask(snapshot) if constraints else None
+        rankings = cache[key] = SuggestionRankings(snapshot, mask)
+    return rankings
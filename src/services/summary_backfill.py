@@ -0,0 +1,222 @@
+"""Bulk rebuild of daily_summaries from meal_logs.
+
+The (user, date) space is split into contiguous user_id ranges. Each
+partition is recomputed with one grouped aggregate query and rewritten with
+one bulk insert inside a single transaction, so a partition is either fully
+rebuilt or untouched. Completed partitions are recorded in a checkpoint file,
+which lets an interrupted run resume where it stopped.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from pathlib import Path
+from typing import Callable, Optional
+
+from sqlalchemy import func, insert
+
+from src.db.postgres_client import db, DailySummary, Food, MealLog, User
+from src.services.logging_service import is_target_met
+from src.utils import load_config, get_project_root
+
+DEFAULT_CHECKPOINT = get_project_root() / "data" / "backfill_checkpoint.json"
+
+# Set per worker process by _init_worker (or lazily in-process)
+_tolerance = None
+
+
+def _init_worker() -> None:
+    """Give each worker process its own connection pool."""
+    global _tolerance
+    if db.engine is not None:
+        # Forked children must not reuse the parent's pooled connections
+        db.engine.dispose(close=False)
+    else:
+        db.connect()
+    _tolerance = load_config()["nutrition"]["target_tolerance"]
+
+
+def plan_partitions(chunk_size: int) -> list[tuple[int, int]]:
+    """
+    Split users into contiguous user_id ranges of ~chunk_size users each.
+
+    Returns:
+        List of inclusive (low, high) user_id bounds
+    """
+    session = db.get_session()
+    try:
+        user_ids = [
+            row.user_id
+            for row in session.query(User.user_id).order_by(User.user_id).yield_per(10000)
+        ]
+    finally:
+        session.close()
+
+    return [
+        (user_ids[i], user_ids[min(i + chunk_size, len(user_ids)) - 1])
+        for i in range(0, len(user_ids), chunk_size)
+    ]
+
+
+def rebuild_partition(
+    low: int,
+    high: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> tuple[int, int, int]:
+    """
+    Recompute daily summaries for users in [low, high].
+
+    Returns:
+        (low, high, summaries_written)
+    """
+    global _tolerance
+    if _tolerance is None:
+        _tolerance = load_config()["nutrition"]["target_tolerance"]
+
+    session = db.get_session()
+    try:
+        query = (
+            session.query(
+                MealLog.user_id,
+                MealLog.log_date,
+                func.coalesce(func.sum(Food.calories * MealLog.servings), 0).label("calories"),
+                func.coalesce(func.sum(Food.protein_g * MealLog.servings), 0).label("protein"),
+                func.coalesce(func.sum(Food.carbs_g * MealLog.servings), 0).label("carbs"),
+                func.coalesce(func.sum(Food.fat_g * MealLog.servings), 0).label("fat"),
+                User.calorie_target,
+                User.protein_target,
+            )
+            .select_from(MealLog)
+            .join(Food, MealLog.food_id == Food.food_id)
+            .join(User, MealLog.user_id == User.user_id)
+            .filter(MealLog.user_id.between(low, high))
+            .group_by(
+                MealLog.user_id,
+                MealLog.log_date,
+                User.calorie_target,
+                User.protein_target,
+            )
+        )
+        stale = session.query(DailySummary).filter(DailySummary.user_id.between(low, high))
+
+        if start_date:
+            query = query.filter(MealLog.log_date >= start_date)
+            stale = stale.filter(DailySummary.log_date >= start_date)
+        if end_date:
+            query = query.filter(MealLog.log_date <= end_date)
+            stale = stale.filter(DailySummary.log_date <= end_date)
+
+        rows = []
+        for row in query:
+            calories = int(row.calories or 0)
+            protein = int(row.protein or 0)
+            rows.append({
+                "user_id": row.user_id,
+                "log_date": row.log_date,
+                "total_calories": calories,
+                "total_protein": protein,
+                "total_carbs": int(row.carbs or 0),
+                "total_fat": int(row.fat or 0),
+                "calorie_target_met": is_target_met(calories, row.calorie_target, _tolerance),
+                "protein_target_met": is_target_met(protein, row.protein_target, _tolerance),
+            })
+
+        stale.delete(synchronize_session=False)
+        if rows:
+            session.execute(insert(DailySummary), rows)
+        session.commit()
+        return low, high, len(rows)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def _load_checkpoint(path: Path, params: dict) -> set[tuple[int, int]]:
+    """Return partitions already completed by a run with the same params."""
+    if not path.exists():
+        return set()
+
+    with open(path, "r") as f:
+        checkpoint = json.load(f)
+
+    if checkpoint.get("params") != params:
+        return set()
+    return {tuple(p) for p in checkpoint.get("completed", [])}
+
+
+def _save_checkpoint(path: Path, params: dict, completed: set[tuple[int, int]]) -> None:
+    """Atomically write the checkpoint file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({"params": params, "completed": sorted(completed)}, f)
+    os.replace(tmp_path, path)
+
+
+def run_backfill(
+    workers: int = 4,
+    chunk_size: int = 500,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    checkpoint_path: Path = DEFAULT_CHECKPOINT,
+    resume: bool = True,
+    on_start: Optional[Callable[[int, int], None]] = None,
+    on_progress: Optional[Callable[[tuple[int, int], int], None]] = None
+) -> int:
+    """
+    Rebuild daily_summaries for all users.
+
+    Args:
+        workers: Worker processes (1 runs in-process)
+        chunk_size: Users per partition
+        start_date: Optional first date to rebuild (inclusive)
+        end_date: Optional last date to rebuild (inclusive)
+        checkpoint_path: File recording completed partitions
+        resume: Skip partitions completed by a previous identical run
+        on_start: Called with (total_partitions, already_done)
+        on_progress: Called with (partition, summaries_written) per partition
+
+    Returns:
+        Number of summaries written in this run
+    """
+    params = {
+        "chunk_size": chunk_size,
+        "start_date": start_date.isoformat() if start_date else None,
+        "end_date": end_date.isoformat() if end_date else None,
+    }
+    completed = _load_checkpoint(checkpoint_path, params) if resume else set()
+
+    partitions = plan_partitions(chunk_size)
+    pending = [p for p in partitions if p not in completed]
+    if on_start:
+        on_start(len(partitions), len(partitions) - len(pending))
+
+    written = 0
+
+    def _done(low: int, high: int, count: int) -> None:
+        nonlocal written
+        written += count
+        completed.add((low, high))
+        _save_checkpoint(checkpoint_path, params, completed)
+        if on_progress:
+            on_progress((low, high), count)
+
+    if workers <= 1:
+        for low, high in pending:
+            _done(*rebuild_partition(low, high, start_date, end_date))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [
+                pool.submit(rebuild_partition, low, high, start_date, end_date)
+                for low, high in pending
+            ]
+            for future in as_completed(futures):
+                _done(*future.result())
+
+    # Finished cleanly; the next run starts from scratch
+    checkpoint_path.unlink(missing_ok=True)
+    return written
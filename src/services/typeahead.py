@@ -0,0 +1,357 @@
+"""Typeahead prefix index over food name tokens.
+
+Names are split into normalized tokens. The index keeps one sorted token
+list; a prefix maps to a contiguous token range found with bisect. Each token
+has a posting array of food rows pre-sorted by popularity, so the top-k
+matches come from lazily merging the postings in that range.
+"""
+
+import bisect
+import heapq
+import re
+from collections import OrderedDict
+from itertools import islice
+from typing import Iterable
+
+import numpy as np
+from sqlalchemy import func
+
+from src.db.postgres_client import db, MealLog
+from src.services.catalog import CatalogIndex, CatalogSnapshot
+from src.utils import load_config
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase alphanumeric tokens of a name or query."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class PrefixIndex:
+    """
+    Memory-bounded prefix index ranking matches by popularity.
+
+    Rows are local to the index. Postings hold int32 rows ordered by
+    (popularity desc, name length, food_id) and are capped at
+    max_postings entries per token, which bounds memory on huge catalogs
+    while keeping the best matches of every token.
+    """
+
+    # Results cached per prefix; k above this is served uncached
+    CACHED_K = 50
+    # Prefixes this short are precomputed at build time
+    PRECOMPUTE_LEN = 2
+    # Multi-term queries intersect postings of terms up to this many rows
+    INTERSECT_LIMIT = 20000
+
+    def __init__(self, max_postings: int = 5000, cache_size: int = 4096):
+        self.max_postings = max_postings
+        self.cache_size = cache_size
+        self._size = 0
+        self._food_ids = np.zeros(0, dtype=np.int64)
+        self._popularity = np.zeros(0, dtype=np.float32)
+        self._name_lens = np.zeros(0, dtype=np.uint16)
+        self._names: list[str] = []
+        self._tokens: list[str] = []
+        self._postings: list[np.ndarray] = []
+        self._short: dict[str, list[int]] = {}
+        self._cache: OrderedDict[str, list[int]] = OrderedDict()
+        self._multi: OrderedDict[tuple[str, int], list[int]] = OrderedDict()
+        self._row_for_id: dict[int, int] = {}
+
+    @classmethod
+    def build(
+        cls,
+        food_ids: Iterable[int],
+        names: Iterable[str],
+        popularity: Iterable[float],
+        max_postings: int = 5000,
+        cache_size: int = 4096
+    ) -> "PrefixIndex":
+        """Bulk-build an index from parallel id/name/popularity sequences."""
+        index = cls(max_postings=max_postings, cache_size=cache_size)
+        index._names = list(names)
+        index._size = len(index._names)
+        index._food_ids = np.asarray(food_ids, dtype=np.int64).copy()
+        index._popularity = np.asarray(popularity, dtype=np.float32).copy()
+        index._name_lens = np.fromiter(
+            (min(len(name), 65535) for name in index._names),
+            dtype=np.uint16,
+            count=index._size,
+        )
+        index._row_for_id = {int(food_id): row for row, food_id in enumerate(index._food_ids)}
+
+        by_token: dict[str, list[int]] = {}
+        for row, name in enumerate(index._names):
+            for token in set(tokenize(name)):
+                by_token.setdefault(token, []).append(row)
+
+        # Global rank of every row, so postings sort with one argsort each
+        rank = np.empty(index._size, dtype=np.int64)
+        rank[index._rank_order(np.arange(index._size))] = np.arange(index._size)
+
+        index._tokens = sorted(by_token)
+        for token in index._tokens:
+            rows = np.array(by_token[token], dtype=np.int32)
+            index._postings.append(rows[np.argsort(rank[rows], kind="stable")][:max_postings])
+
+        index._precompute()
+        return index
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, food_id: int) -> bool:
+        return food_id in self._row_for_id
+
+    # ------------------------------------------------------------------
+    # Mutation
+    # ------------------------------------------------------------------
+
+    def _rank_key(self, row: int) -> tuple:
+        return (
+            -self._popularity[row].item(),
+            self._name_lens[row].item(),
+            self._food_ids[row].item(),
+        )
+
+    def _rank_order(self, rows: np.ndarray) -> np.ndarray:
+        """Vectorized equivalent of sorting rows by _rank_key."""
+        return rows[np.lexsort((
+            self._food_ids[rows],
+            self._name_lens[rows],
+            -self._popularity[rows],
+        ))]
+
+    def _append_food(self, food_id: int, name: str, score: float) -> int:
+        row = self._size
+        if row == len(self._food_ids):
+            # Grow storage geometrically so inserts stay amortized O(1)
+            capacity = max(16, 2 * row)
+            self._food_ids = np.resize(self._food_ids, capacity)
+            self._popularity = np.resize(self._popularity, capacity)
+            self._name_lens = np.resize(self._name_lens, capacity)
+
+        self._food_ids[row] = food_id
+        self._popularity[row] = score
+        self._name_lens[row] = min(len(name), 65535)
+        self._names.append(name)
+        self._row_for_id[food_id] = row
+        self._size += 1
+        return row
+
+    def add(self, food_id: int, name: str, popularity: float = 0.0) -> None:
+        """Insert one food without rebuilding the index."""
+        if food_id in self._row_for_id:
+            return
+
+        row = self._append_food(food_id, name, popularity)
+        key = self._rank_key(row)
+        self._multi.clear()
+
+        for token in set(tokenize(name)):
+            pos = bisect.bisect_left(self._tokens, token)
+            if pos < len(self._tokens) and self._tokens[pos] == token:
+                posting = self._postings[pos]
+                at = bisect.bisect_left(posting, key, key=self._rank_key)
+                if at < self.max_postings:
+                    self._postings[pos] = np.insert(posting, at, row)[:self.max_postings]
+            else:
+                self._tokens.insert(pos, token)
+                self._postings.insert(pos, np.array([row], dtype=np.int32))
+
+            # Patch cached results for every prefix of the new token
+            for n in range(1, len(token) + 1):
+                cached = self._store(token[:n]).get(token[:n])
+                if cached is None or row in cached:
+                    continue
+                at = bisect.bisect_left(cached, key, key=self._rank_key)
+                if at < self.CACHED_K:
+                    cached.insert(at, row)
+                    del cached[self.CACHED_K:]
+
+    def food_ids(self) -> np.ndarray:
+        """All indexed food_ids."""
+        return self._food_ids[:self._size].copy()
+
+    # ------------------------------------------------------------------
+    # Query
+    # ------------------------------------------------------------------
+
+    def _token_range(self, prefix: str) -> tuple[int, int]:
+        low = bisect.bisect_left(self._tokens, prefix)
+        high = bisect.bisect_left(self._tokens, prefix + "\uffff", low)
+        return low, high
+
+    def _iter_prefix(self, prefix: str):
+        """Yield distinct rows matching a token prefix, best first."""
+        low, high = self._token_range(prefix)
+        postings = [map(int, self._postings[i]) for i in range(low, high)]
+        seen = set()
+        for row in heapq.merge(*postings, key=self._rank_key):
+            if row not in seen:
+                seen.add(row)
+                yield row
+
+    def _store(self, prefix: str) -> dict[str, list[int]]:
+        """Short prefixes are pinned; longer ones live in the LRU cache."""
+        return self._short if len(prefix) <= self.PRECOMPUTE_LEN else self._cache
+
+    def _top_prefix(self, prefix: str, k: int) -> list[int]:
+        if k > self.CACHED_K:
+            return list(islice(self._iter_prefix(prefix), k))
+
+        store = self._store(prefix)
+        cached = store.get(prefix)
+        if cached is None:
+            cached = list(islice(self._iter_prefix(prefix), self.CACHED_K))
+            store[prefix] = cached
+            if store is self._cache and len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        elif store is self._cache:
+            self._cache.move_to_end(prefix)
+        return cached[:k]
+
+    def _precompute(self) -> None:
+        """Compute results for every short prefix present in the index."""
+        prefixes = {
+            token[:n]
+            for token in self._tokens
+            for n in range(1, self.PRECOMPUTE_LEN + 1)
+        }
+        for prefix in prefixes:
+            self._top_prefix(prefix, self.CACHED_K)
+
+    def search(self, query: str, k: int = 10) -> list[int]:
+        """
+        Top-k food_ids whose name has a token starting with each query token.
+
+        Args:
+            query: Raw user input, e.g. "chick bre"
+            k: Max results
+
+        Returns:
+            food_ids ordered by popularity
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        if len(terms) == 1:
+            return [int(self._food_ids[row]) for row in self._top_prefix(terms[0], k)]
+
+        cache_key = (" ".join(terms), k)
+        cached = self._multi.get(cache_key)
+        if cached is not None:
+            self._multi.move_to_end(cache_key)
+            return cached
+
+        results = self._search_terms(terms, k)
+        self._multi[cache_key] = results
+        if len(self._multi) > self.cache_size:
+            self._multi.popitem(last=False)
+        return results
+
+    def _search_terms(self, terms: list[str], k: int) -> list[int]:
+        """Top-k food_ids matching every term of a multi-term query."""
+        def candidates(term: str) -> int:
+            low, high = self._token_range(term)
+            return sum(len(self._postings[i]) for i in range(low, high))
+
+        sized = sorted((candidates(term), term) for term in terms)
+        if sized[0][0] == 0:
+            return []
+
+        # Intersect the selective terms as arrays; verify the rest by name
+        small = [term for size, term in sized if size <= self.INTERSECT_LIMIT]
+        large = [term for size, term in sized if size > self.INTERSECT_LIMIT]
+
+        if small:
+            rows = None
+            for term in small:
+                low, high = self._token_range(term)
+                term_rows = np.unique(np.concatenate(self._postings[low:high]))
+                rows = term_rows if rows is None else np.intersect1d(
+                    rows, term_rows, assume_unique=True
+                )
+            if not large and len(rows) > k:
+                # Only the k most popular can win; cut before the full sort
+                scores = self._popularity[rows]
+                rows = rows[scores >= np.partition(scores, len(rows) - k)[len(rows) - k]]
+            ordered = self._rank_order(rows).tolist()
+        else:
+            ordered = self._iter_prefix(large.pop(0))
+
+        results = []
+        for row in ordered:
+            tokens = tokenize(self._names[row]) if large else ()
+            if all(any(t.startswith(term) for t in tokens) for term in large):
+                results.append(int(self._food_ids[row]))
+                if len(results) >= k:
+                    break
+        return results
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the index structures."""
+        arrays = sum(p.nbytes for p in self._postings)
+        arrays += self._food_ids.nbytes + self._popularity.nbytes + self._name_lens.nbytes
+        strings = sum(len(t) + 49 for t in self._tokens)
+        strings += sum(len(n) + 49 for n in self._names)
+        return arrays + strings
+
+
+def load_popularity(snapshot: CatalogSnapshot) -> np.ndarray:
+    """Log count per catalog row, used as the popularity score."""
+    session = db.get_session()
+    try:
+        counts = (
+            session.query(MealLog.food_id, func.count(MealLog.log_id))
+            .group_by(MealLog.food_id)
+            .all()
+        )
+    finally:
+        session.close()
+
+    popularity = np.zeros(len(snapshot), dtype=np.float32)
+    if counts:
+        ids, values = zip(*counts)
+        rows = snapshot.rows_for_ids(ids)
+        found = rows >= 0
+        popularity[rows[found]] = np.asarray(values, dtype=np.float32)[found]
+    return popularity
+
+
+class FoodTypeahead(CatalogIndex):
+    """Process-wide prefix index kept in step with the catalog snapshot."""
+
+    def build(self, snapshot: CatalogSnapshot) -> PrefixIndex:
+        config = load_config()["typeahead"]
+        return PrefixIndex.build(
+            snapshot.food_ids,
+            snapshot.names,
+            load_popularity(snapshot),
+            max_postings=config["max_postings_per_token"],
+            cache_size=config["cache_size"],
+        )
+
+    def extend(self, index: PrefixIndex, snapshot: CatalogSnapshot, rows: np.ndarray) -> bool:
+        for row in rows:
+            index.add(int(snapshot.food_ids[row]), snapshot.names[row])
+        return True
+
+    def add(self, food_id: int, name: str, popularity: float = 0.0) -> None:
+        """Insert a newly saved food right away."""
+        index = self.get()
+        with self._lock:
+            index.add(food_id, name, popularity)
+
+    def search(self, query: str, k: int = 10) -> list[int]:
+        """Top-k food_ids matching the query prefix."""
+        index = self.get()
+        with self._lock:
+            return index.search(query, k)
+
+
+# Convenience instance
+typeahead = FoodTypeahead()
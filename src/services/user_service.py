@@ -0,0 +1,164 @@
+"""User service - session-to-user resolution and orphan user cleanup.
+
+Each browser session id maps to one users row, created on first visit.
+Pages resolve a session once and keep the profile in session state.
+
+Most sessions never log anything, and their rows are unreachable once the
+session id is gone. purge_orphans() deletes users with no meal logs some
+days after creation, together with their derived rows (summaries,
+favorites and cached plans), in batched transactions.
+"""
+
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, NamedTuple, Optional
+
+from sqlalchemy import exists
+from sqlalchemy.exc import IntegrityError
+
+from src.db.postgres_client import db, DailySummary, MealLog, MealPlan, User, UserFoodFrequency
+from src.utils import load_config
+
+# Per-user rows deleted along with an orphan user, by metrics name
+DERIVED_TABLES = {
+    "daily_summaries": DailySummary,
+    "user_food_frequency": UserFoodFrequency,
+    "meal_plans": MealPlan,
+}
+
+
+class UserProfile(NamedTuple):
+    """The user fields pages keep in session state."""
+
+    user_id: int
+    goal: str
+    calorie_target: int
+    protein_target: int
+    carb_target: int
+    fat_target: int
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserProfile":
+        return cls(*[getattr(user, field) for field in cls._fields])
+
+
+def _has_no_logs(model):
+    """SQL condition: the row's user has no meal logs."""
+    return ~exists().where(MealLog.user_id == model.user_id)
+
+
+class UserService:
+    """Resolves session ids to users and purges users that never logged."""
+
+    def __init__(self):
+        # Process-wide counters for the debug view
+        self.metrics: Counter = Counter()
+
+    def resolve_session(self, session_id: str) -> UserProfile:
+        """
+        The user for a browser session id, created with default targets if new.
+
+        Args:
+            session_id: Session id (at most 64 characters)
+
+        Returns:
+            UserProfile of the session's user
+        """
+        session = db.get_session()
+        try:
+            user = session.query(User).filter(User.session_id == session_id).first()
+            if user:
+                return UserProfile.from_user(user)
+
+            config = load_config()["nutrition"]
+            user = User(
+                session_id=session_id,
+                goal="maintain",
+                calorie_target=config["default_calorie_target"],
+                protein_target=config["default_protein_target"],
+                carb_target=config["default_carb_target"],
+                fat_target=config["default_fat_target"],
+            )
+            session.add(user)
+            try:
+                session.commit()
+            except IntegrityError:
+                # Another tab created this session's user first
+                session.rollback()
+                user = session.query(User).filter(User.session_id == session_id).one()
+                return UserProfile.from_user(user)
+            self.metrics["users_created"] += 1
+            return UserProfile.from_user(user)
+        finally:
+            session.close()
+
+    def purge_orphans(
+        self,
+        retention_days: int = None,
+        batch_size: int = None,
+        on_batch: Optional[Callable[[dict], None]] = None
+    ) -> dict:
+        """
+        Delete users created over retention_days ago that have no meal logs.
+
+        Users are walked in user_id order and deleted batch_size per
+        transaction, along with their DERIVED_TABLES rows. The no-logs
+        condition is re-checked in each DELETE, so a user who logs a meal
+        while the purge runs is kept.
+
+        Args:
+            retention_days: Minimum age of a purged user (default users.orphan_retention_days)
+            batch_size: Users per transaction (default users.gc_batch_size)
+            on_batch: Called with the running totals after each batch
+
+        Returns:
+            Rows deleted per table, batches and seconds taken
+        """
+        config = load_config()["users"]
+        retention_days = retention_days if retention_days is not None else config["orphan_retention_days"]
+        batch_size = batch_size or config["gc_batch_size"]
+        cutoff = datetime.now() - timedelta(days=retention_days)
+
+        start = time.perf_counter()
+        totals = Counter({"users": 0, "batches": 0, **{name: 0 for name in DERIVED_TABLES}})
+        last_id = 0
+        while True:
+            session = db.get_session()
+            try:
+                user_ids = [
+                    row.user_id
+                    for row in session.query(User.user_id)
+                    .filter(User.user_id > last_id, User.created_at < cutoff, _has_no_logs(User))
+                    .order_by(User.user_id)
+                    .limit(batch_size)
+                ]
+                if not user_ids:
+                    break
+                last_id = user_ids[-1]
+
+                for name, model in DERIVED_TABLES.items():
+                    totals[name] += session.query(model).filter(
+                        model.user_id.in_(user_ids), _has_no_logs(model)
+                    ).delete(synchronize_session=False)
+                deleted = session.query(User).filter(
+                    User.user_id.in_(user_ids), _has_no_logs(User)
+                ).delete(synchronize_session=False)
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+
+            totals["users"] += deleted
+            totals["batches"] += 1
+            if on_batch:
+                on_batch(dict(totals))
+
+        self.metrics["orphan_users_purged"] += totals["users"]
+        return {**totals, "seconds": round(time.perf_counter() - start, 2)}
+
+
+# Convenience instance
+user_service = UserService()
@@ -7,8 +7,10 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import streamlit as st
-from src.db.postgres_client import db, User
-from src.utils import load_config
+from src.db.postgres_client import db
+from src.services.user_service import user_service
+from streamlit_app import cached
+from datetime import date
 import uuid
 
 st.set_page_config(
@@ -29,34 +31,12 @@ def init_user_session():
         if "session_id" not in st.session_state:
             st.session_state.session_id = str(uuid.uuid4())[:8]
 
-        session = db.get_session()
-        try:
-            # Find or create user
-            user = session.query(User).filter(
-                User.session_id == st.session_state.session_id
-            ).first()
-
-            if not user:
-                config = load_config()
-                user = User(
-                    session_id=st.session_state.session_id,
-                    goal="maintain",
-                    calorie_target=config["nutrition"]["default_calorie_target"],
-                    protein_target=config["nutrition"]["default_protein_target"],
-                    carb_target=config["nutrition"]["default_carb_target"],
-                    fat_target=config["nutrition"]["default_fat_target"],
-                )
-                session.add(user)
-                session.commit()
-                session.refresh(user)
-
-            st.session_state.user_id = user.user_id
-            st.session_state.calorie_target = user.calorie_target
-            st.session_state.protein_target = user.protein_target
-            st.session_state.carb_target = user.carb_target
-            st.session_state.fat_target = user.fat_target
-        finally:
-            session.close()
+        user = user_service.resolve_session(st.session_state.session_id)
+        st.session_state.user_id = user.user_id
+        st.session_state.calorie_target = user.calorie_target
+        st.session_state.protein_target = user.protein_target
+        st.session_state.carb_target = user.carb_target
+        st.session_state.fat_target = user.fat_target
 
 
 # Initialize user
@@ -94,19 +74,6 @@ Welcome to NutriScan! Track your nutrition, analyze trends, and get personalized
 # Quick stats
 col1, col2, col3 = st.columns(3)
 
-session = db.get_session()
-try:
-    from src.db.postgres_client import Food, MealLog
-    from datetime import date
-
-    food_count = session.query(Food).count()
-    today_logs = session.query(MealLog).filter(
-        MealLog.user_id == st.session_state.user_id,
-        MealLog.log_date == date.today()
-    ).count()
-
-    col1.metric("Foods in Database", food_count)
-    col2.metric("Meals Logged Today", today_logs)
-    col3.metric("Your Goal", st.session_state.get("goal", "Maintain"))
-finally:
-    session.close()
+col1.metric("Foods in Database", cached.food_count())
+col2.metric("Meals Logged Today", cached.meals_logged(st.session_state.user_id, date.today()))
+col3.metric("Your Goal", st.session_state.get("goal", "Maintain"))
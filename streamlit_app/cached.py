@@ -0,0 +1,191 @@
+"""Cached reads for the Streamlit pages.
+
+Streamlit re-runs the whole page script on every widget interaction, so
+pages read through these functions instead of querying directly. Each
+result is cached with st.cache_data under its arguments plus the write
+generations of the data it depends on (src/services/generations.py): a
+meal log write retires that user's entries, a catalog write retires the
+entries built from foods, and nothing else expires. Both generations are
+stored in the database, so writes made by other processes count too.
+Entries for old generations are dropped as max_entries pushes them out.
+
+Calls and misses per function are counted for the debug view on the
+Settings page.
+"""
+
+import functools
+from collections import Counter
+from datetime import date, timedelta
+from typing import Optional
+
+import streamlit as st
+from sqlalchemy import func
+
+from src.db.postgres_client import db, Food, MealLog
+from src.db.read_models import FoodView
+from src.services.food_service import food_service, SearchCursor, SearchPage
+from src.services.generations import generations
+from src.services.logging_service import logging_service
+
+# Entries kept per cached function
+MAX_ENTRIES = 1000
+
+# Process-wide counters, by function name
+_calls: Counter = Counter()
+_misses: Counter = Counter()
+
+
+def _cached(fn):
+    """st.cache_data with call and miss counting; fn only runs on a miss."""
+    name = fn.__name__.lstrip("_")
+
+    @st.cache_data(max_entries=MAX_ENTRIES, show_spinner=False)
+    @functools.wraps(fn)
+    def on_miss(*args):
+        _misses[name] += 1
+        return fn(*args)
+
+    @functools.wraps(fn)
+    def call(*args):
+        _calls[name] += 1
+        return on_miss(*args)
+
+    return call
+
+
+@_cached
+def _food_count(catalog_generation: int) -> int:
+    session = db.get_session()
+    try:
+        return session.query(Food).count()
+    finally:
+        session.close()
+
+
+def food_count() -> int:
+    """Foods in the catalog."""
+    return _food_count(generations.catalog())
+
+
+@_cached
+def _meals_logged(user_id: int, log_date: date, user_generation: int) -> int:
+    session = db.get_session()
+    try:
+        return session.query(func.count(MealLog.log_id)).filter(
+            MealLog.user_id == user_id,
+            MealLog.log_date == log_date,
+        ).scalar()
+    finally:
+        session.close()
+
+
+def meals_logged(user_id: int, log_date: date) -> int:
+    """Number of foods the user logged on a date."""
+    return _meals_logged(user_id, log_date, generations.user(user_id))
+
+
+@_cached
+def _local_matches(query: str, limit: int, catalog_generation: int) -> tuple[list[FoodView], bool]:
+    return food_service.local_matches(query, limit, view=True)
+
+
+def local_matches(query: str, limit: int = 10) -> tuple[list[FoodView], bool]:
+    """Local food search results as FoodViews (see FoodService.local_matches)."""
+    return _local_matches(query.strip().lower(), limit, generations.catalog())
+
+
+@_cached
+def _search_page(
+    query: str,
+    page_size: int,
+    cursor: Optional[SearchCursor],
+    catalog_generation: int
+) -> SearchPage:
+    return food_service.search_page(query, page_size, cursor, view=True)
+
+
+def search_page(query: str, page_size: int = 20, cursor: SearchCursor = None) -> SearchPage:
+    """One page of FoodService.search_page results, as FoodViews."""
+    return _search_page(query.strip().lower(), page_size, cursor, generations.catalog())
+
+
+@_cached
+def _day_view(user_id: int, log_date: date, user_generation: int, catalog_generation: int) -> dict:
+    return logging_service.get_day_view(user_id, log_date)
+
+
+def day_view(user_id: int, log_date: date) -> dict:
+    """LoggingService.get_day_view, cached."""
+    return _day_view(user_id, log_date, generations.user(user_id), generations.catalog())
+
+
+@_cached
+def _daily_macros(
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    user_generation: int,
+    catalog_generation: int
+) -> dict[date, dict]:
+    session = db.get_session()
+    try:
+        rows = (
+            session.query(
+                MealLog.log_date,
+                func.sum(Food.calories * MealLog.servings),
+                func.sum(Food.protein_g * MealLog.servings),
+                func.sum(Food.carbs_g * MealLog.servings),
+                func.sum(Food.fat_g * MealLog.servings),
+            )
+            .join(Food, MealLog.food_id == Food.food_id)
+            .filter(
+                MealLog.user_id == user_id,
+                MealLog.log_date >= start_date,
+                MealLog.log_date <= end_date,
+            )
+            .group_by(MealLog.log_date)
+            .all()
+        )
+    finally:
+        session.close()
+
+    daily = {
+        start_date + timedelta(days=i): {"calories": 0, "protein": 0, "carbs": 0, "fat": 0}
+        for i in range((end_date - start_date).days + 1)
+    }
+    for log_date, calories, protein, carbs, fat in rows:
+        daily[log_date] = {
+            "calories": float(calories or 0),
+            "protein": float(protein or 0),
+            "carbs": float(carbs or 0),
+            "fat": float(fat or 0),
+        }
+    return daily
+
+
+def daily_macros(user_id: int, start_date: date, end_date: date) -> dict[date, dict]:
+    """Calories and macros per day in [start_date, end_date], zeros for days without logs."""
+    return _daily_macros(
+        user_id, start_date, end_date, generations.user(user_id), generations.catalog()
+    )
+
+
+def cache_stats() -> list[dict]:
+    """Calls, hits, misses and hit rate per cached function."""
+    return [
+        {
+            "function": name,
+            "calls": _calls[name],
+            "hits": _calls[name] - _misses[name],
+            "misses": _misses[name],
+            "hit_rate": (_calls[name] - _misses[name]) / _calls[name] if _calls[name] else 0.0,
+        }
+        for name in sorted(_calls)
+    ]
+
+
+def clear() -> None:
+    """Drop every cached entry and reset the counters."""
+    st.cache_data.clear()
+    _calls.clear()
+    _misses.clear()
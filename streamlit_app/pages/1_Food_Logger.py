@@ -7,10 +7,11 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 import streamlit as st
 from datetime import date
 
-from src.db.postgres_client import db, Food, MealLog, User
+from src.db.postgres_client import db
 from src.services.food_service import food_service
 from src.services.logging_service import logging_service
 from src.utils import load_config
+from streamlit_app import cached
 
 st.set_page_config(page_title="Food Logger - NutriScan", page_icon="🍽️", layout="wide")
 
@@ -42,26 +43,70 @@ with col_search:
         key="food_search"
     )
 
+    def render_result(food):
+        """One search result row with a select button."""
+        with st.container():
+            cols = st.columns([3, 1, 1, 1, 1])
+            cols[0].markdown(f"**{food.name}**")
+            cols[1].markdown(f"🔥 {food.calories} cal")
+            cols[2].markdown(f"🥩 {food.protein_g}g")
+            cols[3].markdown(f"🍞 {food.carbs_g}g")
+            cols[4].markdown(f"🧈 {food.fat_g}g")
+
+            if st.button("Select", key=f"select_{food.food_id}"):
+                st.session_state.selected_food = food
+                st.rerun()
+
     if search_query:
-        results = food_service.search_local(search_query, limit=10)
-
-        if results:
-            st.markdown(f"**Found {len(results)} results:**")
-
-            for food in results:
-                with st.container():
-                    cols = st.columns([3, 1, 1, 1, 1])
-                    cols[0].markdown(f"**{food.name}**")
-                    cols[1].markdown(f"🔥 {food.calories} cal")
-                    cols[2].markdown(f"🥩 {food.protein_g}g")
-                    cols[3].markdown(f"🍞 {food.carbs_g}g")
-                    cols[4].markdown(f"🧈 {food.fat_g}g")
-
-                    if st.button("Select", key=f"select_{food.food_id}"):
-                        st.session_state.selected_food = food
-                        st.rerun()
+        page_size = load_config()["search_pages"]["page_size"]
+        # Cursors of the pages stepped through for this query; the last one is shown
+        if st.session_state.get("search_pages_query") != search_query:
+            st.session_state.search_pages_query = search_query
+            st.session_state.search_cursors = [None]
+        cursors = st.session_state.search_cursors
+        page = cached.search_page(search_query, page_size, cursors[-1])
+
+        if len(cursors) > 1 or page.next_cursor is not None:
+            # More than a page of matches: render one page at a time
+            st.markdown(f"**Results page {len(cursors)}:**")
+            for food in page.foods:
+                render_result(food)
+
+            nav_cols = st.columns(2)
+            if nav_cols[0].button("Previous page", disabled=len(cursors) == 1, use_container_width=True):
+                cursors.pop()
+                st.rerun()
+            if nav_cols[1].button("Next page", disabled=page.next_cursor is None, use_container_width=True):
+                cursors.append(page.next_cursor)
+                st.rerun()
         else:
-            st.info("No foods found. Try a different search term.")
+            # One page at most: fall back to close matches and top up from USDA
+            local = (page.foods, False) if page.foods else cached.local_matches(search_query, limit=page_size)
+            search = food_service.search_hybrid(search_query, limit=page_size, local=local, view=True)
+            results = search.local
+
+            if results:
+                if search.close_matches:
+                    st.markdown(f"**No exact matches. Showing {len(results)} close matches:**")
+                else:
+                    st.markdown(f"**Found {len(results)} results:**")
+
+                for food in results:
+                    render_result(food)
+            elif search.pending is None:
+                st.info("No foods found. Try a different search term.")
+
+            if search.pending is not None:
+                with st.spinner("Checking USDA for more foods..."):
+                    merged = search.merged(timeout=15)
+
+                extra = merged[len(results):]
+                if extra:
+                    st.markdown(f"**{len(extra)} more from USDA:**")
+                    for food in extra:
+                        render_result(food)
+                elif not results:
+                    st.info("No foods found. Try a different search term.")
 
 with col_log:
     st.subheader("Log Meal")
@@ -70,7 +115,7 @@ with col_log:
         food = st.session_state.selected_food
 
         st.markdown(f"**Selected: {food.name}**")
-        st.markdown(f"Per serving ({food.serving_size}{food.serving_unit}):")
+        st.markdown(f"Per serving ({food.serving_size:g}{food.serving_unit}):")
 
         # Nutrition info
         info_cols = st.columns(2)
@@ -130,36 +175,18 @@ with col_log:
 st.markdown("---")
 st.subheader("Today's Meals")
 
-session = db.get_session()
-try:
-    logs = (
-        session.query(MealLog, Food)
-        .join(Food, MealLog.food_id == Food.food_id)
-        .filter(
-            MealLog.user_id == st.session_state.user_id,
-            MealLog.log_date == date.today()
-        )
-        .order_by(MealLog.logged_at)
-        .all()
-    )
-
-    if logs:
-        # Group by meal type
-        meal_types = ["breakfast", "lunch", "dinner", "snack"]
-
-        for meal_type in meal_types:
-            meal_logs = [(log, food) for log, food in logs if log.meal_type == meal_type]
-            if meal_logs:
-                st.markdown(f"**{meal_type.title()}**")
-                for log, food in meal_logs:
-                    cols = st.columns([3, 1, 1, 1])
-                    cols[0].markdown(f"{food.name} ({log.servings}x)")
-                    cols[1].markdown(f"{float(food.calories) * float(log.servings):.0f} cal")
-                    cols[2].markdown(f"{float(food.protein_g) * float(log.servings):.1f}g protein")
-                    if cols[3].button("Delete", key=f"del_{log.log_id}"):
-                        logging_service.delete_log(log.log_id)
-                        st.rerun()
-    else:
-        st.info("No meals logged today. Start by searching for a food above!")
-finally:
-    session.close()
+day = cached.day_view(st.session_state.user_id, date.today())
+
+if day["meals"]:
+    for meal_type, meal in day["meals"].items():
+        st.markdown(f"**{meal_type.title()}**")
+        for item in meal["items"]:
+            cols = st.columns([3, 1, 1, 1])
+            cols[0].markdown(f"{item['name']} ({item['servings']:g}x)")
+            cols[1].markdown(f"{item['calories']:.0f} cal")
+            cols[2].markdown(f"{item['protein']:.1f}g protein")
+            if cols[3].button("Delete", key=f"del_{item['log_id']}"):
+                logging_service.delete_log(item["log_id"])
+                st.rerun()
+else:
+    st.info("No meals logged today. Start by searching for a food above!")
@@ -9,8 +9,8 @@ import plotly.graph_objects as go
 import plotly.express as px
 from datetime import date
 
-from src.db.postgres_client import db, Food, MealLog, User
-from src.services.logging_service import logging_service
+from src.db.postgres_client import db
+from streamlit_app import cached
 
 st.set_page_config(page_title="Dashboard - NutriScan", page_icon="📊", layout="wide")
 
@@ -28,11 +28,9 @@ init_session()
 st.title("Daily Dashboard")
 st.markdown(f"**{date.today().strftime('%A, %B %d, %Y')}**")
 
-# Get daily totals
-totals = logging_service.calculate_daily_totals(
-    st.session_state.user_id,
-    date.today()
-)
+# Today's totals, meals and items
+day = cached.day_view(st.session_state.user_id, date.today())
+totals = day["totals"]
 
 # Targets
 cal_target = st.session_state.get("calorie_target", 2000)
@@ -132,35 +130,16 @@ with chart_cols[1]:
 st.markdown("---")
 st.subheader("Meals Today")
 
-session = db.get_session()
-try:
-    logs = (
-        session.query(MealLog, Food)
-        .join(Food, MealLog.food_id == Food.food_id)
-        .filter(
-            MealLog.user_id == st.session_state.user_id,
-            MealLog.log_date == date.today()
-        )
-        .all()
-    )
-
-    if logs:
-        meal_types = ["breakfast", "lunch", "dinner", "snack"]
-        meal_icons = {"breakfast": "🌅", "lunch": "☀️", "dinner": "🌙", "snack": "🍿"}
-
-        for meal_type in meal_types:
-            meal_logs = [(log, food) for log, food in logs if log.meal_type == meal_type]
-            if meal_logs:
-                meal_cals = sum(float(food.calories) * float(log.servings) for log, food in meal_logs)
-                st.markdown(f"**{meal_icons.get(meal_type, '')} {meal_type.title()}** - {meal_cals:.0f} cal")
-
-                for log, food in meal_logs:
-                    cals = float(food.calories) * float(log.servings)
-                    st.caption(f"  {food.name} ({log.servings}x) - {cals:.0f} cal")
-    else:
-        st.info("No meals logged today. Head to the Food Logger to add some!")
-finally:
-    session.close()
+if day["meals"]:
+    meal_icons = {"breakfast": "🌅", "lunch": "☀️", "dinner": "🌙", "snack": "🍿"}
+
+    for meal_type, meal in day["meals"].items():
+        st.markdown(f"**{meal_icons.get(meal_type, '')} {meal_type.title()}** - {meal['calories']:.0f} cal")
+
+        for item in meal["items"]:
+            st.caption(f"  {item['name']} ({item['servings']:g}x) - {item['calories']:.0f} cal")
+else:
+    st.info("No meals logged today. Head to the Food Logger to add some!")
 
 # Recommendation
 st.markdown("---")
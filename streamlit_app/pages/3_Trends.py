@@ -10,7 +10,8 @@ import plotly.graph_objects as go
 import pandas as pd
 from datetime import date, timedelta
 
-from src.db.postgres_client import db, DailySummary, MealLog, Food
+from src.db.postgres_client import db
+from streamlit_app import cached
 
 st.set_page_config(page_title="Trends - NutriScan", page_icon="📈", layout="wide")
 
@@ -38,45 +39,14 @@ time_range = st.selectbox(
 days = {"Last 7 days": 7, "Last 14 days": 14, "Last 30 days": 30}[time_range]
 start_date = date.today() - timedelta(days=days)
 
-# Fetch data
-session = db.get_session()
-try:
-    # Get daily data by aggregating meal logs
-    logs = (
-        session.query(MealLog, Food)
-        .join(Food, MealLog.food_id == Food.food_id)
-        .filter(
-            MealLog.user_id == st.session_state.user_id,
-            MealLog.log_date >= start_date
-        )
-        .all()
-    )
-
-    # Aggregate by date
-    daily_data = {}
-    for log, food in logs:
-        d = log.log_date
-        if d not in daily_data:
-            daily_data[d] = {"calories": 0, "protein": 0, "carbs": 0, "fat": 0}
-        daily_data[d]["calories"] += float(food.calories) * float(log.servings)
-        daily_data[d]["protein"] += float(food.protein_g) * float(log.servings)
-        daily_data[d]["carbs"] += float(food.carbs_g) * float(log.servings)
-        daily_data[d]["fat"] += float(food.fat_g) * float(log.servings)
-
-    # Fill missing dates with zeros
-    all_dates = [start_date + timedelta(days=i) for i in range(days + 1)]
-    for d in all_dates:
-        if d not in daily_data:
-            daily_data[d] = {"calories": 0, "protein": 0, "carbs": 0, "fat": 0}
-
-    # Convert to DataFrame
-    df = pd.DataFrame([
-        {"date": d, **vals}
-        for d, vals in sorted(daily_data.items())
-    ])
-
-finally:
-    session.close()
+# Daily totals, with zeros for days without logs
+daily_data = cached.daily_macros(st.session_state.user_id, start_date, date.today())
+
+# Convert to DataFrame
+df = pd.DataFrame([
+    {"date": d, **vals}
+    for d, vals in sorted(daily_data.items())
+])
 
 if df.empty or df["calories"].sum() == 0:
     st.info("Not enough data to show trends. Log some meals first!")
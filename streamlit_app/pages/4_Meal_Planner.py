@@ -8,19 +8,38 @@ import streamlit as st
 from datetime import date
 
 from src.db.postgres_client import db, Food
+from src.services.constraints import DietaryConstraints
 from src.services.meal_planner import MealPlanner
+from src.services.plan_cache import plan_cache
+from src.utils import load_config
 
 st.set_page_config(page_title="Meal Planner - NutriScan", page_icon="📅", layout="wide")
 
 db.create_tables()
 
 
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
 def init_session():
     if "user_id" not in st.session_state:
         st.warning("Please visit the home page first to initialize your session.")
         st.stop()
 
 
+def render_week_day(day_plan: dict):
+    """Compact summary of one day of a week plan."""
+    totals = MealPlanner.day_totals(day_plan)
+    label = (
+        f"{DAY_NAMES[day_plan['day'] % 7]} - {totals['calories']:.0f} cal, "
+        f"{totals['protein']:.0f}g protein"
+    )
+    with st.expander(label, expanded=day_plan["day"] == 0):
+        for meal in day_plan["meals"]:
+            foods = ", ".join(f"{item['name']} ({item['servings']}x)" for item in meal["foods"])
+            st.markdown(f"**{meal['meal_type'].title()}** ({meal['calories']:.0f} cal): {foods}")
+
+
 init_session()
 
 st.title("Meal Plan Generator")
@@ -71,44 +90,119 @@ pref_cols = st.columns(3)
 vegetarian = pref_cols[0].checkbox("Vegetarian")
 high_protein = pref_cols[1].checkbox("High Protein Focus")
 low_carb = pref_cols[2].checkbox("Low Carb")
+plan_length = st.radio("Plan for", ["One day", "Whole week"], horizontal=True)
+week_mode = plan_length == "Whole week"
+best_of_n = st.checkbox(
+    "Compare several candidate plans and keep the best",
+    help="Generates plans in parallel and picks the one closest to your targets"
+)
 
 # Generate button
 st.markdown("---")
 
-if st.button("Generate Meal Plan", type="primary", use_container_width=True):
-    with st.spinner("Generating your personalized meal plan..."):
-        planner = MealPlanner()
-
-        try:
-            plan = planner.generate_day_plan(
-                calorie_target=calorie_target,
-                protein_target=protein_target,
-                carb_target=carb_target,
-                fat_target=fat_target,
-                vegetarian=vegetarian,
-                high_protein=high_protein
-            )
-
-            if plan:
-                st.session_state.meal_plan = plan
-                st.success("Meal plan generated!")
-            else:
-                st.error("Could not generate a meal plan. Try adjusting your targets.")
-        except Exception as e:
-            st.error(f"Error generating plan: {e}")
+if "plan_seed" not in st.session_state:
+    st.session_state.plan_seed = 0
+
+if "meal_plan" not in st.session_state:
+    # Show today's day of the week plan precomputed overnight, if any
+    week = plan_cache.get_stored_plan(
+        st.session_state.user_id,
+        calorie_target=calorie_target,
+        protein_target=protein_target,
+        carb_target=carb_target,
+        fat_target=fat_target,
+        constraints=DietaryConstraints.from_flags(vegetarian, high_protein, low_carb)
+    )
+    today = date.today().weekday()
+    st.session_state.meal_plan = next((d for d in week or [] if d["day"] == today), None)
+    st.session_state.week_plan = week or []
+
+has_plan = bool(st.session_state.get("week_plan" if week_mode else "meal_plan"))
+week_rendered = False
+button_cols = st.columns([2, 1, 1])
+generate = button_cols[0].button("Generate Meal Plan", type="primary", use_container_width=True)
+previous = button_cols[1].button(
+    "← Previous plan",
+    use_container_width=True,
+    disabled=not has_plan or st.session_state.plan_seed == 0
+)
+another = button_cols[2].button("Show me another plan →", use_container_width=True, disabled=not has_plan)
+
+if generate or previous or another:
+    # Each seed is one plan variant; cached plans make paging instant
+    if generate:
+        st.session_state.plan_seed = 0
+    elif previous:
+        st.session_state.plan_seed -= 1
+    else:
+        st.session_state.plan_seed += 1
+
+    plan_args = dict(
+        user_id=st.session_state.user_id,
+        seed=st.session_state.plan_seed,
+        best_of=load_config()["plan_search"]["candidates"] if best_of_n else 1,
+        calorie_target=calorie_target,
+        protein_target=protein_target,
+        carb_target=carb_target,
+        fat_target=fat_target,
+        vegetarian=vegetarian,
+        high_protein=high_protein,
+        low_carb=low_carb
+    )
+
+    if week_mode:
+        # Render each day as soon as it is planned instead of after all seven
+        st.markdown("---")
+        st.subheader("Your Week")
+        week = []
+        with st.spinner("Planning your week..."):
+            try:
+                for day_plan in plan_cache.iter_plan(days=7, **plan_args):
+                    render_week_day(day_plan)
+                    week.append(day_plan)
+            except Exception as e:
+                st.error(f"Error generating plan: {e}")
+        st.session_state.week_plan = week
+        week_rendered = True
+        if not week:
+            st.error("Could not generate a meal plan. Try adjusting your targets.")
+
+    else:
+        with st.spinner("Generating your personalized meal plan..."):
+            try:
+                days = plan_cache.get_plan(**plan_args)
+                plan = days[0] if days else None
+
+                if plan:
+                    st.session_state.meal_plan = plan
+                    st.session_state.rejected_foods = []
+                    st.success(f"Meal plan #{st.session_state.plan_seed + 1} generated!")
+                else:
+                    st.error("Could not generate a meal plan. Try adjusting your targets.")
+            except Exception as e:
+                st.error(f"Error generating plan: {e}")
 
 # Display meal plan
-if "meal_plan" in st.session_state and st.session_state.meal_plan:
+if week_mode:
+    if st.session_state.get("week_plan") and not week_rendered:
+        st.markdown("---")
+        st.subheader("Your Week")
+        for day_plan in st.session_state.week_plan:
+            render_week_day(day_plan)
+    elif not st.session_state.get("week_plan"):
+        st.info("Click 'Generate Meal Plan' to plan your whole week.")
+elif "meal_plan" in st.session_state and st.session_state.meal_plan:
     plan = st.session_state.meal_plan
 
     st.markdown("---")
     st.subheader("Your Meal Plan")
 
     # Totals
-    total_cals = sum(m["calories"] for m in plan["meals"])
-    total_protein = sum(m["protein"] for m in plan["meals"])
-    total_carbs = sum(m["carbs"] for m in plan["meals"])
-    total_fat = sum(m["fat"] for m in plan["meals"])
+    totals = MealPlanner.day_totals(plan)
+    total_cals = totals["calories"]
+    total_protein = totals["protein"]
+    total_carbs = totals["carbs"]
+    total_fat = totals["fat"]
 
     total_cols = st.columns(4)
     total_cols[0].metric("Total Calories", f"{total_cals:.0f}", delta=f"{total_cals - calorie_target:.0f}")
@@ -121,18 +215,37 @@ if "meal_plan" in st.session_state and st.session_state.meal_plan:
     # Meals
     meal_icons = {"breakfast": "🌅", "lunch": "☀️", "dinner": "🌙", "snack": "🍿"}
 
+    # Edits keep the rest of the plan and only re-plan the touched meal
+    planner = MealPlanner()
+    constraints = DietaryConstraints.from_flags(vegetarian, high_protein, low_carb)
+    rejected = st.session_state.setdefault("rejected_foods", [])
+
     for meal in plan["meals"]:
         with st.container():
             icon = meal_icons.get(meal["meal_type"], "🍽️")
-            st.markdown(f"### {icon} {meal['meal_type'].title()}")
+            header_cols = st.columns([5, 1])
+            header_cols[0].markdown(f"### {icon} {meal['meal_type'].title()}")
+            if header_cols[1].button("Re-plan meal", key=f"replan_{meal['meal_type']}"):
+                rejected.extend(item["food_id"] for item in meal["foods"])
+                st.session_state.meal_plan = planner.reoptimize_meal(
+                    plan, meal["meal_type"], exclude_ids=rejected, constraints=constraints
+                )
+                st.rerun()
 
             for item in meal["foods"]:
-                item_cols = st.columns([3, 1, 1, 1, 1])
+                item_cols = st.columns([3, 1, 1, 1, 1, 1])
                 item_cols[0].markdown(f"**{item['name']}** ({item['servings']}x)")
                 item_cols[1].markdown(f"{item['calories']:.0f} cal")
                 item_cols[2].markdown(f"{item['protein']:.0f}g protein")
                 item_cols[3].markdown(f"{item['carbs']:.0f}g carbs")
                 item_cols[4].markdown(f"{item['fat']:.0f}g fat")
+                if item_cols[5].button("Swap", key=f"swap_{meal['meal_type']}_{item['food_id']}"):
+                    rejected.append(item["food_id"])
+                    st.session_state.meal_plan = planner.swap_item(
+                        plan, meal["meal_type"], item["food_id"],
+                        exclude_ids=rejected, constraints=constraints
+                    )
+                    st.rerun()
 
             st.markdown(f"**Meal Total:** {meal['calories']:.0f} cal | {meal['protein']:.0f}g protein")
             st.markdown("---")
@@ -7,6 +7,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 import streamlit as st
 
 from src.db.postgres_client import db, User
+from src.services.generations import generations
+from src.services.user_service import user_service
+from streamlit_app import cached
 
 st.set_page_config(page_title="Settings - NutriScan", page_icon="⚙️", layout="wide")
 
@@ -186,3 +189,27 @@ st.markdown("""
 
 **Carbs & Fat:** These can be adjusted based on personal preference while staying within your calorie target.
 """)
+
+# Debug view
+st.markdown("---")
+with st.expander("Debug"):
+    st.markdown("**Page cache**")
+    stats = cached.cache_stats()
+    if stats:
+        st.dataframe(
+            [{**row, "hit_rate": f"{row['hit_rate']:.0%}"} for row in stats],
+            use_container_width=True,
+            hide_index=True,
+        )
+    else:
+        st.caption("No cached reads yet.")
+
+    debug_cols = st.columns(2)
+    debug_cols[0].metric("Catalog generation", generations.catalog())
+    debug_cols[1].metric("Your data generation", generations.user(st.session_state.user_id))
+
+    st.metric("Users created", user_service.metrics["users_created"])
+
+    if st.button("Clear page cache"):
+        cached.clear()
+        st.rerun()